@@ -3,12 +3,13 @@
 """
 トップページ（ID: 1726）を動的データから完全自動生成
 すべてのデータはAPIから取得し、静的データは一切含まない
+
+データ・テンプレートが前回と同じならHTMLは書き換えない（--force で常に生成）
 """
 
 import os
 import sys
 from pathlib import Path
-from statistics import mean
 from datetime import datetime
 
 # 親ディレクトリのreal_estate_client.pyをインポート
@@ -16,7 +17,14 @@ backend_path = '/workspaces/real-estate-app/backend/property-api'
 if backend_path not in sys.path:
     sys.path.insert(0, backend_path)
 
-from real_estate_client import RealEstateAPIClient
+# 地価データの取得（scripts/land_price_dataset.py）
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'scripts'))
+from land_price_dataset import load_land_price_dataset
+from page_build import build_pages, source_version
+
+# HTMLの構成（このファイル）を変えたらデータが同じでも生成し直す
+TEMPLATE_VERSION = source_version(__file__)
+
 
 def calculate_tsubo_price(price_per_sqm: float) -> float:
     """坪単価を計算（万円/坪）"""
@@ -39,52 +47,13 @@ def fetch_national_average_2025():
     print("📊 2025年 全国平均地価データを取得中...")
     print("=" * 80)
 
-    client = RealEstateAPIClient()
-    all_prices = []
-    all_change_rates = []
-    total_count = 0
-
-    # 全都道府県のデータを取得
-    for i, (pref_name, pref_code) in enumerate(client.prefecture_codes.items(), 1):
-        print(f"[{i}/47] {pref_name}...", end=" ")
-
-        try:
-            data = client.search_land_prices(
-                prefecture=pref_name,
-                year="2025"
-            )
-
-            if data:
-                # 地価データを収集
-                for item in data:
-                    price = item.get('price_per_sqm', 0)
-                    if price > 0:
-                        all_prices.append(price)
-                        total_count += 1
-
-                    # 変動率を取得
-                    change_rate_str = str(item.get('change_rate', '')).strip()
-                    if change_rate_str:
-                        try:
-                            change_rate = float(change_rate_str.replace('%', '').replace('+', ''))
-                            all_change_rates.append(change_rate)
-                        except:
-                            pass
-
-                print(f"✅ {len(data)}件")
-            else:
-                print("⚠️ データなし")
-
-        except Exception as e:
-            print(f"❌ エラー - スキップ")
-            continue
-
-    if not all_prices:
-        raise Exception("データ取得に失敗しました")
+    # 全都道府県のデータを並列に1回だけ取得（取得できなかった都道府県はスキップ）
+    national_data = load_land_price_dataset("2025").national_summary()
+    total_count = national_data['data_count']
 
     # 平均を計算
-    avg_price = int(mean(all_prices))
-    avg_change_rate = round(mean(all_change_rates), 1) if all_change_rates else 0
+    avg_price = national_data['average_price']
+    avg_change_rate = national_data['change_rate']
     avg_tsubo_price_man = calculate_tsubo_price(avg_price)  # 万円/坪
     avg_tsubo_price_yen = int(avg_tsubo_price_man * 10000)  # 円/坪
 
@@ -158,13 +127,19 @@ def main():
         print(f"  変動率: {data['change_rate']:+.2f}%")
         print(f"  データ件数: {data['data_count']:,}件")
 
-        # HTML生成
-        html = generate_html(data)
-
-        # ファイル保存
+        # HTML生成・保存（更新日時以外の入力が前回と同じならスキップ）
         output_file = 'page_1726_summary_section.html'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html)
+        inputs = {key: value for key, value in data.items() if key != 'updated_at'}
+        result = build_pages(
+            [(output_file, inputs)], lambda _: generate_html(data), '.',
+            TEMPLATE_VERSION, force='--force' in sys.argv[1:], verbose=False
+        )
+
+        if result['failed']:
+            raise Exception(result['failed'][output_file])
+        if not result['built']:
+            print(f"\n⏭  データに変更がないためスキップしました: {output_file}")
+            return True
 
         print(f"\n✅ HTMLを生成しました: {output_file}")
         print("\n次のステップ:")
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+ooya-dx_2026/api/shared の共通処理の読み込み口
+
+地価ページの生成スクリプトが API 側と同じ処理（変動率の解析・分位点スケッチ・取り込みストアと地価履歴ストアの参照）を使うときは、
+各スクリプトで sys.path を書き換えずにここから import する。
+API ディレクトリを import パスに加えるのはこのモジュールだけにする。
+
+使用例:
+    from api_shared import parse_change_rate
+    parse_change_rate('▲0.5')  # -0.5
+"""
+
+import sys
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parents[4] / 'ooya-dx_2026' / 'api'
+
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+from shared.land_price_history import get_land_price_history
+from shared.market_data import LandPriceStoreClient, parse_change_rate
+from shared.price_cube import QuantileSketch
@@ -7,15 +7,20 @@ ID:1726（全国トップページ）用の公示地価マスターデータを
 都道府県平均 = Σ(その都道府県の全データポイント) / その都道府県のデータポイント数
 """
 
+import os
 import sys
 import csv
-from statistics import mean
+from pathlib import Path
 from datetime import datetime
 
 # Backend pathを追加
 
 sys.path.insert(0, '/workspaces/real-estate-app/backend/property-api')
-from real_estate_client import RealEstateAPIClient
+
+# 地価データの取得（scripts/land_price_client.py, land_price_dataset.py）
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from land_price_client import get_land_price_client
+from land_price_dataset import LandPriceDataset, load_land_price_dataset
 
 
 def fetch_national_average_all_datapoints(year="2025"):
@@ -24,110 +29,32 @@ def fetch_national_average_all_datapoints(year="2025"):
 
     全47都道府県の全公示地価データポイントを取得し、
     その全体から平均値を算出する。
+    取得したデータセットはプロセス内で共有され、都道府県別の集計でも再利用される。
     """
     print(f"📊 {year}年 全国平均データを取得中（全データポイント方式）...")
     print("=" * 80)
 
-    client = RealEstateAPIClient()
-    all_prices = []  # 全データポイントの地価
-    all_change_rates = []  # 全データポイントの変動率
-
-    # 全都道府県のデータを取得
-    for i, (pref_name, _) in enumerate(client.prefecture_codes.items(), 1):
-        print(f"[{i}/47] {pref_name}...", end=" ", flush=True)
-
-        try:
-            data = client.search_land_prices(prefecture=pref_name, year=year)
-
-            if data:
-                # 各データポイントを収集
-                for item in data:
-                    price = item.get('price_per_sqm', 0)
-                    if price > 0:
-                        all_prices.append(price)
-
-                    change_rate_str = str(item.get('change_rate', '')).strip()
-                    if change_rate_str:
-                        try:
-                            change_rate = float(change_rate_str.replace('%', '').replace('+', ''))
-                            all_change_rates.append(change_rate)
-                        except:
-                            pass
-
-                print(f"✅ {len(data)}件")
-            else:
-                print("⚠️ データなし")
-
-        except Exception as e:
-            print(f"❌ エラー")
-            continue
-
-    if not all_prices:
-        raise Exception("データ取得に失敗しました")
-
-    # 全データポイントから平均を計算
-    avg_price = int(mean(all_prices))
-    avg_change_rate = round(mean(all_change_rates), 1) if all_change_rates else 0
-    avg_tsubo_price = int(avg_price * 3.30579)
+    national_data = load_land_price_dataset(year).national_summary()
 
     print(f"\n✅ 全データポイントから平均を計算:")
-    print(f"   データポイント数: {len(all_prices):,}件")
-    print(f"   平均地価: {avg_price:,}円/㎡")
-    print(f"   変動率: {avg_change_rate:+.1f}%\n")
+    print(f"   データポイント数: {national_data['data_count']:,}件")
+    print(f"   平均地価: {national_data['average_price']:,}円/㎡")
+    print(f"   変動率: {national_data['change_rate']:+.1f}%\n")
 
-    return {
-        'average_price': avg_price,
-        'tsubo_price': avg_tsubo_price,
-        'change_rate': avg_change_rate,
-        'data_count': len(all_prices)
-    }
+    return national_data
 
 
-def fetch_prefecture_data_all_datapoints(pref_name, year="2025"):
-    """都道府県別データ取得（全データポイント方式）"""
+def fetch_prefecture_data_all_datapoints(pref_name, year="2025", data=None):
+    """
+    都道府県別データ取得（全データポイント方式）
 
-    client = RealEstateAPIClient()
+    data に取得済みのデータを渡した場合はAPIを呼ばずに集計する。
+    """
 
     try:
-        data = client.search_land_prices(prefecture=pref_name, year=year)
-
-        if not data:
-            return None
-
-        prices = []
-        change_rates = []
-
-        # 全データポイントを収集
-        for item in data:
-            price = item.get('price_per_sqm', 0)
-            if price > 0:
-                prices.append(price)
-
-            change_rate_str = str(item.get('change_rate', '')).strip()
-            if change_rate_str:
-                try:
-                    change_rate = float(change_rate_str.replace('%', '').replace('+', ''))
-                    change_rates.append(change_rate)
-                except:
-                    pass
-
-        if not prices:
-            return None
-
-        # 全データポイントから平均を計算
-        avg_price = int(mean(prices))
-        avg_change_rate = round(mean(change_rates), 1) if change_rates else 0
-        avg_tsubo_price = int(avg_price * 3.30579)
-        tsubo_price_man = round(avg_tsubo_price / 10000, 1)
-
-        return {
-            'prefecture_name': pref_name,
-            'average_price': avg_price,
-            'tsubo_price': avg_tsubo_price,
-            'tsubo_price_man': tsubo_price_man,
-            'change_rate': avg_change_rate,
-            'data_count': len(prices)
-        }
+        if data is not None:
+            return LandPriceDataset.from_points(year, {pref_name: data}).prefecture_summary(pref_name)
+        return load_land_price_dataset(year).prefecture_summary(pref_name)
 
     except Exception as e:
         return None
@@ -141,21 +68,24 @@ def generate_master_csv(output_file='page_1726_master_correct.csv'):
     print("計算ロジック: Option A - 全データポイント方式")
     print("=" * 80 + "\n")
 
-    # 1. 全国平均データ取得（2025年）
+    # 1. 全国平均データ取得（2025年）。全都道府県のデータはここで1回だけ取得する
     national_data = fetch_national_average_all_datapoints("2025")
 
-    # 2. 47都道府県データ取得
+    # 2. 47都道府県データ（取得済みのデータセットから集計）
     print("\n" + "=" * 80)
-    print("47都道府県のデータを取得中...")
+    print("47都道府県のデータを集計中...")
     print("=" * 80 + "\n")
 
-    client = RealEstateAPIClient()
+    dataset = load_land_price_dataset("2025")
     prefecture_data_list = []
 
-    for i, (pref_name, _) in enumerate(client.prefecture_codes.items(), 1):
+    for i, pref_name in enumerate(get_land_price_client().prefecture_codes, 1):
         print(f"[{i}/47] {pref_name}...", end=" ", flush=True)
 
-        pref_data = fetch_prefecture_data_all_datapoints(pref_name, "2025")
+        if pref_name in dataset.failures:
+            print("❌ 取得失敗")
+            continue
+        pref_data = dataset.prefecture_summary(pref_name)
 
         if pref_data:
             prefecture_data_list.append(pref_data)
@@ -166,14 +96,12 @@ def generate_master_csv(output_file='page_1726_master_correct.csv'):
     print(f"\n✅ データ取得完了: 全国1件 + 都道府県{len(prefecture_data_list)}件\n")
 
     # 3. 各種ランキング作成
-    high_price_ranking = sorted(prefecture_data_list, key=lambda x: x['average_price'], reverse=True)[:10]
-    low_price_ranking = sorted(prefecture_data_list, key=lambda x: x['average_price'])[:10]
-    increase_ranking = sorted(prefecture_data_list, key=lambda x: x['change_rate'], reverse=True)[:10]
-    decrease_ranking = sorted(prefecture_data_list, key=lambda x: x['change_rate'])[:10]
-
-    normal_ranking = sorted(prefecture_data_list, key=lambda x: x['average_price'], reverse=True)
-    for rank, pref_data in enumerate(normal_ranking, start=1):
-        pref_data['rank'] = rank
+    rankings = dataset.rankings(limit=10)
+    high_price_ranking = rankings['high']
+    low_price_ranking = rankings['low']
+    increase_ranking = rankings['increase']
+    decrease_ranking = rankings['decrease']
+    normal_ranking = rankings['all']
 
     # 4. CSVに書き込み
     print("=" * 80)
@@ -278,7 +206,6 @@ def generate_master_csv(output_file='page_1726_master_correct.csv'):
 
     print(f"✅ マスターCSVを生成しました: {output_file}\n")
 
-    import os
     size = os.path.getsize(output_file)
     print(f"📄 ファイルサイズ: {size:,} bytes ({size/1024:.1f} KB)\n")
 
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+公示地価の過去の推移セクション（html-sections/history_section.html）の生成
+
+地価履歴ストア（ooya-dx_2026/api/shared/land_price_history.py）の年次推移から、
+直近の年の平均地価・坪単価・変動率の表を作る。APIのクロールや手作業の転記は不要。
+変動率は前年にも価格がある同一地点だけで求めた平均（前年の無い年は「－」）。
+
+履歴ストアは ooya-dx_2026/scripts/ingest_market_data.py で公示地価を取り込むと再構築される。
+データ・テンプレートが前回と同じならHTMLは書き換えない（--force で常に生成）。
+
+使用例:
+    python scripts/generate_history_section.py
+    python scripts/generate_history_section.py --prefecture 東京都 --output html-sections/history_section_tokyo.html
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from api_shared import get_land_price_history
+from page_build import build_pages, source_version
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_OUTPUT = BASE_DIR / 'html-sections' / 'history_section.html'
+
+# 表に載せる年数（新しい順）
+DEFAULT_YEARS = 5
+
+# HTMLの構成（このファイル）を変えたらデータが同じでも生成し直す
+TEMPLATE_VERSION = source_version(__file__)
+
+# 円/㎡ → 円/坪
+TSUBO_PER_SQM = 3.30579
+
+ROW_TEMPLATE = '''<tr style="border-bottom: 1px solid #e5e7eb;">
+    <td style="padding: 6px 12px; text-align: center; font-weight: 600;">{year}年</td>
+    <td style="padding: 6px 12px; text-align: right; font-weight: 600; color: #667eea;">{price:,}</td>
+    <td style="padding: 6px 12px; text-align: right; font-weight: 600;">{tsubo}</td>
+    <td style="padding: 6px 12px; text-align: center;">{change}</td>
+</tr>'''
+
+
+def format_change(rate):
+    """変動率の表示（前年と比べられない年は「－」）"""
+    if rate is None:
+        return '<span style="color: #6b7280; font-weight: 600;">－</span>'
+    if rate > 0:
+        return f'<span style="color: #16a34a; font-weight: 600;">↑ +{rate:.1f}%</span>'
+    if rate < 0:
+        return f'<span style="color: #dc2626; font-weight: 600;">↓ {rate:.1f}%</span>'
+    return f'<span style="color: #6b7280; font-weight: 600;">→ {rate:.1f}%</span>'
+
+
+def render_history_section(data):
+    """
+    推移セクションのHTML
+
+    Args:
+        data: {'area': 見出しの地域名, 'note': 注記, 'series': LandPriceHistory.series() の戻り値（新しい順）}
+    """
+    rows = '\n'.join(
+        ROW_TEMPLATE.format(
+            year=entry['year'],
+            price=entry['average_price'],
+            tsubo=round(entry['average_price'] * TSUBO_PER_SQM / 10000, 1),
+            change=format_change(entry['change_rate']),
+        )
+        for entry in data['series']
+    )
+    return f'''
+<!-- {data['area']}の公示地価 過去の推移 -->
+<section style="margin-bottom: 60px;">
+    <h3 style="font-size: 20px; font-weight: 600; margin: 0 0 20px 0;">📈 {data['area']}の公示地価　過去の推移</h3>
+
+    <div style="overflow-x: auto;">
+        <table style="width: 100%; border-collapse: collapse; background: white; font-size: 14px; border: 1px solid #e5e7eb;">
+            <thead>
+                <tr style="background: #f9fafb; border-bottom: 2px solid #667eea;">
+                    <th style="padding: 12px; text-align: center; font-weight: 600;">年度</th>
+                    <th style="padding: 12px; text-align: right; font-weight: 600;">公示地価平均（円/㎡）</th>
+                    <th style="padding: 12px; text-align: right; font-weight: 600;">坪単価平均（万円/坪）</th>
+                    <th style="padding: 12px; text-align: center; font-weight: 600;">変動率</th>
+                </tr>
+            </thead>
+            <tbody>
+{rows}
+            </tbody>
+        </table>
+    </div>
+
+    <p style="font-size: 13px; color: #6b7280; margin: 12px 0 0 0;">※ {data['note']}</p>
+</section>
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description='地価履歴ストアから過去の推移セクションを生成')
+    parser.add_argument('--prefecture', default=None, help='都道府県名（省略すると全国）')
+    parser.add_argument('--city', default=None, help='市区町村名（--prefecture と併用）')
+    parser.add_argument('--years', type=int, default=DEFAULT_YEARS, help='表に載せる年数')
+    parser.add_argument('--store', default=None, help='地価履歴ストアのディレクトリ（既定: LAND_PRICE_HISTORY_DIR）')
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='出力ファイル')
+    parser.add_argument('--force', action='store_true', help='データが同じでも生成し直す')
+    args = parser.parse_args()
+    if args.city and not args.prefecture:
+        # 市区町村だけでは地域を決められない（全国の数値を「全国」として出してしまう）
+        parser.error('--city は --prefecture と一緒に指定してください')
+
+    history = get_land_price_history(args.store)
+    if history is None:
+        print('❌ 地価履歴ストアがありません（ooya-dx_2026/scripts/ingest_market_data.py land_prices で作成）')
+        return 1
+
+    series = history.series(args.prefecture, args.city)[::-1][:args.years]
+    if not series:
+        print(f'❌ 該当する地域のデータがありません: {args.prefecture or "全国"} {args.city or ""}')
+        return 1
+
+    if args.prefecture is None:
+        area, note = '日本全国', '全国47都道府県の公示地価データから算出した平均値です。'
+    else:
+        area = f'{args.prefecture}{args.city or ""}'
+        note = f'{area}の公示地価データから算出した平均値です。'
+    data = {'area': area, 'note': note, 'series': series}
+
+    output = Path(args.output)
+    result = build_pages(
+        [(output.name, data)], render_history_section, str(output.parent),
+        TEMPLATE_VERSION, force=args.force, verbose=False
+    )
+    if result['failed']:
+        print(f"❌ エラー: {result['failed'][output.name]}")
+        return 1
+    if not result['built']:
+        print(f'⏭  データに変更がないためスキップしました: {output}')
+        return 0
+
+    for entry in series:
+        rate = '－' if entry['change_rate'] is None else f"{entry['change_rate']:+.1f}%"
+        print(f"   {entry['year']}年: {entry['average_price']:,}円/㎡  変動率 {rate}  ({entry['data_count']:,}地点)")
+    print(f'✅ 推移セクションを生成しました: {output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+都道府県ページの一括生成（差分生成）
+
+data/prefecture_ranking_data.json の都道府県ごとに templates/prefecture_template.py でHTMLを生成し、
+pages/prefectures/<slug>.html に書き出す。
+前回から入力データ・テンプレートが変わっていないページは生成しない（scripts/page_build.py）。
+生成するページが多い場合は --workers のプロセス数で並列に生成する。
+
+使用例:
+    python scripts/generate_prefecture_pages.py
+    python scripts/generate_prefecture_pages.py --force --workers 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR / 'templates'))
+sys.path.insert(0, str(BASE_DIR / 'scripts'))
+
+from page_build import build_pages, source_version
+from prefecture_template import TEMPLATE_SOURCES, generate_prefecture_page
+from ranking_data import PREFECTURE_RANKING_FILE, load_prefecture_ranking
+
+DEFAULT_DATA_FILE = PREFECTURE_RANKING_FILE
+DEFAULT_OUTPUT_DIR = BASE_DIR / 'pages' / 'prefectures'
+
+# テンプレート・共通パーツのソースが変わったら全ページを生成し直す
+TEMPLATE_VERSION = source_version(*TEMPLATE_SOURCES)
+
+
+def load_prefecture_pages(data_file=DEFAULT_DATA_FILE):
+    """(出力ファイル名, テンプレートの入力データ) のリスト"""
+    pages = []
+    for pref in load_prefecture_ranking(data_file):
+        pages.append((f"{pref['slug']}.html", {
+            'name': pref['name'],
+            'slug': pref['slug'],
+            'avg_price': pref['price_per_sqm'],
+            'change_rate': pref['change_rate'],
+            'rank': pref['rank'],
+            'cities': pref.get('cities', []),
+        }))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description='都道府県ページの一括生成（変更のあったページのみ）')
+    parser.add_argument('--data', default=str(DEFAULT_DATA_FILE), help='都道府県データ（JSON）')
+    parser.add_argument('--output-dir', default=str(DEFAULT_OUTPUT_DIR), help='出力先ディレクトリ')
+    parser.add_argument('--force', action='store_true', help='変更がなくても全ページを生成し直す')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='並列に生成するプロセス数')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    pages = load_prefecture_pages(args.data)
+    result = build_pages(pages, generate_prefecture_page, args.output_dir, TEMPLATE_VERSION,
+                         force=args.force, workers=args.workers)
+    print(f"処理時間: {time.perf_counter() - started:.2f}秒（{args.output_dir}）")
+    return 1 if result['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+地価APIレスポンスのディスクキャッシュ
+
+RealEstateAPIClient をラップし、search_land_prices の結果を
+リクエストパラメータをキーにしてgzip圧縮JSONで保存する。
+取得日時を一緒に保存し、有効期限内ならAPIを呼ばずにキャッシュを返す。
+直近に引いた数件（MEMORY_ENTRIES 件）だけはメモリにも持ち、続けて同じ条件を引いた場合はディスクも読まない。
+メモリに持つ件数は固定なので、対象を市区町村単位・複数年に広げてもメモリ使用量は増えない。
+
+環境変数:
+    LAND_PRICE_CACHE_DIR      キャッシュの保存先（既定: ~/.cache/ooya-dx/land_prices）
+    LAND_PRICE_CACHE_MAX_AGE  有効期限（秒、既定: 30日）
+    LAND_PRICE_CACHE_REFRESH  1 にすると期限内でもAPIから取り直す
+    LAND_PRICE_CACHE          0 にするとキャッシュを使わない
+
+使用例:
+    python scripts/land_price_cache.py --stats
+    python scripts/land_price_cache.py --clear
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(os.getenv('LAND_PRICE_CACHE_DIR', Path.home() / '.cache' / 'ooya-dx' / 'land_prices'))
+DEFAULT_MAX_AGE = int(os.getenv('LAND_PRICE_CACHE_MAX_AGE', str(30 * 24 * 60 * 60)))
+
+# メモリに持つレスポンスの件数（古いものから捨てる）
+MEMORY_ENTRIES = 4
+
+# レスポンス形式を変えたら上げる（古いキャッシュは無視される）
+CACHE_FORMAT_VERSION = 1
+
+
+def cache_key(method, params):
+    """メソッド名とパラメータからキャッシュキーを作る（パラメータの順序に依存しない）"""
+    payload = json.dumps([CACHE_FORMAT_VERSION, method, params], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class CachedLandPriceClient:
+    """
+    search_land_prices の結果をディスクにキャッシュするクライアント
+
+    prefecture_codes などその他の属性はラップ元のクライアントをそのまま返す。
+    """
+
+    def __init__(self, client, cache_dir=DEFAULT_CACHE_DIR, max_age=DEFAULT_MAX_AGE, refresh=None):
+        self.client = client
+        self.cache_dir = Path(cache_dir)
+        self.max_age = max_age
+        self.refresh = os.getenv('LAND_PRICE_CACHE_REFRESH') == '1' if refresh is None else refresh
+        self.memory = OrderedDict()  # キャッシュキー → レスポンス（最近使った順）
+        self.lock = threading.Lock()
+        self.stats = {'memory': 0, 'disk': 0, 'fetched': 0}
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def _remember(self, key, data):
+        """メモリに持つ（lock を取った状態で呼ぶ）"""
+        self.memory[key] = data
+        self.memory.move_to_end(key)
+        while len(self.memory) > MEMORY_ENTRIES:
+            self.memory.popitem(last=False)
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json.gz"
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get('fetched_at', 0) > self.max_age:
+            return None
+        return entry['data']
+
+    def _write(self, key, params, data):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {'fetched_at': time.time(), 'params': params, 'data': data}
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def lookup(self, prefecture, year="2025", **kwargs):
+        """キャッシュにあれば返し、無ければNone（APIは呼ばない）"""
+        params = {'prefecture': prefecture, 'year': str(year), **kwargs}
+        key = cache_key('search_land_prices', params)
+
+        with self.lock:
+            if key in self.memory:
+                self.stats['memory'] += 1
+                self.memory.move_to_end(key)
+                return self.memory[key]
+
+        data = None if self.refresh else self._read(key)
+        if data is not None:
+            with self.lock:
+                self.stats['disk'] += 1
+                self._remember(key, data)
+        return data
+
+    def search_land_prices(self, prefecture, year="2025", **kwargs):
+        data = self.lookup(prefecture, year, **kwargs)
+        if data is None:
+            params = {'prefecture': prefecture, 'year': str(year), **kwargs}
+            key = cache_key('search_land_prices', params)
+            data = self.client.search_land_prices(prefecture=prefecture, year=year, **kwargs)
+            # 空の結果やエラーはキャッシュしない（一時的な失敗を固定しないため）
+            if data:
+                self._write(key, params, data)
+            with self.lock:
+                self.stats['fetched'] += 1
+                if data:
+                    self._remember(key, data)
+        return data
+
+
+def wrap_with_cache(client):
+    """LAND_PRICE_CACHE=0 でなければキャッシュ付きクライアントを返す"""
+    if os.getenv('LAND_PRICE_CACHE') == '0':
+        return client
+    return CachedLandPriceClient(client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='地価APIキャッシュの管理')
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR))
+    parser.add_argument('--stats', action='store_true', help='件数・サイズ・期限切れ件数を表示')
+    parser.add_argument('--clear', action='store_true', help='キャッシュを全て削除')
+    args = parser.parse_args()
+
+    cache_dir = Path(args.cache_dir)
+    files = sorted(cache_dir.glob('*/*.json.gz')) if cache_dir.exists() else []
+
+    if args.clear:
+        for path in files:
+            path.unlink()
+        print(f"🗑  {len(files)}件のキャッシュを削除しました: {cache_dir}")
+        return 0
+
+    expired = 0
+    for path in files:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            if time.time() - json.load(f).get('fetched_at', 0) > DEFAULT_MAX_AGE:
+                expired += 1
+    size = sum(path.stat().st_size for path in files)
+    print(f"📦 {cache_dir}")
+    print(f"   件数: {len(files)}件（期限切れ {expired}件）  サイズ: {size / 1024:.1f} KB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
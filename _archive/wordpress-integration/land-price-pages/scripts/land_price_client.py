@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+地価データクライアントの取得
+
+地価ページの生成スクリプトはここから共通のクライアントを受け取る。
+
+- LAND_PRICE_SOURCE=store のときは取り込み済みストア
+  （ooya-dx_2026/scripts/ingest_market_data.py で作成）を参照する
+- それ以外は不動産情報ライブラリAPI（RealEstateAPIClient）を
+  ディスクキャッシュ（land_price_cache.py）越しに参照する
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from land_price_cache import wrap_with_cache
+
+# RealEstateAPIClient の配置場所
+BACKEND_PATH = '/workspaces/real-estate-app/backend/property-api'
+
+_land_price_client = None
+
+
+def get_land_price_client():
+    """プロセス内で共有する地価データクライアントを返す"""
+    global _land_price_client
+    if _land_price_client is None:
+        if os.getenv('LAND_PRICE_SOURCE') == 'store':
+            from api_shared import LandPriceStoreClient
+            _land_price_client = LandPriceStoreClient()
+        else:
+            if BACKEND_PATH not in sys.path:
+                sys.path.insert(0, BACKEND_PATH)
+            from real_estate_client import RealEstateAPIClient
+            _land_price_client = wrap_with_cache(RealEstateAPIClient())
+    return _land_price_client
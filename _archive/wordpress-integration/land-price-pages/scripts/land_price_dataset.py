@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+公示地価の年次データセット
+
+1年分の全データポイントを都道府県ごとに1回だけ取得し、
+全国平均・都道府県平均・変動率平均・各種ランキングをそこから1パスで求める。
+全国平均と都道府県別データで同じ都道府県を取り直すことがなくなる。
+
+データポイントは取得した都道府県から順にストリーミング集計（land_price_stats.py）に流し、
+リスト自体は保持しない。全国の集計は都道府県の集計を合成して求める。
+
+計算ロジックは CALCULATION_LOGIC.md の Option A（全データポイント方式）と同じ。
+"""
+
+import math
+
+from api_shared import parse_change_rate
+from land_price_client import get_land_price_client
+from land_price_fetcher import fetch_land_prices_concurrently
+from land_price_ranking import RankingSet
+from land_price_stats import StreamingStats
+
+# 円/㎡ → 円/坪
+TSUBO_PER_SQM = 3.30579
+
+# ランキング名 → (並べる値, 大きい順か)
+RANKINGS = {
+    'high': ('average_price', True),
+    'low': ('average_price', False),
+    'increase': ('change_rate', True),
+    'decrease': ('change_rate', False),
+}
+
+_datasets = {}
+
+
+class LandPriceDataset:
+    """1年分の公示地価の集計（都道府県 → 地価・変動率のストリーミング集計）"""
+
+    def __init__(self, year, failures=None):
+        self.year = year
+        self.failures = failures or {}
+        self._prices = {}
+        self._change_rates = {}
+
+    @classmethod
+    def fetch(cls, client=None, year="2025", verbose=True):
+        """全都道府県を並列に1回ずつ取得してデータセットを作る"""
+        client = client or get_land_price_client()
+        prefectures = list(client.prefecture_codes)
+        dataset = cls(year)
+        _, dataset.failures = fetch_land_prices_concurrently(
+            client, prefectures, year, verbose=verbose, on_result=dataset.add_points
+        )
+        # 完了順に集計されるので、都道府県の並びを取得対象の順に戻す
+        dataset._prices = {p: dataset._prices[p] for p in prefectures if p in dataset._prices}
+        dataset._change_rates = {p: dataset._change_rates[p] for p in prefectures if p in dataset._change_rates}
+        return dataset
+
+    @classmethod
+    def from_points(cls, year, points_by_prefecture, failures=None):
+        """取得済みのデータ（都道府県 → データのリスト）からデータセットを作る"""
+        dataset = cls(year, failures)
+        for pref_name, data in points_by_prefecture.items():
+            dataset.add_points(pref_name, data)
+        return dataset
+
+    def add_points(self, pref_name, data):
+        """都道府県のデータポイントを1回だけ走査して地価・変動率の集計に加える"""
+        prices = self._prices.setdefault(pref_name, StreamingStats())
+        change_rates = self._change_rates.setdefault(pref_name, StreamingStats())
+        for item in data:
+            price = item.get('price_per_sqm', 0)
+            if price > 0:
+                prices.add(price)
+            # '▲0.5' などの表記も API 側の取り込みと同じ規則で解析する（解析できない値は NaN）
+            change_rate = parse_change_rate(item.get('change_rate', ''))
+            if math.isfinite(change_rate):
+                change_rates.add(change_rate)
+
+    def national_stats(self):
+        """全国の (地価, 変動率) の集計（都道府県の集計を合成）"""
+        prices = StreamingStats()
+        change_rates = StreamingStats()
+        for stats in self._prices.values():
+            prices.merge(stats)
+        for stats in self._change_rates.values():
+            change_rates.merge(stats)
+        return prices, change_rates
+
+    def national_summary(self):
+        """全国平均（全データポイントの平均）"""
+        prices, change_rates = self.national_stats()
+        if not prices.count:
+            raise Exception("データ取得に失敗しました")
+
+        avg_price = int(prices.mean)
+        return {
+            'average_price': avg_price,
+            'tsubo_price': int(avg_price * TSUBO_PER_SQM),
+            'change_rate': round(change_rates.mean, 1) if change_rates.count else 0,
+            'data_count': prices.count,
+        }
+
+    def prefecture_stats(self, pref_name):
+        """都道府県の (地価, 変動率) の集計。データが無ければ (None, None)"""
+        return self._prices.get(pref_name), self._change_rates.get(pref_name)
+
+    def prefecture_summary(self, pref_name):
+        """都道府県平均（その都道府県の全データポイントの平均）。データが無ければNone"""
+        prices, change_rates = self.prefecture_stats(pref_name)
+        if not prices:
+            return None
+
+        avg_price = int(prices.mean)
+        avg_tsubo_price = int(avg_price * TSUBO_PER_SQM)
+        return {
+            'prefecture_name': pref_name,
+            'average_price': avg_price,
+            'tsubo_price': avg_tsubo_price,
+            'tsubo_price_man': round(avg_tsubo_price / 10000, 1),
+            'change_rate': round(change_rates.mean, 1) if change_rates else 0,
+            'data_count': prices.count,
+        }
+
+    def prefecture_summaries(self):
+        """データのある都道府県の集計（取得対象の順）"""
+        summaries = []
+        for pref_name in self._prices:
+            summary = self.prefecture_summary(pref_name)
+            if summary:
+                summaries.append(summary)
+        return summaries
+
+    def rankings(self, limit=10, full=True):
+        """
+        各種ランキング（都道府県の集計を1回だけ走査する）
+
+        Returns:
+            {'high': 高価格TOP, 'low': 低価格TOP, 'increase': 上昇率TOP, 'decrease': 下落率TOP,
+             'all': 平均地価順の全件（'rank' 付き、full=True の場合のみ）}
+        """
+        ranking_set = RankingSet(limit, RANKINGS, full=('average_price', True) if full else None)
+        return ranking_set.update(self.prefecture_summaries()).results()
+
+
+def load_land_price_dataset(year="2025", client=None, verbose=True):
+    """年ごとのデータセットを返す（同じプロセス内では1回だけ取得する）"""
+    if year not in _datasets:
+        _datasets[year] = LandPriceDataset.fetch(client, year, verbose=verbose)
+    return _datasets[year]
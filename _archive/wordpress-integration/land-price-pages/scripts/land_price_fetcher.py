@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+公示地価の並列取得モジュール
+
+47都道府県分の search_land_prices をスレッドプールで並列に呼び出す。
+トークンバケットで毎秒のリクエスト数を抑え、失敗時は指数バックオフで再試行し、
+完了した都道府県から順に進捗を表示する。
+
+使用例（ローカルのスタブサーバーで動作確認）:
+    python scripts/land_price_fetcher.py --stub
+    python scripts/land_price_fetcher.py --stub --latency 1.0 --failure-rate 0.2 --workers 16
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+from urllib.request import urlopen
+
+# 既定値（環境変数で上書き可能）
+DEFAULT_WORKERS = int(os.getenv('LAND_PRICE_FETCH_WORKERS', '16'))
+DEFAULT_RATE = float(os.getenv('LAND_PRICE_FETCH_RATE', '10'))  # リクエスト/秒
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0  # 秒（再試行ごとに倍）
+
+
+class TokenBucket:
+    """
+    トークンバケット方式のレート制限（スレッドセーフ）
+
+    rate 個/秒でトークンが補充され、最大 capacity 個まで貯まる。
+    acquire() はトークンが取れるまで待つ。
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def fetch_land_prices_concurrently(client, prefectures, year="2025", workers=DEFAULT_WORKERS,
+                                   rate=DEFAULT_RATE, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                                   verbose=True, on_result=None):
+    """
+    都道府県ごとの公示地価を並列に取得
+
+    Args:
+        client: search_land_prices(prefecture=, year=) を持つクライアント
+        prefectures: 都道府県名のリスト
+        year: 対象年
+        workers: 同時実行数
+        rate: 毎秒のリクエスト数の上限
+        retries: 失敗時の再試行回数
+        backoff: 最初の再試行までの待ち時間（秒）
+        verbose: 進捗を表示するか
+        on_result: 都道府県ごとに (都道府県名, データ) を受け取るコールバック。
+                   指定した場合はデータを保持せず、結果には件数だけを入れる
+
+    Returns:
+        (結果, 失敗) のタプル
+        結果: {都道府県名: データのリスト（on_result 指定時は件数）}（prefectures の順）
+        失敗: {都道府県名: 最後の例外のメッセージ}
+    """
+    bucket = TokenBucket(rate)
+    print_lock = threading.Lock()
+    done = [0]
+    total = len(prefectures)
+
+    # キャッシュ付きクライアント（land_price_cache.py）ならキャッシュ済みの分はレート制限の対象外
+    lookup = getattr(client, 'lookup', None)
+
+    def fetch(pref_name):
+        if lookup is not None:
+            cached = lookup(pref_name, year)
+            if cached is not None:
+                return cached
+        for attempt in range(retries + 1):
+            bucket.acquire()
+            try:
+                return client.search_land_prices(prefecture=pref_name, year=year) or []
+            except Exception:
+                if attempt == retries:
+                    raise
+                # 同時に失敗したリクエストが一斉に再送しないよう揺らぎを入れる
+                time.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    results = {}
+    failures = {}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch, pref_name): pref_name for pref_name in prefectures}
+        for future in as_completed(futures):
+            pref_name = futures[future]
+            try:
+                data = future.result()
+                status = f"✅ {len(data)}件"
+            except Exception as e:
+                failures[pref_name] = str(e) or type(e).__name__
+                status = "❌ エラー"
+            else:
+                if on_result is not None:
+                    # 集計側でデータを消費し、ここでは保持しない（全件をメモリに溜めない）
+                    on_result(pref_name, data)
+                    results[pref_name] = len(data)
+                else:
+                    results[pref_name] = data
+            if verbose:
+                with print_lock:
+                    done[0] += 1
+                    print(f"[{done[0]}/{total}] {pref_name}... {status}", flush=True)
+
+    if verbose:
+        print(f"⏱  {total}件を{time.perf_counter() - started:.1f}秒で取得"
+              f"（成功 {len(results)}件 / 失敗 {len(failures)}件）")
+
+    ordered = {pref_name: results[pref_name] for pref_name in prefectures if pref_name in results}
+    return ordered, failures
+
+
+# ========================================
+# ローカルスタブサーバー（動作確認用）
+# ========================================
+
+STUB_PREFECTURES = [
+    '北海道', '青森県', '岩手県', '宮城県', '秋田県', '山形県', '福島県',
+    '茨城県', '栃木県', '群馬県', '埼玉県', '千葉県', '東京都', '神奈川県',
+    '新潟県', '富山県', '石川県', '福井県', '山梨県', '長野県', '岐阜県',
+    '静岡県', '愛知県', '三重県', '滋賀県', '京都府', '大阪府', '兵庫県',
+    '奈良県', '和歌山県', '鳥取県', '島根県', '岡山県', '広島県', '山口県',
+    '徳島県', '香川県', '愛媛県', '高知県', '福岡県', '佐賀県', '長崎県',
+    '熊本県', '大分県', '宮崎県', '鹿児島県', '沖縄県',
+]
+
+
+def start_stub_server(latency=0.5, failure_rate=0.0, points=100):
+    """
+    search_land_prices 相当のレスポンスを返すスタブサーバーを起動
+
+    Returns:
+        (サーバー, ベースURL)
+    """
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            pref_name = query.get('prefecture', [''])[0]
+            time.sleep(latency)
+            if random.random() < failure_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+            rng = random.Random(pref_name)
+            body = json.dumps([
+                {'price_per_sqm': rng.randint(5000, 900000),
+                 'change_rate': f"{rng.uniform(-3, 8):+.1f}",
+                 'prefecture': pref_name}
+                for _ in range(points)
+            ], ensure_ascii=False).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class StubLandPriceClient:
+    """スタブサーバーに問い合わせる、RealEstateAPIClient と同じ形のクライアント"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.prefecture_codes = {name: f"{i:02d}" for i, name in enumerate(STUB_PREFECTURES, 1)}
+
+    def search_land_prices(self, prefecture, year="2025"):
+        url = f"{self.base_url}/land-prices?{urlencode({'prefecture': prefecture, 'year': year})}"
+        with urlopen(url, timeout=30) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='公示地価の並列取得（スタブサーバーでの動作確認）')
+    parser.add_argument('--stub', action='store_true', help='ローカルのスタブサーバーに対して実行')
+    parser.add_argument('--latency', type=float, default=0.5, help='スタブの応答時間（秒）')
+    parser.add_argument('--failure-rate', type=float, default=0.1, help='スタブが503を返す確率')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE)
+    parser.add_argument('--year', default='2025')
+    args = parser.parse_args()
+
+    if not args.stub:
+        parser.error('現在は --stub のみ対応しています（本番APIは各生成スクリプトから利用）')
+
+    server, base_url = start_stub_server(args.latency, args.failure_rate)
+    try:
+        client = StubLandPriceClient(base_url)
+        results, failures = fetch_land_prices_concurrently(
+            client, list(client.prefecture_codes), args.year,
+            workers=args.workers, rate=args.rate, backoff=0.2
+        )
+    finally:
+        server.shutdown()
+
+    print(f"\n逐次実行の目安: {len(STUB_PREFECTURES) * args.latency:.1f}秒以上")
+    return 0 if not failures else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+地価ランキングの集計
+
+高価格・低価格・上昇率・下落率など複数のTOP-kを、レコードを1回走査するだけで求める。
+各ランキングは件数 k のヒープだけを持つので、市区町村・地点単位で数万件あっても
+全件をランキングごとにソートし直す必要がない。全件の順位表は必要な場合だけ作る。
+
+同じ値のレコードは追加した順に並べる（sorted() と同じ結果になる）。
+"""
+
+import heapq
+
+
+class TopK:
+    """
+    1つの値で並べたTOP-k（ヒープで保持）
+
+    Args:
+        field: 並べる値のキー
+        limit: 件数
+        largest: True なら大きい順、False なら小さい順
+    """
+
+    def __init__(self, field, limit, largest=True):
+        self.field = field
+        self.limit = limit
+        self.largest = largest
+        self._heap = []
+
+    def push(self, seq, record):
+        # ヒープの先頭が「最も順位の低いレコード」になるように並べる
+        # （値が同じなら後から追加したものが低い）
+        value = record[self.field]
+        entry = (value if self.largest else -value, -seq, record)
+        if len(self._heap) < self.limit:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self):
+        """順位順のレコード"""
+        return [record for _, _, record in sorted(self._heap, key=lambda e: (-e[0], -e[1]))]
+
+
+class RankingSet:
+    """
+    複数のTOP-kランキングを1パスで集計
+
+    Args:
+        limit: 各ランキングの件数
+        rankings: {ランキング名: (キー, 大きい順か)}
+        full: 全件の順位表を作る場合の (キー, 大きい順か)。不要ならNone
+    """
+
+    def __init__(self, limit, rankings, full=None):
+        self.rankings = {
+            name: TopK(field, limit, largest) for name, (field, largest) in rankings.items()
+        }
+        self.full = full
+        self._records = [] if full else None
+        self._seq = 0
+
+    def add(self, record):
+        for top in self.rankings.values():
+            top.push(self._seq, record)
+        if self._records is not None:
+            self._records.append(record)
+        self._seq += 1
+
+    def update(self, records):
+        for record in records:
+            self.add(record)
+        return self
+
+    def results(self):
+        """
+        {ランキング名: 順位順のレコード}
+
+        full を指定した場合は 'all' に全件の順位表（各レコードに 'rank' を付与）を入れる。
+        """
+        results = {name: top.items() for name, top in self.rankings.items()}
+        if self.full:
+            field, largest = self.full
+            ordered = sorted(self._records, key=lambda x: x[field], reverse=largest)
+            for rank, record in enumerate(ordered, start=1):
+                record['rank'] = rank
+            results['all'] = ordered
+        return results
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+地価統計のストリーミング集計
+
+値を1件ずつ追加するだけで件数・平均・分散・最小・最大・近似分位点を保持する。
+データポイントのリストを持たないため、対象が市区町村単位・複数年に広がってもメモリは一定。
+都道府県ごとの集計は merge() で全国の集計にまとめられる。
+
+分位点は対数スケールのビンで数えるスケッチ（DDSketch方式、相対誤差1%）で近似する。
+スケッチは API 側の価格キューブと同じもの（ooya-dx_2026/api/shared/price_cube.py）を使う。
+変動率のように負の値がある場合は、正・負それぞれをスケッチに数える。
+"""
+
+import math
+
+from api_shared import QuantileSketch
+
+
+class StreamingStats:
+    """件数・平均・分散・最小・最大・近似分位点のストリーミング集計"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self._compensation = 0.0  # 合計の丸め誤差（Neumaier法）
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.positive = QuantileSketch()
+        self.negative = QuantileSketch()  # 負の値は絶対値で数える
+        self.zero_count = 0
+
+    def add(self, value):
+        self.count += 1
+        # 合計は補償付き加算で保持し、平均は合計/件数で求める（statistics.mean と桁まで揃えるため）
+        t = self.total + value
+        if abs(self.total) >= abs(value):
+            self._compensation += (self.total - t) + value
+        else:
+            self._compensation += (value - t) + self.total
+        self.total = t
+        # 分散はWelford法
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value > 0:
+            self.positive.add(value)
+        elif value < 0:
+            self.negative.add(-value)
+        else:
+            self.zero_count += 1
+
+    def merge(self, other):
+        """別の集計を取り込む（Chanの並列アルゴリズム）"""
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        t = self.total + other.total
+        self._compensation += other._compensation + (
+            (self.total - t) + other.total if abs(self.total) >= abs(other.total) else (other.total - t) + self.total
+        )
+        self.total = t
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.positive.merge(other.positive)
+        self.negative.merge(other.negative)
+        self.zero_count += other.zero_count
+
+    @property
+    def mean(self):
+        return (self.total + self._compensation) / self.count if self.count else 0
+
+    @property
+    def variance(self):
+        """母分散"""
+        return self._m2 / self.count if self.count else 0
+
+    @property
+    def std(self):
+        return math.sqrt(max(self.variance, 0.0))
+
+    def quantile(self, q):
+        """近似分位点（0〜1）。空の場合は0"""
+        if self.count == 0:
+            return 0
+        rank = q * (self.count - 1)
+        seen = 0
+        # 小さい値から順に: 負（絶対値の大きいビンから）→ 0 → 正
+        for index in sorted(self.negative.bins, reverse=True):
+            seen += self.negative.bins[index]
+            if seen > rank:
+                return -self._bin_value(self.negative, index)
+        seen += self.zero_count
+        if seen > rank:
+            return 0
+        index = 0
+        for index in sorted(self.positive.bins):
+            seen += self.positive.bins[index]
+            if seen > rank:
+                break
+        return self._bin_value(self.positive, index)
+
+    @staticmethod
+    def _bin_value(sketch, index):
+        return 2 * sketch.gamma ** index / (sketch.gamma + 1)
+
+    def summary(self):
+        """件数・平均・標準偏差・最小・最大・四分位点"""
+        if self.count == 0:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'std': self.std,
+            'min': self.min,
+            'max': self.max,
+            'p25': self.quantile(0.25),
+            'median': self.quantile(0.5),
+            'p75': self.quantile(0.75),
+        }
+
+    def __len__(self):
+        return self.count
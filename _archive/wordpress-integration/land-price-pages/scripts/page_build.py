@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+ページの差分生成
+
+出力ページごとに「入力データのハッシュ」と「テンプレートのバージョン」をマニフェストに記録し、
+再実行時はどちらかが変わったページ（または出力ファイルが無いページ）だけを生成し直す。
+日次のデータ更新でも、変わった都道府県・市区町村の分だけ書き出せばよい。
+
+マニフェストは出力先ディレクトリの .build_manifest.json に保存する（.gitignore で追跡しない）。
+テンプレートのバージョンは source_version() でテンプレートのソースから求めるので、
+テンプレートや共通パーツを変えれば手で番号を上げなくても全ページが生成し直される。
+
+生成するページが多い場合はプロセスプールで並列に生成する。
+入力データは1つのスナップショットファイルに書き出してワーカーがmmapで共有し、
+タスクにはファイル名と位置だけを渡す（ページごとにデータをpickleしない）。
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+MANIFEST_FILE = '.build_manifest.json'
+
+# これより少ない件数ならプロセスを起動せずに逐次生成する
+MIN_PARALLEL_PAGES = 64
+
+# 1タスクで生成するページ数（プロセス間のやり取りを減らす）
+PAGES_PER_TASK = 16
+
+# ワーカープロセス内の状態（_init_worker で設定）
+_worker = {}
+
+
+def hash_inputs(data):
+    """入力データのハッシュ（キーの順序に依存しない）"""
+    payload = json.dumps(data, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def source_version(*paths):
+    """テンプレートのソースファイルのハッシュ（テンプレートのバージョンに使う）"""
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def write_atomic(path, text):
+    """一時ファイルに書いてから置き換える（途中で止まっても壊れたファイルを残さない）"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class BuildManifest:
+    """出力ページ → {input_hash, template_version, built_at}"""
+
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / MANIFEST_FILE
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.pages = json.load(f).get('pages', {})
+        except (OSError, ValueError):
+            self.pages = {}
+
+    def is_fresh(self, name, input_hash, template_version):
+        """前回と同じ入力・テンプレートで生成済みで、出力ファイルも残っているか"""
+        entry = self.pages.get(name)
+        return (
+            entry is not None
+            and entry.get('input_hash') == input_hash
+            and entry.get('template_version') == template_version
+            and (self.output_dir / name).exists()
+        )
+
+    def record(self, name, input_hash, template_version):
+        self.pages[name] = {
+            'input_hash': input_hash,
+            'template_version': template_version,
+            'built_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+    def save(self):
+        write_atomic(self.path, json.dumps({'pages': self.pages}, ensure_ascii=False, indent=2, sort_keys=True))
+
+
+def write_snapshot(pages, path):
+    """
+    入力データを1つのファイルに連結して書き出す
+
+    Returns:
+        (出力ファイル名, 開始位置, 長さ) のリスト
+    """
+    tasks = []
+    offset = 0
+    with open(path, 'wb') as f:
+        for name, data in pages:
+            payload = json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')
+            f.write(payload)
+            tasks.append((name, offset, len(payload)))
+            offset += len(payload)
+    return tasks
+
+
+def _render_one(render, output_dir, name, data):
+    """1ページを生成して書き出す。(ファイル名, エラー or None) を返す"""
+    try:
+        write_atomic(output_dir / name, render(data))
+        return name, None
+    except Exception as e:
+        return name, str(e) or type(e).__name__
+
+
+def _init_worker(snapshot_path, render, output_dir):
+    _worker['file'] = open(snapshot_path, 'rb')
+    _worker['snapshot'] = mmap.mmap(_worker['file'].fileno(), 0, access=mmap.ACCESS_READ)
+    _worker['render'] = render
+    _worker['output_dir'] = Path(output_dir)
+
+
+def _render_chunk(tasks):
+    snapshot = _worker['snapshot']
+    return [
+        _render_one(_worker['render'], _worker['output_dir'], name,
+                    json.loads(snapshot[offset:offset + length]))
+        for name, offset, length in tasks
+    ]
+
+
+def _render_parallel(pending, render, output_dir, workers):
+    """pending を並列に生成し、(ファイル名, エラー or None) を完了順に返す"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_path = os.path.join(tmp_dir, 'pages.snapshot')
+        tasks = write_snapshot(pending, snapshot_path)
+        chunks = [tasks[i:i + PAGES_PER_TASK] for i in range(0, len(tasks), PAGES_PER_TASK)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(snapshot_path, render, str(output_dir))) as executor:
+            futures = {executor.submit(_render_chunk, chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                try:
+                    yield from future.result()
+                except Exception as e:
+                    # ワーカーごと落ちた場合はそのタスクの全ページを失敗にする
+                    for name, _, _ in futures[future]:
+                        yield name, str(e) or type(e).__name__
+
+
+def _render_serial(pending, render, output_dir):
+    for name, data in pending:
+        yield _render_one(render, output_dir, name, data)
+
+
+def build_pages(pages, render, output_dir, template_version, force=False, verbose=True, workers=1):
+    """
+    入力が変わったページだけを生成して書き出す
+
+    Args:
+        pages: (出力ファイル名, 入力データ) のリスト
+        render: 入力データ → HTML を返す関数（並列生成時はモジュールの関数であること）
+        output_dir: 出力先ディレクトリ
+        template_version: テンプレートのバージョン
+        force: True なら全ページを生成し直す
+        verbose: 進捗と結果を表示するか
+        workers: 並列に生成するプロセス数（1なら逐次）
+
+    Returns:
+        {'built': [生成したファイル名], 'skipped': [スキップしたファイル名],
+         'failed': {失敗したファイル名: エラーメッセージ}}
+    """
+    manifest = BuildManifest(output_dir)
+    skipped = []
+    pending = []
+    input_hashes = {}
+
+    for name, data in pages:
+        input_hash = hash_inputs(data)
+        if not force and manifest.is_fresh(name, input_hash, template_version):
+            skipped.append(name)
+            continue
+        input_hashes[name] = input_hash
+        pending.append((name, data))
+
+    if workers > 1 and len(pending) >= MIN_PARALLEL_PAGES:
+        results = _render_parallel(pending, render, manifest.output_dir, workers)
+    else:
+        results = _render_serial(pending, render, manifest.output_dir)
+
+    built = []
+    failed = {}
+    for done, (name, error) in enumerate(results, start=1):
+        if error is None:
+            # 失敗したページは記録しない（次回また生成される）
+            manifest.record(name, input_hashes[name], template_version)
+            built.append(name)
+        else:
+            failed[name] = error
+        if verbose:
+            print(f"[{done}/{len(pending)}] {'✅' if error is None else '❌'} {name}", flush=True)
+
+    manifest.save()
+    if verbose:
+        print(f"\n生成: {len(built)}件  スキップ（入力・テンプレートに変更なし）: {len(skipped)}件  "
+              f"失敗: {len(failed)}件")
+        for name, error in failed.items():
+            print(f"   ❌ {name}: {error}")
+    return {'built': built, 'skipped': skipped, 'failed': failed}
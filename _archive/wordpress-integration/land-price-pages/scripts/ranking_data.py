@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+ランキングデータ（data/*_ranking_data.json）の読み込み
+
+JSONを1回だけ解析し、名前・順位・都道府県で引ける索引を付けて保持する。
+解析結果は marshal 形式のバイナリキャッシュに保存し、次回以降はJSONを解析せずに読み込む。
+キャッシュには元ファイルのサイズ・更新時刻を記録し、元ファイルが変わったら作り直す。
+
+環境変数:
+    RANKING_DATA_CACHE_DIR  キャッシュの保存先（既定: ~/.cache/ooya-dx/ranking_data）
+
+使用例:
+    from ranking_data import load_prefecture_ranking, load_national_ranking
+    prefectures = load_prefecture_ranking()
+    prefectures.get('東京都')['price_per_sqm']
+    prefectures.by_rank(1)['name']
+    prefectures.top('change_rate', 5)
+    load_national_ranking().in_prefecture('東京都')
+"""
+
+import hashlib
+import json
+import marshal
+import math
+import os
+import sys
+from pathlib import Path
+
+from api_shared import parse_change_rate
+
+DATA_DIR = Path(__file__).resolve().parents[1] / 'data'
+NATIONAL_RANKING_FILE = DATA_DIR / 'national_ranking_data.json'
+PREFECTURE_RANKING_FILE = DATA_DIR / 'prefecture_ranking_data.json'
+
+DEFAULT_CACHE_DIR = Path(os.getenv('RANKING_DATA_CACHE_DIR', Path.home() / '.cache' / 'ooya-dx' / 'ranking_data'))
+
+# キャッシュの形式を変えたら上げる（marshal はPythonのバージョンでも形式が変わるので一緒に照合する）
+CACHE_FORMAT_VERSION = 1
+
+_loaded = {}
+
+
+def _to_number(value):
+    """'10.3' / '+1.2%' / '▲0.5' などの文字列も数値として比較できるようにする（変換できない値はNone）"""
+    if isinstance(value, (int, float)):
+        return value
+    number = parse_change_rate(value)
+    return number if math.isfinite(number) else None
+
+
+class RankingData:
+    """
+    ランキングデータ（レコードのリスト）と索引
+
+    Args:
+        records: レコードのリスト（rank 順）
+        name_field: get() で引く名前のキー（例: 都道府県データは 'name'、全国データは 'full_address'）
+    """
+
+    def __init__(self, records, name_field):
+        self.records = records
+        self.name_field = name_field
+        self._by_name = {r[name_field]: r for r in records if r.get(name_field) is not None}
+        self._by_rank = {r['rank']: r for r in records if r.get('rank') is not None}
+        self._by_prefecture = {}
+        for r in records:
+            pref = r.get('prefecture', r.get('name'))
+            self._by_prefecture.setdefault(pref, []).append(r)
+        self._orders = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def get(self, name, default=None):
+        """名前で引く（O(1)）"""
+        return self._by_name.get(name, default)
+
+    def by_rank(self, rank):
+        """順位で引く（O(1)）。該当なしはNone"""
+        return self._by_rank.get(rank)
+
+    def in_prefecture(self, prefecture):
+        """都道府県のレコード（元の順）"""
+        return self._by_prefecture.get(prefecture, [])
+
+    def top(self, metric, limit=10, ascending=False):
+        """
+        指標の上位（ascending=True なら下位から）
+
+        指標ごとの並び順は初回だけ求めて保持する。値が数値にならないレコードは含めない。
+        """
+        order = self._orders.get((metric, ascending))
+        if order is None:
+            keyed = [(_to_number(r.get(metric)), i) for i, r in enumerate(self.records)]
+            keyed = [k for k in keyed if k[0] is not None]
+            keyed.sort(key=lambda k: k[0] if ascending else -k[0])
+            order = self._orders[(metric, ascending)] = [i for _, i in keyed]
+        return [self.records[i] for i in order[:limit]]
+
+
+def _cache_path(source, cache_dir):
+    source = os.path.realpath(source)
+    digest = hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return Path(cache_dir) / f"{stem}-{digest}.marshal"
+
+
+def load_records(source, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    JSONのレコードを読み込む（キャッシュが新しければJSONを解析しない）
+
+    Returns:
+        レコードのリスト
+    """
+    stat = os.stat(source)
+    signature = (CACHE_FORMAT_VERSION, tuple(sys.version_info[:2]), stat.st_size, stat.st_mtime_ns)
+    cache_path = _cache_path(source, cache_dir)
+
+    try:
+        with open(cache_path, 'rb') as f:
+            # marshal.load(f) はファイルを少しずつ読むので、まとめて読んでから復元する
+            cached_signature, records = marshal.loads(f.read())
+        if cached_signature == signature:
+            return records
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    with open(source, encoding='utf-8') as f:
+        records = json.load(f)
+
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(marshal.dumps((signature, records)))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # キャッシュを書けなくても読み込み自体は続ける
+        pass
+    return records
+
+
+def load_ranking(source, name_field, cache_dir=DEFAULT_CACHE_DIR):
+    """ランキングデータを読み込む（同じプロセス内では元ファイルが変わらない限り1回だけ）"""
+    key = (str(source), name_field)
+    stat = os.stat(source)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    cached = _loaded.get(key)
+    if cached is None or cached[0] != signature:
+        cached = _loaded[key] = (signature, RankingData(load_records(source, cache_dir), name_field))
+    return cached[1]
+
+
+def load_prefecture_ranking(source=PREFECTURE_RANKING_FILE, cache_dir=DEFAULT_CACHE_DIR):
+    """都道府県ランキング（名前は都道府県名）"""
+    return load_ranking(source, 'name', cache_dir)
+
+
+def load_national_ranking(source=NATIONAL_RANKING_FILE, cache_dir=DEFAULT_CACHE_DIR):
+    """全国の地点ランキング（名前は都道府県名付きの所在地）"""
+    return load_ranking(source, 'full_address', cache_dir)
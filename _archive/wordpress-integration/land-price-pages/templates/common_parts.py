@@ -4,8 +4,76 @@
 共通パーツの定義
 
 各ページで再利用できるHTML部品を定義します。
+テキストとして渡す値（タイトル・ラベル・地名など）は escape() でHTMLエスケープします。
+HTMLを受け取る引数（content・cards・セル）はそのまま埋め込みます。
+
+多数のページを生成するテンプレートは、共通パーツで組み立てたHTMLを PageTemplate で
+import時に1回だけ書式に変換しておき、ページごとには値を埋め込むだけにします。
 """
 
+import re
+from html import escape as _html_escape
+
+# エスケープが必要な文字（含まない文字列はそのまま返す）
+_needs_escape = re.compile('[&<>"\']').search
+
+# PageTemplate のプレースホルダーの区切り（エスケープされず、HTMLにも現れない文字）
+_SLOT_MARK = '\x00'
+
+
+def escape(value):
+    """
+    テキストをHTMLエスケープ
+
+    Args:
+        value: 埋め込む値（文字列以外は str() で変換）
+
+    Returns:
+        エスケープ済み文字列
+    """
+    text = str(value)
+    return _html_escape(text, quote=True) if _needs_escape(text) else text
+
+
+class PageTemplate:
+    """
+    共通パーツで組み立てたHTMLを、import時に1回だけ固定部分とプレースホルダーに分けたテンプレート
+
+    タグ・スタイル・固定の文言はここで1回だけ生成しておき、render() は固定部分のリストに
+    値を差し込んで1回の join で1つの文字列にする（パーツごとの文字列の生成・連結をしない）。
+
+    使用例:
+        PAGE = PageTemplate(lambda slot: generate_header(title=slot('name') + 'の地価'))
+        html = PAGE.render(name=escape('東京都'))
+    """
+
+    def __init__(self, build):
+        """
+        Args:
+            build: slot(名前) をプレースホルダーとしてHTMLを組み立てる関数
+        """
+        names = []
+
+        def slot(name):
+            names.append(name)
+            return f'{_SLOT_MARK}{len(names) - 1}{_SLOT_MARK}'
+
+        # 偶数番目は固定部分、奇数番目はプレースホルダーの番号
+        self.pieces = build(slot).split(_SLOT_MARK)
+        self.slots = [(i, names[int(self.pieces[i])]) for i in range(1, len(self.pieces), 2)]
+
+    def render(self, **values):
+        """
+        値を埋め込んだHTML
+
+        Args:
+            values: プレースホルダー名 → 値（エスケープ済みの文字列。数値は str() で変換）
+        """
+        pieces = self.pieces[:]
+        for i, name in self.slots:
+            pieces[i] = str(values[name])
+        return ''.join(pieces)
+
 
 def generate_header(title, subtitle=''):
     """
@@ -20,13 +88,13 @@ def generate_header(title, subtitle=''):
     """
     subtitle_html = ''
     if subtitle:
-        subtitle_html = f'<p style="font-size: 16px; color: #6b7280; margin: 8px 0 0 0;">{subtitle}</p>'
+        subtitle_html = f'<p style="font-size: 16px; color: #6b7280; margin: 8px 0 0 0;">{escape(subtitle)}</p>'
 
     html = f'''
 <!-- ヘッダーセクション -->
 <div style="margin-bottom: 40px;">
     <h1 style="font-size: 32px; font-weight: 700; margin-bottom: 16px; color: #111827;">
-        {title}
+        {escape(title)}
     </h1>
     {subtitle_html}
 </div>
@@ -39,7 +107,7 @@ def generate_lead_text(content):
     導入文（リード文）
 
     Args:
-        content: 導入文の内容
+        content: 導入文の内容（HTML）
 
     Returns:
         HTMLコード
@@ -80,14 +148,14 @@ def generate_summary_card(label, value, unit='', badge=None, badge_color=''):
     if badge:
         colors = badge_colors.get(badge_color, badge_colors['gray'])
         badge_html = f'''
-        <span style="display: inline-block; margin-top: 8px; padding: 4px 12px; background: {colors['bg']}; color: {colors['text']}; border-radius: 12px; font-size: 12px; font-weight: 600;">{badge}</span>
+        <span style="display: inline-block; margin-top: 8px; padding: 4px 12px; background: {colors['bg']}; color: {colors['text']}; border-radius: 12px; font-size: 12px; font-weight: 600;">{escape(badge)}</span>
         '''
 
     html = f'''
 <div style="background: white; border-radius: 12px; padding: 24px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); transition: transform 0.3s;">
-    <p style="font-size: 14px; color: #6b7280; margin: 0 0 8px 0;">{label}</p>
+    <p style="font-size: 14px; color: #6b7280; margin: 0 0 8px 0;">{escape(label)}</p>
     <p style="font-size: 28px; font-weight: 700; margin: 0; color: #111827;">
-        {value}<span style="font-size: 14px; font-weight: 400;">{unit}</span>
+        {escape(value)}<span style="font-size: 14px; font-weight: 400;">{escape(unit)}</span>
     </p>
     {badge_html}
 </div>
@@ -124,7 +192,7 @@ def generate_section(title, content, icon=''):
 
     Args:
         title: セクションタイトル（H2）
-        content: セクションの内容
+        content: セクションの内容（HTML）
         icon: アイコン絵文字（省略可）
 
     Returns:
@@ -133,7 +201,7 @@ def generate_section(title, content, icon=''):
     html = f'''
 <!-- セクション -->
 <section style="background: white; border-radius: 12px; padding: 40px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); margin-bottom: 48px;">
-    <h2 style="font-size: 24px; font-weight: 700; margin: 0 0 16px 0; color: #111827;">{icon} {title}</h2>
+    <h2 style="font-size: 24px; font-weight: 700; margin: 0 0 16px 0; color: #111827;">{escape(icon)} {escape(title)}</h2>
     {content}
 </section>
 '''
@@ -146,7 +214,37 @@ def generate_ranking_table(columns, rows):
 
     Args:
         columns: カラム名のリスト（例: ['順位', '都道府県', '地価']）
-        rows: 行データのリスト（各行はセルのリスト）
+        rows: 行データのリスト（各行はセルのリスト。セルはHTML）
+
+    Returns:
+        HTMLコード
+    """
+    return generate_table(columns, ''.join(generate_ranking_row(row) for row in rows))
+
+
+def generate_ranking_row(row):
+    """
+    ランキングテーブルの1行
+
+    Args:
+        row: セルのリスト（セルはHTML）
+
+    Returns:
+        HTMLコード
+    """
+    cells = []
+    for cell in row:
+        cells.append(f'<td style="padding: 12px; color: #111827;">{cell}</td>')
+    return '<tr style="border-bottom: 1px solid #e5e7eb;">' + ''.join(cells) + '</tr>'
+
+
+def generate_table(columns, body_html):
+    """
+    テーブル（ヘッダー行＋組み立て済みのデータ行）
+
+    Args:
+        columns: カラム名のリスト
+        body_html: データ行のHTML（generate_ranking_row() の戻り値を連結したもの）
 
     Returns:
         HTMLコード
@@ -154,18 +252,9 @@ def generate_ranking_table(columns, rows):
     # ヘッダー行
     header_cells = []
     for col in columns:
-        header_cells.append(f'<th style="padding: 12px; text-align: left; font-weight: 600; color: #374151;">{col}</th>')
+        header_cells.append(f'<th style="padding: 12px; text-align: left; font-weight: 600; color: #374151;">{escape(col)}</th>')
     header_html = '<tr style="background: #f9fafb; border-bottom: 2px solid #e5e7eb;">' + ''.join(header_cells) + '</tr>'
 
-    # データ行
-    body_rows = []
-    for row in rows:
-        cells = []
-        for cell in row:
-            cells.append(f'<td style="padding: 12px; color: #111827;">{cell}</td>')
-        body_rows.append('<tr style="border-bottom: 1px solid #e5e7eb;">' + ''.join(cells) + '</tr>')
-    body_html = ''.join(body_rows)
-
     html = f'''
 <table style="width: 100%; border-collapse: collapse; font-size: 14px;">
     <thead>
@@ -260,8 +349,19 @@ def generate_change_rate_badge(rate):
     Returns:
         HTMLコード
     """
-    info = format_change_rate(rate)
+    return generate_change_rate_badge_html(format_change_rate(rate))
+
+
+def generate_change_rate_badge_html(info):
+    """
+    変動率バッジ（format_change_rate() の戻り値から生成）
+
+    Args:
+        info: format_change_rate() の戻り値
 
+    Returns:
+        HTMLコード
+    """
     html = f'''
 <span style="display: inline-block; padding: 4px 12px; background: {info['bg']}; color: {info['color']}; border-radius: 4px; font-weight: 600; font-size: 13px;">
     {info['text']}
@@ -288,6 +388,14 @@ def calculate_tsubo_price(price_per_sqm):
     return round(tsubo_price / 10000, 1)  # 万円単位、小数点1桁
 
 
+# 順位 → 絵文字
+_RANK_EMOJI = {
+    1: '🥇',
+    2: '🥈',
+    3: '🥉',
+}
+
+
 def get_rank_emoji(rank):
     """
     順位に応じた絵文字を取得
@@ -298,9 +406,4 @@ def get_rank_emoji(rank):
     Returns:
         絵文字文字列
     """
-    emoji_map = {
-        1: '🥇',
-        2: '🥈',
-        3: '🥉',
-    }
-    return emoji_map.get(rank, '')
+    return _RANK_EMOJI.get(rank, '')
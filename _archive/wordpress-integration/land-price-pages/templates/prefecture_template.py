@@ -4,6 +4,8 @@
 都道府県ページのテンプレート
 
 共通パーツを組み合わせてページを生成します。
+ページの骨組みは import 時に PageTemplate で1回だけ組み立て、
+ページごとには値（エスケープ済み）を埋め込むだけにします。
 """
 
 import sys
@@ -17,47 +19,33 @@ from common_parts import (
     generate_summary_card,
     generate_summary_cards_grid,
     generate_section,
-    generate_ranking_table,
+    generate_ranking_row,
+    generate_table,
     generate_footer,
     format_number,
     format_change_rate,
-    generate_change_rate_badge,
+    generate_change_rate_badge_html,
     calculate_tsubo_price,
     get_rank_emoji,
+    escape,
+    PageTemplate,
 )
 
+# テンプレートのバージョンの元になるソース（scripts/page_build.py の source_version()）
+TEMPLATE_SOURCES = [__file__, str(Path(__file__).parent / 'common_parts.py')]
 
-def generate_prefecture_page(data):
-    """
-    都道府県ページを生成
 
-    Args:
-        data: 都道府県データ
-            {
-                'name': '東京都',
-                'avg_price': 385000,
-                'change_rate': 5.2,
-                'rank': 1,
-                'cities': [
-                    {'name': '千代田区', 'price': 1250000, 'change_rate': 8.5},
-                    ...
-                ]
-            }
+# 市区町村ランキングのカラム
+CITY_COLUMNS = ['順位', '市区町村', '平均地価（円/㎡）', '坪単価（万円/坪）', '変動率', '詳細']
 
-    Returns:
-        HTMLコード
-    """
-    name = data['name']
-    avg_price = data['avg_price']
-    change_rate = data['change_rate']
-    rank = data['rank']
-    cities = data.get('cities', [])
+# 変動率の向きごとの表示（バッジの色でテンプレートを分ける）
+CHANGE_KINDS = {info['badge_color']: info for info in map(format_change_rate, (1, -1, 0))}
 
-    # 坪単価計算
-    tsubo_price = calculate_tsubo_price(avg_price)
 
-    # 変動率情報
-    change_info = format_change_rate(change_rate)
+def _build_page(slot, badge_color):
+    """ページ全体（市区町村ランキングは ranking_section に埋め込む）"""
+    name = slot('name')
+    change = slot('change')
 
     # ========================================
     # 1. ヘッダー
@@ -71,9 +59,9 @@ def generate_prefecture_page(data):
     # 2. 導入文
     # ========================================
     lead = generate_lead_text(
-        content=f'''{name}は全国<strong>{rank}位</strong>の地価水準です。
-        2025年の平均地価は<strong>{format_number(avg_price)}円/㎡</strong>（坪単価約{tsubo_price}万円）で、
-        前年比<strong>{change_info['text']}</strong>となっています。
+        content=f'''{name}は全国<strong>{slot('rank')}位</strong>の地価水準です。
+        2025年の平均地価は<strong>{slot('avg_price')}円/㎡</strong>（坪単価約{slot('tsubo_price')}万円）で、
+        前年比<strong>{change}</strong>となっています。
         市区町村別の詳細データ、変動率、推移をご確認いただけます。'''
     )
 
@@ -83,24 +71,24 @@ def generate_prefecture_page(data):
     cards = [
         generate_summary_card(
             label='平均地価',
-            value=format_number(avg_price),
+            value=slot('avg_price'),
             unit='円/㎡'
         ),
         generate_summary_card(
             label='変動率',
-            value=change_info['text'],
+            value=change,
             unit='',
-            badge=change_info['badge'],
-            badge_color=change_info['badge_color']
+            badge=CHANGE_KINDS[badge_color]['badge'],
+            badge_color=badge_color
         ),
         generate_summary_card(
             label='坪単価',
-            value=f'{tsubo_price}',
+            value=slot('tsubo_price'),
             unit='万円/坪'
         ),
         generate_summary_card(
             label='全国順位',
-            value=f"{get_rank_emoji(rank)} {rank}",
+            value=slot('rank_label'),
             unit='位'
         ),
     ]
@@ -111,7 +99,7 @@ def generate_prefecture_page(data):
     # ========================================
     description_content = f'''
     <p style="font-size: 16px; line-height: 1.8; color: #374151; margin: 0 0 16px 0;">
-        {name}の地価は、前年比{change_info['text']}となっています。
+        {name}の地価は、前年比{change}となっています。
         市区町村別の詳細データは以下のランキングをご確認ください。
     </p>
     '''
@@ -122,64 +110,108 @@ def generate_prefecture_page(data):
     )
 
     # ========================================
-    # 5. 市区町村ランキング
-    # ========================================
-    if cities:
-        # テーブルのカラム
-        columns = ['順位', '市区町村', '平均地価（円/㎡）', '坪単価（万円/坪）', '変動率', '詳細']
-
-        # テーブルの行データ
-        rows = []
-        for i, city in enumerate(cities[:10], 1):  # TOP10のみ
-            city_name = city['name']
-            city_price = city['price']
-            city_change = city['change_rate']
-            city_tsubo = calculate_tsubo_price(city_price)
-            city_slug = city.get('slug', '')
-
-            # 詳細リンク
-            detail_link = ''
-            if city_slug:
-                detail_link = f'<a href="/media/land-price/{data.get("slug", "")}/{city_slug}/" style="display: inline-block; padding: 6px 16px; background: #667eea; color: white; border-radius: 6px; text-decoration: none; font-weight: 600; font-size: 13px;">詳細 ▶</a>'
-            else:
-                detail_link = '<span style="color: #9ca3af; font-size: 13px;">準備中</span>'
-
-            rows.append([
-                f"{get_rank_emoji(i)} {i}位",
-                f'<span style="font-weight: 600;">{city_name}</span>',
-                f'<span style="font-weight: 600; color: #667eea;">{format_number(city_price)}</span>',
-                f'<span style="font-weight: 600;">{city_tsubo}</span>',
-                generate_change_rate_badge(city_change),
-                detail_link
-            ])
-
-        ranking_table = generate_ranking_table(columns, rows)
-        ranking_section = generate_section(
-            title=f'{name}の市区町村別ランキング TOP10',
-            content=ranking_table,
-            icon='📊'
-        )
-    else:
-        ranking_section = ''
-
-    # ========================================
-    # 6. フッター
+    # 5. フッター
     # ========================================
     footer = generate_footer()
 
-    # ========================================
-    # 全体を結合
-    # ========================================
-    html = f'''
+    return f'''
 {header}
 {lead}
 {summary_cards}
 {description_section}
-{ranking_section}
+{slot('ranking_section')}
 {footer}
 '''
 
-    return html
+
+def _build_city_row(slot, badge_color):
+    """市区町村ランキングの1行"""
+    return generate_ranking_row([
+        f"{slot('rank_label')}位",
+        f'<span style="font-weight: 600;">{slot("name")}</span>',
+        f'<span style="font-weight: 600; color: #667eea;">{slot("price")}</span>',
+        f'<span style="font-weight: 600;">{slot("tsubo_price")}</span>',
+        generate_change_rate_badge_html({**CHANGE_KINDS[badge_color], 'text': slot('change')}),
+        slot('detail'),
+    ])
+
+
+# import時に1回だけ組み立てておくテンプレート（値はエスケープ済みの文字列を渡す）
+PAGE_TEMPLATES = {
+    color: PageTemplate(lambda slot, color=color: _build_page(slot, color)) for color in CHANGE_KINDS
+}
+CITY_ROW_TEMPLATES = {
+    color: PageTemplate(lambda slot, color=color: _build_city_row(slot, color)) for color in CHANGE_KINDS
+}
+RANKING_SECTION_TEMPLATE = PageTemplate(lambda slot: generate_section(
+    title=f"{slot('name')}の市区町村別ランキング TOP10",
+    content=generate_table(CITY_COLUMNS, slot('rows')),
+    icon='📊'
+))
+
+
+def generate_prefecture_page(data):
+    """
+    都道府県ページを生成
+
+    Args:
+        data: 都道府県データ
+            {
+                'name': '東京都',
+                'avg_price': 385000,
+                'change_rate': 5.2,
+                'rank': 1,
+                'cities': [
+                    {'name': '千代田区', 'price': 1250000, 'change_rate': 8.5},
+                    ...
+                ]
+            }
+
+    Returns:
+        HTMLコード
+    """
+    name_html = escape(data['name'])
+    avg_price = data['avg_price']
+    rank = data['rank']
+    cities = data.get('cities', [])
+
+    # 変動率情報
+    change_info = format_change_rate(data['change_rate'])
+
+    # 市区町村ランキング（TOP10のみ）
+    ranking_section = ''
+    if cities:
+        prefecture_slug = escape(data.get('slug', ''))
+        rows = []
+        for i, city in enumerate(cities[:10], 1):
+            city_change = format_change_rate(city['change_rate'])
+            city_slug = escape(city.get('slug', ''))
+
+            # 詳細リンク
+            if city_slug:
+                detail_link = f'<a href="/media/land-price/{prefecture_slug}/{city_slug}/" style="display: inline-block; padding: 6px 16px; background: #667eea; color: white; border-radius: 6px; text-decoration: none; font-weight: 600; font-size: 13px;">詳細 ▶</a>'
+            else:
+                detail_link = '<span style="color: #9ca3af; font-size: 13px;">準備中</span>'
+
+            rows.append(CITY_ROW_TEMPLATES[city_change['badge_color']].render(
+                rank_label=f'{get_rank_emoji(i)} {i}',
+                name=escape(city['name']),
+                price=format_number(city['price']),
+                tsubo_price=calculate_tsubo_price(city['price']),
+                change=city_change['text'],
+                detail=detail_link,
+            ))
+        ranking_section = RANKING_SECTION_TEMPLATE.render(name=name_html, rows=''.join(rows))
+
+    return PAGE_TEMPLATES[change_info['badge_color']].render(
+        name=name_html,
+        rank=rank,
+        rank_label=f'{get_rank_emoji(rank)} {rank}',
+        avg_price=format_number(avg_price),
+        tsubo_price=calculate_tsubo_price(avg_price),
+        change=change_info['text'],
+        ranking_section=ranking_section,
+    )
 
 
 # ========================================
@@ -6,15 +6,175 @@ Vercel Python Functions用
 from http.server import BaseHTTPRequestHandler
 import json
 import os
-import random
 import traceback
 import sys
+from typing import List, Optional
 
 # 共有モジュールのインポート用にパスを追加
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from shared.validations import validate_market_analysis_input, create_validation_error_response
+from shared.validations import (
+    validate_market_analysis_input,
+    validate_market_analysis_batch_input,
+    create_validation_error_response,
+)
 from shared.error_codes import ErrorCode, create_error_response
+from shared.comparables import ComparableStore, build_year_bucket, get_comparable_store, summarize_prices
+
+
+# レスポンスに含める類似事例の件数
+SIMILAR_PROPERTIES_LIMIT = 15
+
+# 比較対象とする築年の許容幅（年）
+YEAR_TOLERANCE = 10
+
+# 近傍検索で比較対象とする面積の許容幅（比率）
+AREA_TOLERANCE = 0.5
+
+# 価格分布ヒストグラムの階級数
+HISTOGRAM_BINS = 10
+
+
+def evaluate_price(deviation: float) -> str:
+    """中央値からの乖離率による価格評価"""
+    if deviation < -20:
+        evaluation = ""
+    elif deviation < -10:
+        evaluation = ""
+    elif deviation < 5:
+        evaluation = ""
+    elif deviation < 15:
+        evaluation = ""
+    else:
+        evaluation = ""
+    return evaluation
+
+
+def load_segment_group(store: ComparableStore, location: str, property_type: Optional[str],
+                       year_built: Optional[int]) -> dict:
+    """所在地・構造・築年の条件に合うセグメント群の統計（物件ごとに変わらない部分）"""
+    group = {'segments': [], 'summary': summarize_prices([]), 'histogram': [], 'recent_rows': None}
+    area = store.resolve_area(location)
+    if area is not None:
+        segments = store.find_segments(area, property_type, year_built, YEAR_TOLERANCE)
+        group['segments'] = segments
+        group['summary'] = store.summarize(area, segments)
+        group['histogram'] = store.price_histogram(segments, HISTOGRAM_BINS)
+    return group
+
+
+def segment_group_key(store: ComparableStore, location: str, property_type: Optional[str],
+                      year_built: Optional[int]) -> tuple:
+    """同じセグメント群を引く物件に共通のキー（築年は区分単位に丸める）"""
+    year_range = None
+    if year_built:
+        year_range = (build_year_bucket(year_built - YEAR_TOLERANCE), build_year_bucket(year_built + YEAR_TOLERANCE))
+    return store.resolve_area(location), property_type, year_range
+
+
+def analyze_market(request: dict, store: ComparableStore, groups: Optional[dict] = None,
+                   include_similar: bool = True) -> dict:
+    """
+    取引事例ストアから類似事例と価格統計を求める
+
+    Args:
+        request: 1物件分の入力
+        store: 取引事例ストア
+        groups: セグメント群のキャッシュ（一括分析で物件間に共有する）
+        include_similar: 類似事例を含めるか
+    """
+    location = request.get('location', '')
+    land_area = float(request.get('land_area', 0))
+    year_built = int(float(request.get('year_built') or 0)) or None
+    purchase_price = float(request.get('purchase_price', 0))
+    property_type = request.get('property_type') or None
+    latitude = request.get('latitude')
+    longitude = request.get('longitude')
+
+    # ユーザー物件の平米単価（万円/㎡）
+    user_unit_price = purchase_price / land_area if land_area > 0 else 0
+
+    groups = {} if groups is None else groups
+    key = segment_group_key(store, location, property_type, year_built)
+    group = groups.get(key)
+    if group is None:
+        group = groups[key] = load_segment_group(store, location, property_type, year_built)
+
+    segments = group['segments']
+    summary = group['summary']
+    histogram = group['histogram']
+    rank = store.price_rank(segments, user_unit_price)
+
+    similar_properties = []
+    if include_similar:
+        # 座標があれば近傍の事例を優先して表示
+        if latitude not in (None, "") and longitude not in (None, ""):
+            similar_properties = store.nearest_rows(
+                float(latitude), float(longitude), SIMILAR_PROPERTIES_LIMIT,
+                land_area=land_area, area_tolerance=AREA_TOLERANCE,
+                structure=property_type,
+                year_built=year_built, year_tolerance=YEAR_TOLERANCE
+            )
+        # 座標がない、または近傍に条件に合う事例がなければセグメントの直近事例
+        if not similar_properties:
+            if group['recent_rows'] is None:
+                group['recent_rows'] = store.recent_rows(segments, SIMILAR_PROPERTIES_LIMIT)
+            similar_properties = group['recent_rows']
+
+    median_price = summary['median']
+
+    # 価格評価
+    deviation = ((user_unit_price - median_price) / median_price * 100) if median_price > 0 else 0
+
+    # 類似事例内でのパーセンタイル（同額は半数を下位に数える）
+    percentile = (rank['below'] + rank['equal'] / 2) / rank['count'] * 100 if rank['count'] else 0
+
+    # ユーザー物件が入る階級（範囲外は両端の階級に含める）
+    user_bin = None
+    if histogram:
+        user_bin = len(histogram) - 1
+        for i, b in enumerate(histogram):
+            if user_unit_price < b['max']:
+                user_bin = i
+                break
+
+    return {
+        "similar_properties": similar_properties,
+        "statistics": {
+            "median_price": round(median_price, 2),
+            "mean_price": round(summary['mean'], 2),
+            "std_price": round(summary['std'], 2),
+            "user_price": round(user_unit_price, 2),
+            "deviation": round(deviation, 1),
+            "evaluation": evaluate_price(deviation),
+            "comparable_count": summary['count'],
+            "percentile": round(percentile, 1),
+            "histogram": [
+                {"min_price": round(b['min'], 2), "max_price": round(b['max'], 2), "count": b['count']}
+                for b in histogram
+            ],
+            "user_bin": user_bin
+        }
+    }
+
+
+def analyze_market_batch(requests: List[dict], store: ComparableStore, include_similar: bool = False) -> dict:
+    """
+    複数物件の一括分析
+
+    同じ所在地・構造・築年区分の物件はセグメント群の統計を共有するので、
+    セグメントごとの集計は1回だけ行われる。
+    """
+    groups: dict = {}
+    results = [
+        analyze_market(request, store, groups=groups, include_similar=include_similar)
+        for request in requests
+    ]
+    return {
+        "results": results,
+        "property_count": len(results),
+        "segment_group_count": len(groups)
+    }
 
 
 class handler(BaseHTTPRequestHandler):
@@ -26,75 +186,38 @@ class handler(BaseHTTPRequestHandler):
             post_data = self.rfile.read(content_length)
             request = json.loads(post_data.decode('utf-8'))
 
+            # 'properties' があれば一括分析
+            is_batch = isinstance(request, dict) and 'properties' in request
+
             # 入力値のバリデーション
-            validation_errors = validate_market_analysis_input(request)
+            if is_batch:
+                validation_errors = validate_market_analysis_batch_input(request)
+            else:
+                validation_errors = validate_market_analysis_input(request)
 
             if validation_errors:
                 error_response = create_validation_error_response(validation_errors)
                 self._send_json_response(400, error_response)
                 return
 
-            # パラメータ取得
-            location = request.get('location', '')
-            land_area = request.get('land_area', 0)
-            year_built = request.get('year_built', 2000)
-            purchase_price = request.get('purchase_price', 0)
-
-            # ユーザー物件の平米単価を計算
-            user_unit_price = purchase_price * 10000 / land_area / 10000 if land_area > 0 else 0
-
-            # サンプルデータを生成（実際のAPIは後で実装）
-            similar_properties = []
-            for _ in range(15):
-                unit_price = user_unit_price * (1 + random.uniform(-0.3, 0.3))
-                area = land_area * (1 + random.uniform(-0.3, 0.3))
-
-                similar_properties.append({
-                    '取引時期': f"2024年Q{random.randint(1, 4)}",
-                    '所在地': f"{location[:6] if location else '東京都'}***",
-                    '面積(㎡)': round(area, 1),
-                    '築年': year_built + random.randint(-10, 10),
-                    '構造': random.choice(['木造', '鉄骨造', 'RC']),
-                    '取引価格(万円)': round(area * unit_price),
-                    '平米単価(万円/㎡)': round(unit_price, 2),
-                    '最寄駅': '品川',
-                    '駅距離': f"{random.randint(5, 15)}分"
-                })
-
-            # 統計を計算
-            prices = [prop['平米単価(万円/㎡)'] for prop in similar_properties]
-            prices.sort()
-            n = len(prices)
-            median_price = prices[n//2] if n % 2 == 1 else (prices[n//2-1] + prices[n//2]) / 2
-            mean_price = sum(prices) / len(prices)
-            variance = sum((x - mean_price) ** 2 for x in prices) / len(prices)
-            std_price = variance ** 0.5
-
-            # 価格評価
-            deviation = ((user_unit_price - median_price) / median_price * 100) if median_price > 0 else 0
-
-            if deviation < -20:
-                evaluation = ""
-            elif deviation < -10:
-                evaluation = ""
-            elif deviation < 5:
-                evaluation = ""
-            elif deviation < 15:
-                evaluation = ""
+            # 取引事例ストア
+            store = get_comparable_store()
+            if store is None:
+                error_response = create_error_response(
+                    ErrorCode.SYSTEM_DEPENDENCY,
+                    status_code=503,
+                    detail="取引事例データが登録されていません"
+                )
+                self._send_json_response(503, error_response)
+                return
+
+            if is_batch:
+                result = analyze_market_batch(
+                    request['properties'], store,
+                    include_similar=bool(request.get('include_similar_properties', False))
+                )
             else:
-                evaluation = ""
-
-            result = {
-                "similar_properties": similar_properties,
-                "statistics": {
-                    "median_price": round(median_price, 2),
-                    "mean_price": round(mean_price, 2),
-                    "std_price": round(std_price, 2),
-                    "user_price": round(user_unit_price, 2),
-                    "deviation": round(deviation, 1),
-                    "evaluation": evaluation
-                }
-            }
+                result = analyze_market(request, store)
 
             self._send_json_response(200, result)
 
@@ -0,0 +1,649 @@
+"""
+取引事例ストアモジュール
+Vercel Python Functions用
+
+国土交通省 不動産情報ライブラリの取引価格CSVを取り込み、
+列ごとのバイナリファイル（列指向）としてディスクに保存する。
+読み込み時は各列をmmapでメモリマップするため、起動時のコピーやパースは発生しない。
+
+行は (都道府県, 市区町村, 構造, 築年区分, 平米単価) の順にソートして保存し、
+セグメント（都道府県×市区町村×構造×築年区分）ごとの行範囲をマニフェストに持つ。
+検索はセグメントの行範囲を引くだけなので、データ量に関わらず数ミリ秒で終わる。
+座標を持つ事例はグリッド型の空間インデックス（spatial_index.py）にも登録し、
+対象物件の近傍K件を全件走査なしで求められるようにする。
+価格統計はセグメント×取引時期ごとに事前集計したキューブ（price_cube.py、列と同じ形式で保存）から引く。
+"""
+
+import csv
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import sys
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .price_cube import CUBE_COLUMNS, MappedPriceCube, PriceCube
+from .spatial_index import GridIndex, build_grid
+
+# ストアの配置場所（環境変数で上書き可能）
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'comparables')
+STORE_DIR_ENV = 'MARKET_DATA_DIR'
+
+MANIFEST_FILE = 'manifest.json'
+STORE_VERSION = 2
+
+# 築年区分の幅（年）
+BUILD_YEAR_BUCKET = 5
+
+# 列定義: 列名 → arrayの型コード
+COLUMNS = {
+    'unit_price': 'd',       # 平米単価（万円/㎡）
+    'area': 'd',             # 面積（㎡）
+    'trade_price': 'd',      # 取引価格（万円）
+    'build_year': 'i',       # 建築年（西暦、不明は0）
+    'period': 'i',           # 取引時期（年*10+四半期）
+    'station_minutes': 'i',  # 最寄駅距離（分、不明は-1）
+    'district': 'i',         # 地区名（辞書コード）
+    'station': 'i',          # 最寄駅名（辞書コード）
+    'latitude': 'd',         # 緯度（不明はNaN）
+    'longitude': 'd',        # 経度（不明はNaN）
+    'segment': 'i',          # 所属セグメント番号
+}
+
+# 空間インデックスの列（行ではなくセル順に並ぶ）
+SPATIAL_COLUMNS = {
+    'spatial_cell': 'q',     # セルキー（昇順）
+    'spatial_row': 'i',      # 行番号
+}
+
+# 辞書エンコードする文字列項目
+DICTIONARIES = ['prefecture', 'city', 'structure', 'district', 'station']
+
+# 建物の構造（CSV表記 → シミュレーターの建物構造）
+STRUCTURE_MAPPING = {
+    'RC': 'RC造',
+    'SRC': 'SRC造',
+    '鉄骨造': '重量鉄骨造',
+    '軽量鉄骨造': '軽量鉄骨造',
+    '木造': '木造',
+    'ブロック造': 'ブロック造',
+}
+
+# 元号 → 西暦オフセット
+ERA_OFFSETS = {'令和': 2018, '平成': 1988, '昭和': 1925, '大正': 1911}
+
+_store_cache: Dict[str, 'ComparableStore'] = {}
+
+
+# ========================================
+# CSV取り込み（正規化）
+# ========================================
+
+def _normalize_text(value: Optional[str]) -> str:
+    """全角英数字などをNFKCで正規化し前後の空白を除去"""
+    return unicodedata.normalize('NFKC', value or '').strip()
+
+
+def _parse_number(value: Optional[str]) -> Optional[float]:
+    """'2,000㎡以上' のような表記から数値部分を取り出す"""
+    text = _normalize_text(value).replace(',', '')
+    m = re.search(r'\d+(?:\.\d+)?', text)
+    return float(m.group(0)) if m else None
+
+
+def parse_build_year(value: Optional[str]) -> int:
+    """'1995年' / '平成7年' / '昭和50年' を西暦に変換（戦前・不明は0）"""
+    text = _normalize_text(value)
+    m = re.match(r'(令和|平成|昭和|大正)(元|\d+)年', text)
+    if m:
+        year = 1 if m.group(2) == '元' else int(m.group(2))
+        return ERA_OFFSETS[m.group(1)] + year
+    m = re.match(r'(\d{4})年?', text)
+    return int(m.group(1)) if m else 0
+
+
+def parse_period(value: Optional[str]) -> int:
+    """'2024年第1四半期' を 20241 に変換（解析できなければ0）"""
+    text = _normalize_text(value)
+    m = re.match(r'(\d{4})年第(\d)四半期', text)
+    if m:
+        return int(m.group(1)) * 10 + int(m.group(2))
+    m = re.match(r'(令和|平成)(元|\d+)年第(\d)四半期', text)
+    if m:
+        year = 1 if m.group(2) == '元' else int(m.group(2))
+        return (ERA_OFFSETS[m.group(1)] + year) * 10 + int(m.group(3))
+    return 0
+
+
+def parse_station_minutes(value: Optional[str]) -> int:
+    """'5' / '30分?60分' / '1H?1H30' を分に変換（範囲表記は下限、不明は-1）"""
+    text = _normalize_text(value)
+    if not text:
+        return -1
+    m = re.match(r'(\d+)H(\d+)?', text)
+    if m:
+        return int(m.group(1)) * 60 + int(m.group(2) or 0)
+    m = re.match(r'(\d+)', text)
+    return int(m.group(1)) if m else -1
+
+
+def normalize_structure(value: Optional[str]) -> str:
+    """建物の構造をシミュレーターの区分に寄せる（複数構造は先頭を採用、土地のみは空）"""
+    text = _normalize_text(value)
+    if not text:
+        return ''
+    primary = re.split(r'[、,]', text)[0].strip()
+    return STRUCTURE_MAPPING.get(primary, primary)
+
+
+def format_period(period: int) -> str:
+    """20241 → '2024年Q1'"""
+    if period <= 0:
+        return ''
+    return f"{period // 10}年Q{period % 10}"
+
+
+def build_year_bucket(year: int) -> int:
+    """築年区分（不明は0）"""
+    return year // BUILD_YEAR_BUCKET * BUILD_YEAR_BUCKET if year > 0 else 0
+
+
+def parse_coordinate(value: Optional[str]) -> float:
+    """緯度・経度の文字列を数値に変換（不明はNaN）"""
+    text = _normalize_text(value)
+    try:
+        return float(text) if text else math.nan
+    except ValueError:
+        return math.nan
+
+
+def normalize_mlit_row(row: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    不動産情報ライブラリCSVの1行を取引事例レコードに変換
+
+    Returns:
+        正規化済みレコード。価格・面積が読めない行はNone
+    """
+    prefecture = _normalize_text(row.get('都道府県名'))
+    city = _normalize_text(row.get('市区町村名'))
+    total_price = _parse_number(row.get('取引価格（総額）'))
+    area = _parse_number(row.get('面積（㎡）'))
+
+    if not prefecture or not city or not total_price or not area:
+        return None
+
+    trade_price = total_price / 10000  # 万円
+    return {
+        'prefecture': prefecture,
+        'city': city,
+        'district': _normalize_text(row.get('地区名')),
+        'structure': normalize_structure(row.get('建物の構造')),
+        'build_year': parse_build_year(row.get('建築年')),
+        'period': parse_period(row.get('取引時期')),
+        'area': area,
+        'trade_price': trade_price,
+        'unit_price': trade_price / area,
+        'station': _normalize_text(row.get('最寄駅：名称')),
+        'station_minutes': parse_station_minutes(row.get('最寄駅：距離（分）')),
+        'latitude': parse_coordinate(row.get('緯度') or row.get('latitude')),
+        'longitude': parse_coordinate(row.get('経度') or row.get('longitude')),
+    }
+
+
+def detect_csv_encoding(path: str) -> str:
+    """CSVの文字コード（UTF-8 BOM / Shift-JIS）を先頭部分から判定"""
+    for encoding in ('utf-8-sig', 'cp932'):
+        try:
+            with open(path, 'r', encoding=encoding, newline='') as f:
+                f.read(65536)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"文字コードを判定できません: {path}")
+
+
+def read_mlit_csv(path: str) -> Iterator[Dict[str, Any]]:
+    """不動産情報ライブラリの取引価格CSV（UTF-8 BOM / Shift-JIS）を読み込む"""
+    with open(path, 'r', encoding=detect_csv_encoding(path), newline='') as f:
+        for row in csv.DictReader(f):
+            record = normalize_mlit_row(row)
+            if record:
+                yield record
+
+
+# ========================================
+# ストア構築
+# ========================================
+
+class _StoreBuilder:
+    """ストアに書き込む行・辞書・価格キューブを組み立てる"""
+
+    def __init__(self):
+        self.dictionaries: Dict[str, Dict[str, int]] = {name: {'': 0} for name in DICTIONARIES}
+        self.cube = PriceCube()
+        # (セグメントキー, 平米単価, COLUMNS の segment 以外の値)
+        self.keyed: List[Tuple[Tuple[int, int, int, int], float, Tuple[Any, ...]]] = []
+
+    def encode(self, name: str, value: str) -> int:
+        codes = self.dictionaries[name]
+        if value not in codes:
+            codes[value] = len(codes)
+        return codes[value]
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> None:
+        encode = self.encode
+        for r in records:
+            segment = (
+                encode('prefecture', r['prefecture']),
+                encode('city', r['city']),
+                encode('structure', r['structure']),
+                build_year_bucket(r['build_year']),
+            )
+            self.cube.add(segment, r['period'], r['unit_price'])
+            self.keyed.append((segment, r['unit_price'], (
+                r['unit_price'], r['area'], r['trade_price'], r['build_year'], r['period'],
+                r['station_minutes'], encode('district', r['district']), encode('station', r['station']),
+                r.get('latitude', math.nan), r.get('longitude', math.nan),
+            )))
+
+    def load(self, store: 'ComparableStore') -> None:
+        """既存のストアの辞書・行・価格キューブを引き継ぐ（辞書コードは変わらない）"""
+        self.dictionaries = {
+            name: {value: code for code, value in enumerate(values)}
+            for name, values in store.dictionaries.items()
+        }
+        segment_keys = [tuple(s[:4]) for s in store.segment_list]
+        row_columns = [store.columns[name] for name in COLUMNS if name != 'segment']
+        unit_price = store.columns['unit_price']
+        for key, (*_, start, end) in zip(segment_keys, store.segment_list):
+            for i in range(start, end):
+                self.keyed.append((key, unit_price[i], tuple(column[i] for column in row_columns)))
+        if store.cube is not None:
+            for number, period, stats in store.cube.cells():
+                self.cube.cells[(segment_keys[number], period)] = stats
+        else:
+            # 価格キューブの無い古いストアは行から集計し直す
+            for key, price, values in self.keyed:
+                self.cube.add(key, values[4], price)
+
+    def write(self, store_dir: str, parts: Optional[List[str]]) -> Dict[str, Any]:
+        # 既存の行はソート済みで、新しい行は後ろに追加されるので、
+        # 同じセグメント・同じ平米単価の行も全件から構築したときと同じ順になる（安定ソート）
+        keyed = sorted(self.keyed, key=lambda item: (item[0], item[1]))
+
+        columns = {name: array(code) for name, code in COLUMNS.items()}
+        column_names = list(COLUMNS)
+        segments: List[List[int]] = []
+        for i, (segment, _, values) in enumerate(keyed):
+            if not segments or tuple(segments[-1][:4]) != segment:
+                segments.append([*segment, i, i + 1])
+            else:
+                segments[-1][5] = i + 1
+            for name, value in zip(column_names, (*values, len(segments) - 1)):
+                columns[name].append(value)
+
+        spatial_cell, spatial_row = build_grid(columns['latitude'], columns['longitude'])
+        columns['spatial_cell'] = spatial_cell
+        columns['spatial_row'] = spatial_row
+        columns.update(self.cube.to_columns({tuple(s[:4]): n for n, s in enumerate(segments)}))
+
+        os.makedirs(store_dir, exist_ok=True)
+        for name, values in columns.items():
+            if sys.byteorder != 'little':
+                values.byteswap()
+            _atomic_write_bytes(os.path.join(store_dir, f"{name}.bin"), values.tobytes())
+
+        manifest = {
+            'version': STORE_VERSION,
+            'row_count': len(keyed),
+            'build_year_bucket': BUILD_YEAR_BUCKET,
+            'columns': {**COLUMNS, **SPATIAL_COLUMNS, **CUBE_COLUMNS},
+            'dictionaries': {
+                name: [value for value, _ in sorted(codes.items(), key=lambda x: x[1])]
+                for name, codes in self.dictionaries.items()
+            },
+            'segments': segments,
+            'parts': parts,
+        }
+        _atomic_write_bytes(
+            os.path.join(store_dir, MANIFEST_FILE),
+            json.dumps(manifest, ensure_ascii=False).encode('utf-8')
+        )
+        return manifest
+
+
+def build_store(records: Iterable[Dict[str, Any]], store_dir: str,
+                parts: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    取引事例レコードから列指向ストアを構築
+
+    Args:
+        records: normalize_mlit_row() 形式のレコード
+        store_dir: 出力ディレクトリ（既存のストアは置き換える）
+        parts: records を読んだ取り込みストアのパーツ名（update_store() で追加分を求めるのに使う）
+
+    Returns:
+        書き込んだマニフェスト
+    """
+    builder = _StoreBuilder()
+    builder.add(records)
+    return builder.write(store_dir, parts)
+
+
+def update_store(records: Iterable[Dict[str, Any]], store_dir: str, parts: List[str]) -> Dict[str, Any]:
+    """
+    既存のストアに取引事例を追加する
+
+    価格キューブは既存のセルに新しい事例だけを追加して更新し、行は既存のストアの列から引き継ぐ。
+    取り込みストアの全パーツを読み直して全件を集計し直すことはしない。
+    結果は、全件から build_store() で構築したストアと同じになる。
+
+    Args:
+        records: 追加する取引事例（parts のパーツの行。ストアにある行を含めると二重計上になる）
+        store_dir: 既存のストアのディレクトリ
+        parts: records を読んだ取り込みストアのパーツ名（マニフェストの parts に追加する）
+
+    Returns:
+        書き込んだマニフェスト
+    """
+    store = ComparableStore(store_dir)
+    builder = _StoreBuilder()
+    builder.load(store)
+    builder.add(records)
+    return builder.write(store_dir, (store.parts or []) + list(parts))
+
+
+def read_store_parts(store_dir: str) -> Optional[List[str]]:
+    """
+    ストアに取り込み済みの取り込みストアのパーツ名
+
+    Returns:
+        パーツ名のリスト。ストアが無い場合・CSVから直接構築した場合はNone
+    """
+    try:
+        with open(os.path.join(store_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    return manifest.get('parts') if manifest.get('version') == STORE_VERSION else None
+
+
+def _atomic_write_bytes(path: str, data: bytes) -> None:
+    """読み込み中のプロセスが中途半端なファイルを見ないよう、一時ファイル経由で置き換える"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+# ========================================
+# ストア読み込み・検索
+# ========================================
+
+def _map_column(path: str, type_code: str) -> Any:
+    """列ファイルをメモリマップして型付きビューを返す"""
+    if os.path.getsize(path) == 0:
+        return array(type_code)
+    if sys.byteorder != 'little':
+        values = array(type_code)
+        with open(path, 'rb') as f:
+            values.frombytes(f.read())
+        values.byteswap()
+        return values
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mapped).cast(type_code)
+
+
+class ComparableStore:
+    """メモリマップした取引事例ストア"""
+
+    def __init__(self, store_dir: str):
+        with open(os.path.join(store_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != STORE_VERSION:
+            raise ValueError(f"未対応のストアバージョンです: {manifest.get('version')}")
+
+        self.store_dir = store_dir
+        self.row_count = manifest['row_count']
+        self.bucket_size = manifest['build_year_bucket']
+        # 取り込み済みの取り込みストアのパーツ名（CSVから直接構築したストアはNone）
+        self.parts: Optional[List[str]] = manifest.get('parts')
+        self.dictionaries: Dict[str, List[str]] = manifest['dictionaries']
+        self.columns = {
+            name: _map_column(os.path.join(store_dir, f"{name}.bin"), code)
+            for name, code in manifest['columns'].items()
+        }
+
+        # セグメント番号 → (都道府県, 市区町村, 構造, 築年区分, 開始行, 終了行)
+        self.segment_list: List[List[int]] = manifest['segments']
+        # (都道府県, 市区町村) → [(構造, 築年区分, 開始行, 終了行), ...]
+        self.segments: Dict[Tuple[int, int], List[Tuple[int, int, int, int]]] = {}
+        for pref, city, structure, bucket, start, end in self.segment_list:
+            self.segments.setdefault((pref, city), []).append((structure, bucket, start, end))
+
+        # 価格キューブ（無い場合は行を走査して集計する）
+        self.cube: Optional[MappedPriceCube] = (
+            MappedPriceCube(self.columns) if 'cube_segment' in self.columns else None
+        )
+
+        self.grid = GridIndex(
+            self.columns['spatial_cell'], self.columns['spatial_row'],
+            self.columns['latitude'], self.columns['longitude']
+        )
+
+        # 所在地文字列の解決用: 都道府県名 → コード、都道府県コード → [(市区町村名, コード)]（長い順）
+        self._prefecture_codes = {name: code for code, name in enumerate(self.dictionaries['prefecture']) if name}
+        cities: Dict[int, List[Tuple[str, int]]] = {}
+        for pref, city in self.segments:
+            cities.setdefault(pref, []).append((self.dictionaries['city'][city], city))
+        self._cities = {pref: sorted(names, key=lambda x: -len(x[0])) for pref, names in cities.items()}
+
+    def resolve_area(self, location: str) -> Optional[Tuple[int, int]]:
+        """
+        所在地文字列（例: '東京都品川区大井1丁目'）から (都道府県コード, 市区町村コード) を求める
+
+        都道府県名が省略されている場合は、市区町村名が一意に決まるときのみ解決する。
+        """
+        text = _normalize_text(location)
+        for name, pref in self._prefecture_codes.items():
+            if text.startswith(name):
+                rest = text[len(name):]
+                for city_name, city in self._cities.get(pref, []):
+                    if rest.startswith(city_name):
+                        return pref, city
+                return None
+
+        matches = [
+            (pref, city)
+            for pref, names in self._cities.items()
+            for city_name, city in names
+            if text.startswith(city_name)
+        ]
+        return matches[0] if len(matches) == 1 else None
+
+    def find_segments(self, area: Tuple[int, int], structure: Optional[str] = None,
+                      year_built: Optional[int] = None,
+                      year_tolerance: int = 10) -> List[Tuple[int, int, int, int]]:
+        """
+        条件に合うセグメントを返す
+
+        Args:
+            area: resolve_area() の戻り値
+            structure: 建物構造（省略時は全構造）
+            year_built: 築年（省略時は全築年）
+            year_tolerance: 築年の許容幅（年）
+
+        Returns:
+            [(構造コード, 築年区分, 開始行, 終了行), ...]
+        """
+        candidates = self.segments.get(area, [])
+        if structure:
+            try:
+                structure_code = self.dictionaries['structure'].index(structure)
+            except ValueError:
+                return []
+            candidates = [s for s in candidates if s[0] == structure_code]
+        if year_built:
+            low = build_year_bucket(int(year_built) - year_tolerance)
+            high = build_year_bucket(int(year_built) + year_tolerance)
+            candidates = [s for s in candidates if low <= s[1] <= high]
+        return candidates
+
+    def sorted_prices(self, segments: List[Tuple[int, int, int, int]]) -> List[float]:
+        """セグメント横断の平米単価（セグメント内はソート済みなのでマージのみ）"""
+        unit_price = self.columns['unit_price']
+        return list(heapq.merge(*(unit_price[start:end] for _, _, start, end in segments)))
+
+    def price_rank(self, segments: List[Tuple[int, int, int, int]], price: float) -> Dict[str, int]:
+        """
+        平米単価の順位をセグメントごとの二分探索で求める（ソートは行わない）
+
+        Returns:
+            {'below': priceより安い件数, 'equal': 同額の件数, 'count': 全件数}
+        """
+        unit_price = self.columns['unit_price']
+        below = equal = count = 0
+        for _, _, start, end in segments:
+            left = bisect_left(unit_price, price, start, end)
+            below += left - start
+            equal += bisect_right(unit_price, price, left, end) - left
+            count += end - start
+        return {'below': below, 'equal': equal, 'count': count}
+
+    def price_histogram(self, segments: List[Tuple[int, int, int, int]], bins: int) -> List[Dict[str, float]]:
+        """
+        平米単価の等幅ヒストグラム（最小値〜最大値をbins等分）
+
+        各セグメントはソート済みなので、最小・最大は両端、各階級の件数は境界値の二分探索で求まる。
+        """
+        unit_price = self.columns['unit_price']
+        ranges = [(start, end) for _, _, start, end in segments if end > start]
+        if not ranges:
+            return []
+        low = min(unit_price[start] for start, _ in ranges)
+        high = max(unit_price[end - 1] for _, end in ranges)
+        width = (high - low) / bins if high > low else 1.0
+        edges = [low + width * i for i in range(bins)] + [math.inf]
+
+        counts = [0] * bins
+        for start, end in ranges:
+            previous = start
+            for i in range(bins):
+                position = bisect_left(unit_price, edges[i + 1], previous, end)
+                counts[i] += position - previous
+                previous = position
+        return [
+            {'min': low + width * i, 'max': low + width * (i + 1), 'count': counts[i]}
+            for i in range(bins)
+        ]
+
+    def summarize(self, area: Tuple[int, int], segments: List[Tuple[int, int, int, int]]) -> Dict[str, float]:
+        """セグメント横断の平米単価統計（summarize_prices() と同じ形式）"""
+        if self.cube is None:
+            return summarize_prices(self.sorted_prices(segments))
+        segment = self.columns['segment']
+        return self.cube.query(segment[start] for _, _, start, end in segments if end > start).summary()
+
+    def recent_rows(self, segments: List[Tuple[int, int, int, int]], limit: int) -> List[Dict[str, Any]]:
+        """取引時期の新しい順に事例を返す"""
+        period = self.columns['period']
+        newest = heapq.nlargest(
+            limit,
+            ((period[i], i) for _, _, start, end in segments for i in range(start, end))
+        )
+        return [self.row(i) for _, i in newest]
+
+    def nearest_rows(self, latitude: float, longitude: float, limit: int,
+                     land_area: Optional[float] = None, area_tolerance: float = 0.5,
+                     structure: Optional[str] = None,
+                     year_built: Optional[int] = None, year_tolerance: int = 10) -> List[Dict[str, Any]]:
+        """
+        対象地点に近い順に事例を返す
+
+        Args:
+            latitude: 対象物件の緯度
+            longitude: 対象物件の経度
+            limit: 件数
+            land_area: 面積（省略時は面積で絞り込まない）
+            area_tolerance: 面積の許容幅（比率。0.5なら±50%）
+            structure: 建物構造（省略時は全構造）
+            year_built: 築年（省略時は築年で絞り込まない）
+            year_tolerance: 築年の許容幅（年）
+
+        Returns:
+            事例のリスト（各行に '距離(km)' を付与）
+        """
+        c = self.columns
+        structure_code = None
+        if structure:
+            if structure not in self.dictionaries['structure']:
+                return []
+            structure_code = self.dictionaries['structure'].index(structure)
+
+        def accept(i: int) -> bool:
+            if structure_code is not None and self.segment_list[c['segment'][i]][2] != structure_code:
+                return False
+            if land_area and abs(c['area'][i] - land_area) > land_area * area_tolerance:
+                return False
+            if year_built and (not c['build_year'][i] or abs(c['build_year'][i] - year_built) > year_tolerance):
+                return False
+            return True
+
+        rows = []
+        for distance, i in self.grid.nearest(latitude, longitude, limit, accept):
+            row = self.row(i)
+            row['距離(km)'] = round(distance, 2)
+            rows.append(row)
+        return rows
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """1行をAPIレスポンスの形式に変換"""
+        c = self.columns
+        d = self.dictionaries
+        pref, city, structure = self.segment_list[c['segment'][i]][:3]
+        minutes = c['station_minutes'][i]
+        return {
+            '取引時期': format_period(c['period'][i]),
+            '所在地': f"{d['prefecture'][pref]}{d['city'][city]}{d['district'][c['district'][i]]}",
+            '面積(㎡)': round(c['area'][i], 1),
+            '築年': c['build_year'][i] or None,
+            '構造': d['structure'][structure],
+            '取引価格(万円)': round(c['trade_price'][i]),
+            '平米単価(万円/㎡)': round(c['unit_price'][i], 2),
+            '最寄駅': d['station'][c['station'][i]],
+            '駅距離': f"{minutes}分" if minutes >= 0 else '',
+        }
+
+
+def get_comparable_store(store_dir: Optional[str] = None) -> Optional[ComparableStore]:
+    """
+    取引事例ストアを取得（プロセス内でキャッシュし、ウォームスタート時は再マップしない）
+
+    Returns:
+        ストア。未構築の場合はNone
+    """
+    store_dir = store_dir or os.getenv(STORE_DIR_ENV) or DEFAULT_STORE_DIR
+    if store_dir in _store_cache:
+        return _store_cache[store_dir]
+    if not os.path.exists(os.path.join(store_dir, MANIFEST_FILE)):
+        return None
+    store = ComparableStore(store_dir)
+    _store_cache[store_dir] = store
+    return store
+
+
+def summarize_prices(prices: List[float]) -> Dict[str, float]:
+    """ソート済み平米単価から中央値・平均・標準偏差を計算"""
+    n = len(prices)
+    if n == 0:
+        return {'median': 0, 'mean': 0, 'std': 0, 'count': 0}
+    median = prices[n // 2] if n % 2 == 1 else (prices[n // 2 - 1] + prices[n // 2]) / 2
+    mean = math.fsum(prices) / n
+    variance = math.fsum((x - mean) ** 2 for x in prices) / n
+    return {'median': median, 'mean': mean, 'std': variance ** 0.5, 'count': n}
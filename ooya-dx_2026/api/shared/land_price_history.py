@@ -0,0 +1,356 @@
+"""
+公示地価の複数年履歴ストアモジュール
+
+取り込みストア（market_data.py の land_prices）の地点レコードを、
+地点（標準地番号）ごとの年次系列として列指向のバイナリファイルに保存する。
+読み込み時は各列をmmapでメモリマップする（comparables.py と同じ形式）。
+
+行は (都道府県, 市区町村, 地点, 年) の順にソートして保存するため、
+- 同じ地点の前年比は隣り合う行を比べるだけで求まる（結合用のハッシュ表が不要）
+- 都道府県・市区町村の行は連続した範囲になり、地域ごとの時系列は範囲の走査で済む
+推移グラフ・変動率ランキング・複数年平均をクロールなしでここから作れる。
+"""
+
+import heapq
+import json
+import math
+import os
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .comparables import _atomic_write_bytes, _map_column
+
+# ストアの配置場所（デプロイ対象外、環境変数で上書き可能）
+DEFAULT_HISTORY_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'land_price_history'
+)
+HISTORY_DIR_ENV = 'LAND_PRICE_HISTORY_DIR'
+
+MANIFEST_FILE = 'manifest.json'
+HISTORY_VERSION = 1
+
+# 列定義: 列名 → array の型コード
+COLUMNS = {
+    'point': 'q',           # 地点番号（マニフェストの points の添字）
+    'year': 'q',
+    'price_per_sqm': 'd',
+    'change_rate': 'd',     # 公表値の対前年変動率（%、不明はNaN）
+}
+
+# 地点番号 → 行範囲の開始位置（地点数+1個）
+POINT_START_COLUMN = 'point_start'
+
+_history_cache: Dict[str, 'LandPriceHistory'] = {}
+
+
+def point_key(record: Dict[str, Any]) -> str:
+    """地点のID（標準地番号。無い場合は市区町村+所在地）"""
+    return record.get('point_id') or f"{record.get('city', '')}{record.get('address', '')}"
+
+
+def build_history_store(records: Iterable[Dict[str, Any]], store_dir: str) -> Dict[str, Any]:
+    """
+    地価レコードから履歴ストアを構築
+
+    同じ地点・同じ年のレコードが複数ある場合は後のものを使う。
+
+    Args:
+        records: normalize_land_price_row() 形式のレコード
+        store_dir: 出力ディレクトリ（既存のストアは置き換える）
+
+    Returns:
+        書き込んだマニフェスト
+    """
+    latest: Dict[Tuple[str, str, str, int], Tuple[float, float]] = {}
+    for r in records:
+        if not r.get('year') or not r.get('price_per_sqm'):
+            continue
+        latest[(r['prefecture'], r['city'], point_key(r), r['year'])] = (r['price_per_sqm'], r['change_rate'])
+
+    columns = {name: array(code) for name, code in COLUMNS.items()}
+    point_start = array('q')
+    points: List[str] = []
+    prefectures: List[str] = []
+    # 地域 → 行範囲: [都道府県番号, 市区町村名, 開始行, 終了行]
+    areas: List[List[Any]] = []
+    years = set()
+
+    previous_point = None
+    for i, ((pref, city, point, year), (price, change_rate)) in enumerate(sorted(latest.items())):
+        if (pref, city, point) != previous_point:
+            previous_point = (pref, city, point)
+            point_start.append(i)
+            points.append(point)
+        if not prefectures or prefectures[-1] != pref:
+            prefectures.append(pref)
+        if not areas or (areas[-1][0], areas[-1][1]) != (len(prefectures) - 1, city):
+            areas.append([len(prefectures) - 1, city, i, i + 1])
+        else:
+            areas[-1][3] = i + 1
+        columns['point'].append(len(points) - 1)
+        columns['year'].append(year)
+        columns['price_per_sqm'].append(price)
+        columns['change_rate'].append(change_rate)
+        years.add(year)
+    point_start.append(len(latest))
+    columns[POINT_START_COLUMN] = point_start
+
+    os.makedirs(store_dir, exist_ok=True)
+    for name, values in columns.items():
+        if sys.byteorder != 'little':
+            values.byteswap()
+        _atomic_write_bytes(os.path.join(store_dir, f"{name}.bin"), values.tobytes())
+
+    manifest = {
+        'version': HISTORY_VERSION,
+        'row_count': len(latest),
+        'point_count': len(points),
+        'years': sorted(years),
+        'columns': {**COLUMNS, POINT_START_COLUMN: 'q'},
+        'prefectures': prefectures,
+        'areas': areas,
+        'points': points,
+    }
+    _atomic_write_bytes(
+        os.path.join(store_dir, MANIFEST_FILE),
+        json.dumps(manifest, ensure_ascii=False).encode('utf-8')
+    )
+    return manifest
+
+
+# ========================================
+# ストア読み込み・集計
+# ========================================
+
+class LandPriceHistory:
+    """メモリマップした公示地価の履歴ストア"""
+
+    def __init__(self, store_dir: str):
+        with open(os.path.join(store_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != HISTORY_VERSION:
+            raise ValueError(f"未対応の履歴ストアバージョンです: {manifest.get('version')}")
+
+        self.store_dir = store_dir
+        self.row_count = manifest['row_count']
+        self.years: List[int] = manifest['years']
+        self.prefectures: List[str] = manifest['prefectures']
+        self.points: List[str] = manifest['points']
+        self.columns = {
+            name: _map_column(os.path.join(store_dir, f"{name}.bin"), code)
+            for name, code in manifest['columns'].items()
+        }
+
+        # (都道府県名, 市区町村名) → (開始行, 終了行)、都道府県名 → (開始行, 終了行)
+        self.areas: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        self.prefecture_ranges: Dict[str, Tuple[int, int]] = {}
+        for pref, city, start, end in manifest['areas']:
+            name = self.prefectures[pref]
+            self.areas[(name, city)] = (start, end)
+            first, _ = self.prefecture_ranges.get(name, (start, end))
+            self.prefecture_ranges[name] = (first, end)
+
+        self._point_index: Optional[Dict[Tuple[str, str], int]] = None
+
+    # ----------------------------------------
+    # 行範囲
+    # ----------------------------------------
+
+    def area_range(self, prefecture: Optional[str] = None, city: Optional[str] = None) -> Optional[Tuple[int, int]]:
+        """地域の行範囲（都道府県・市区町村を省略すると全国）。該当なしはNone"""
+        if prefecture is None:
+            return (0, self.row_count)
+        if city is None:
+            return self.prefecture_ranges.get(prefecture)
+        return self.areas.get((prefecture, city))
+
+    def _iter_points(self, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+        """行範囲内の (地点番号, 開始行, 終了行)"""
+        point_start = self.columns[POINT_START_COLUMN]
+        point_col = self.columns['point']
+        i = start
+        while i < end:
+            p = point_col[i]
+            j = min(point_start[p + 1], end)
+            yield p, i, j
+            i = j
+
+    # ----------------------------------------
+    # 地点
+    # ----------------------------------------
+
+    def find_point(self, prefecture: str, point_id: str) -> Optional[int]:
+        """(都道府県名, 標準地番号) → 地点番号"""
+        if self._point_index is None:
+            index: Dict[Tuple[str, str], int] = {}
+            for pref, (start, end) in self.prefecture_ranges.items():
+                for p, _, _ in self._iter_points(start, end):
+                    index[(pref, self.points[p])] = p
+            self._point_index = index
+        return self._point_index.get((prefecture, point_id))
+
+    def point_history(self, prefecture: str, point_id: str) -> List[Dict[str, Any]]:
+        """地点の年次系列 [{'year', 'price_per_sqm', 'change_rate'}]（古い順）"""
+        p = self.find_point(prefecture, point_id)
+        if p is None:
+            return []
+        c = self.columns
+        return [
+            {
+                'year': c['year'][i],
+                'price_per_sqm': c['price_per_sqm'][i],
+                'change_rate': None if math.isnan(c['change_rate'][i]) else c['change_rate'][i],
+            }
+            for i in range(c[POINT_START_COLUMN][p], c[POINT_START_COLUMN][p + 1])
+        ]
+
+    # ----------------------------------------
+    # 前年比（同一地点）
+    # ----------------------------------------
+
+    def _iter_yoy(self, year: int, start: int, end: int) -> Iterator[Tuple[int, float, float]]:
+        years = self.columns['year']
+        prices = self.columns['price_per_sqm']
+        points = self.columns['point']
+        for i in range(start + 1, end):
+            if years[i] == year and years[i - 1] == year - 1 and points[i] == points[i - 1]:
+                yield points[i], prices[i - 1], prices[i]
+
+    def year_over_year(self, year: int, prefecture: Optional[str] = None,
+                       city: Optional[str] = None) -> Iterator[Tuple[int, float, float]]:
+        """
+        前年と当年の両方に価格がある地点の (地点番号, 前年価格, 当年価格)
+
+        行は地点→年の順に並んでいるので、隣り合う行を比べるだけで結合できる。
+        """
+        bounds = self.area_range(prefecture, city)
+        if bounds is not None:
+            yield from self._iter_yoy(year, *bounds)
+
+    def _year_totals(self, start: int, end: int) -> Dict[int, List[float]]:
+        """年 → [価格合計, 件数, 同一地点の変動率合計, 同一地点数]"""
+        years = self.columns['year']
+        prices = self.columns['price_per_sqm']
+        points = self.columns['point']
+        totals: Dict[int, List[float]] = {}
+        for i in range(start, end):
+            year = years[i]
+            entry = totals.get(year)
+            if entry is None:
+                entry = totals[year] = [0.0, 0, 0.0, 0]
+            entry[0] += prices[i]
+            entry[1] += 1
+            if i > start and points[i] == points[i - 1] and years[i - 1] == year - 1 and prices[i - 1] > 0:
+                entry[2] += (prices[i] / prices[i - 1] - 1) * 100
+                entry[3] += 1
+        return totals
+
+    # ----------------------------------------
+    # 時系列・ランキング・複数年平均
+    # ----------------------------------------
+
+    def series(self, prefecture: Optional[str] = None, city: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        地域の年次推移（推移グラフ用）
+
+        Returns:
+            [{'year', 'average_price', 'data_count', 'change_rate', 'matched_points'}]（古い順）
+            change_rate は前年にも価格がある地点だけで求めた平均変動率（前年が無い年はNone）
+        """
+        bounds = self.area_range(prefecture, city)
+        if bounds is None:
+            return []
+        return [
+            {
+                'year': year,
+                'average_price': int(total / count),
+                'data_count': count,
+                'change_rate': round(rate_total / matched, 1) if matched else None,
+                'matched_points': matched,
+            }
+            for year, (total, count, rate_total, matched) in sorted(self._year_totals(*bounds).items())
+        ]
+
+    def change_rate_ranking(self, year: int, level: str = 'prefecture', prefecture: Optional[str] = None,
+                            limit: int = 10, ascending: bool = False) -> List[Dict[str, Any]]:
+        """
+        同一地点の前年比による変動率ランキング
+
+        Args:
+            year: 対象年
+            level: 'prefecture'（都道府県別）または 'city'（市区町村別）
+            prefecture: level='city' のとき対象の都道府県（省略すると全国の市区町村）
+            limit: 件数
+            ascending: True なら下落率順
+        """
+        if level == 'prefecture':
+            candidates = [((pref, None), bounds) for pref, bounds in self.prefecture_ranges.items()]
+        elif level == 'city':
+            candidates = [
+                (area, bounds) for area, bounds in self.areas.items()
+                if prefecture is None or area[0] == prefecture
+            ]
+        else:
+            raise ValueError(f"未対応の集計単位です: {level}")
+
+        entries = []
+        for (pref, city), (start, end) in candidates:
+            count = 0
+            total_rate = 0.0
+            for _, previous, current in self._iter_yoy(year, start, end):
+                if previous > 0:
+                    total_rate += (current / previous - 1) * 100
+                    count += 1
+            if count:
+                entries.append({'prefecture': pref, 'city': city,
+                                'change_rate': round(total_rate / count, 1), 'matched_points': count})
+        select = heapq.nsmallest if ascending else heapq.nlargest
+        ranked = select(limit, entries, key=lambda x: x['change_rate'])
+        for rank, entry in enumerate(ranked, start=1):
+            entry['rank'] = rank
+        return ranked
+
+    def multi_year_average(self, years: Iterable[int], prefecture: Optional[str] = None,
+                           city: Optional[str] = None) -> Dict[str, Any]:
+        """
+        複数年の平均地価
+
+        Returns:
+            {'average_price': 対象年の全データポイントの平均, 'data_count': 件数,
+             'by_year': {年: 平均地価}}
+        """
+        bounds = self.area_range(prefecture, city)
+        wanted = set(years)
+        totals = {
+            year: entry for year, entry in (self._year_totals(*bounds).items() if bounds else [])
+            if year in wanted
+        }
+        total = sum(entry[0] for entry in totals.values())
+        count = sum(entry[1] for entry in totals.values())
+        return {
+            'average_price': int(total / count) if count else 0,
+            'data_count': count,
+            'by_year': {year: int(entry[0] / entry[1]) for year, entry in sorted(totals.items())},
+        }
+
+
+def get_history_dir(store_dir: Optional[str] = None) -> str:
+    return store_dir or os.getenv(HISTORY_DIR_ENV) or DEFAULT_HISTORY_DIR
+
+
+def get_land_price_history(store_dir: Optional[str] = None) -> Optional[LandPriceHistory]:
+    """
+    履歴ストアを取得（プロセス内でキャッシュする）
+
+    Returns:
+        ストア。未構築の場合はNone
+    """
+    store_dir = get_history_dir(store_dir)
+    if store_dir in _history_cache:
+        return _history_cache[store_dir]
+    if not os.path.exists(os.path.join(store_dir, MANIFEST_FILE)):
+        return None
+    history = LandPriceHistory(store_dir)
+    _history_cache[store_dir] = history
+    return history
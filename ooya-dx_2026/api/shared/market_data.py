@@ -0,0 +1,454 @@
+"""
+市場データ取り込みストアモジュール
+
+取引価格CSV・公示地価CSVを一定行数ごとのチャンクで読み込み、正規化したうえで
+追記専用の圧縮列指向パーツ（part-000001/列名.gz）として保存する。
+取り込み済みの元ファイル（内容のハッシュ）と、取り込んだパーティション（取引時期・地域）を
+マニフェストに持つため、期間の重なるCSVを再投入しても既存の期間・地域の行は二重に入らない。
+取引事例には一意なIDがなく、内容がまったく同じ取引も実在するので、行の内容では重複を判定しない。
+
+market-analysis 用の取引事例ストア（comparables.py）はここから再構築し、
+地価ページの生成スクリプトは LandPriceStoreClient 経由でAPIの代わりにここを参照する。
+"""
+
+import csv
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import time
+from array import array
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .comparables import _normalize_text, _parse_number, detect_csv_encoding, parse_coordinate, read_mlit_csv
+
+# 取り込みストアの配置場所（デプロイ対象外）
+DEFAULT_INGEST_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'market_data'
+)
+INGEST_DIR_ENV = 'MARKET_INGEST_DIR'
+
+MANIFEST_FILE = 'manifest.json'
+INGEST_VERSION = 2
+
+# 1パーツあたりの行数（メモリ使用量の上限になる）
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+# 列定義: 列名 → 型（'d': 実数, 'i': 整数, 's': 文字列）
+TRANSACTION_COLUMNS = {
+    'prefecture': 's',
+    'city': 's',
+    'district': 's',
+    'structure': 's',
+    'build_year': 'i',
+    'period': 'i',
+    'area': 'd',
+    'trade_price': 'd',
+    'unit_price': 'd',
+    'station': 's',
+    'station_minutes': 'i',
+    'latitude': 'd',
+    'longitude': 'd',
+}
+
+LAND_PRICE_COLUMNS = {
+    'point_id': 's',           # 標準地番号
+    'year': 'i',               # 価格時点（西暦）
+    'prefecture': 's',
+    'city': 's',
+    'address': 's',            # 所在及び地番
+    'price_per_sqm': 'd',      # 価格（円/㎡）
+    'change_rate': 'd',        # 対前年変動率（%、不明はNaN）
+    'station': 's',
+    'station_distance': 'i',   # 最寄駅距離（m、不明は-1）
+    'use_district': 's',       # 用途地域
+    'building_coverage': 'd',  # 建ぺい率（%、不明はNaN）
+    'floor_area_ratio': 'd',   # 容積率（%、不明はNaN）
+    'latitude': 'd',
+    'longitude': 'd',
+}
+
+# 公示地価CSVのヘッダー候補（NFKC正規化・空白除去後に照合）
+LAND_PRICE_HEADERS = {
+    'point_id': ['標準地番号', '基準地番号', '地点番号'],
+    'year': ['価格時点', '年次', '調査年'],
+    'prefecture': ['都道府県名', '都道府県'],
+    'city': ['市区町村名', '市区町村'],
+    'address': ['所在及び地番', '所在地及び地番', '所在地'],
+    'price_per_sqm': ['価格(円/m2)', '1m2当たりの価格(円)', '価格', '地価(円/m2)'],
+    'change_rate': ['対前年変動率', '変動率', '対前年変動率(%)'],
+    'station': ['最寄駅名', '駅名', '最寄駅'],
+    'station_distance': ['最寄駅までの距離', '駅距離', '最寄駅距離', '駅からの距離(m)'],
+    'use_district': ['用途地域', '用途区分'],
+    'building_coverage': ['建ぺい率', '建ぺい率(%)', '建蔽率'],
+    'floor_area_ratio': ['容積率', '容積率(%)'],
+    'latitude': ['緯度', 'latitude'],
+    'longitude': ['経度', 'longitude'],
+}
+
+# 都道府県名 → 都道府県コード
+PREFECTURE_CODES = {
+    name: f"{i:02d}" for i, name in enumerate([
+        '北海道', '青森県', '岩手県', '宮城県', '秋田県', '山形県', '福島県',
+        '茨城県', '栃木県', '群馬県', '埼玉県', '千葉県', '東京都', '神奈川県',
+        '新潟県', '富山県', '石川県', '福井県', '山梨県', '長野県', '岐阜県',
+        '静岡県', '愛知県', '三重県', '滋賀県', '京都府', '大阪府', '兵庫県',
+        '奈良県', '和歌山県', '鳥取県', '島根県', '岡山県', '広島県', '山口県',
+        '徳島県', '香川県', '愛媛県', '高知県', '福岡県', '佐賀県', '長崎県',
+        '熊本県', '大分県', '宮崎県', '鹿児島県', '沖縄県',
+    ], start=1)
+}
+
+
+# ========================================
+# 公示地価CSVの正規化
+# ========================================
+
+def parse_change_rate(value: Any) -> float:
+    """'+1.2%' / '-0.5' / '▲0.5' / '△0.5' を数値（%）に変換（不明はNaN）"""
+    text = _normalize_text(str(value) if value is not None else '')
+    text = text.replace('%', '').replace('+', '').replace(',', '')
+    if text[:1] in ('▲', '△'):
+        text = '-' + text[1:]
+    try:
+        return float(text) if text else math.nan
+    except ValueError:
+        return math.nan
+
+
+def parse_land_price_year(value: Any) -> int:
+    """'2025' / '令和7年' / '2025年1月1日' を西暦年に変換（不明は0）"""
+    text = _normalize_text(str(value) if value is not None else '')
+    m = re.match(r'(令和|平成)(元|\d+)年', text)
+    if m:
+        year = 1 if m.group(2) == '元' else int(m.group(2))
+        return (2018 if m.group(1) == '令和' else 1988) + year
+    m = re.match(r'(\d{4})', text)
+    return int(m.group(1)) if m else 0
+
+
+def _optional_number(value: Any) -> float:
+    number = _parse_number(str(value) if value is not None else '')
+    return number if number is not None else math.nan
+
+
+def _header_key(name: str) -> str:
+    return re.sub(r'\s', '', _normalize_text(name))
+
+
+def resolve_land_price_headers(fieldnames: Iterable[str]) -> Dict[str, str]:
+    """CSVのヘッダー → LAND_PRICE_COLUMNS の列名 の対応表を作る"""
+    by_key = {_header_key(name): name for name in fieldnames if name}
+    mapping = {}
+    for column, candidates in LAND_PRICE_HEADERS.items():
+        for candidate in [column, *candidates]:
+            header = by_key.get(_header_key(candidate))
+            if header is not None:
+                mapping[column] = header
+                break
+    return mapping
+
+
+def normalize_land_price_row(row: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    公示地価CSV（またはAPIレスポンス）の1行を地価レコードに変換
+
+    Args:
+        row: CSVの1行
+        headers: resolve_land_price_headers() の結果（省略時は列名そのまま）
+
+    Returns:
+        正規化済みレコード。価格が読めない行はNone
+    """
+    headers = headers or {}
+
+    def get(column: str) -> Any:
+        return row.get(headers.get(column, column))
+
+    price = _parse_number(str(get('price_per_sqm') or ''))
+    prefecture = _normalize_text(get('prefecture'))
+    if not price or not prefecture:
+        return None
+
+    distance = _parse_number(str(get('station_distance') or ''))
+    return {
+        'point_id': _normalize_text(get('point_id')),
+        'year': parse_land_price_year(get('year')),
+        'prefecture': prefecture,
+        'city': _normalize_text(get('city')),
+        'address': _normalize_text(get('address')),
+        'price_per_sqm': price,
+        'change_rate': parse_change_rate(get('change_rate')),
+        'station': _normalize_text(get('station')),
+        'station_distance': int(distance) if distance is not None else -1,
+        'use_district': _normalize_text(get('use_district')),
+        'building_coverage': _optional_number(get('building_coverage')),
+        'floor_area_ratio': _optional_number(get('floor_area_ratio')),
+        'latitude': parse_coordinate(str(get('latitude') or '')),
+        'longitude': parse_coordinate(str(get('longitude') or '')),
+    }
+
+
+def read_land_price_csv(path: str) -> Iterator[Dict[str, Any]]:
+    """公示地価CSV（UTF-8 BOM / Shift-JIS）を読み込む"""
+    with open(path, 'r', encoding=detect_csv_encoding(path), newline='') as f:
+        reader = csv.DictReader(f)
+        headers = resolve_land_price_headers(reader.fieldnames or [])
+        if 'price_per_sqm' not in headers or 'prefecture' not in headers:
+            raise ValueError(f"公示地価CSVの列（価格・都道府県名）が見つかりません: {path}")
+        for row in reader:
+            record = normalize_land_price_row(row, headers)
+            if record:
+                yield record
+
+
+# 重複判定の単位（パーティション）: データセット名 → 列
+# 1つのパーティションは1つの元ファイルからだけ取り込む
+PARTITION_COLUMNS = {
+    'transactions': ('period', 'prefecture', 'city'),
+    'land_prices': ('year', 'prefecture', 'city'),
+}
+
+# データセット名 → (列定義, CSV読み込み関数)
+DATASETS: Dict[str, Tuple[Dict[str, str], Callable[[str], Iterator[Dict[str, Any]]]]] = {
+    'transactions': (TRANSACTION_COLUMNS, read_mlit_csv),
+    'land_prices': (LAND_PRICE_COLUMNS, read_land_price_csv),
+}
+
+
+# ========================================
+# 追記専用パーツストア
+# ========================================
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _encode_column(type_code: str, values: List[Any]) -> bytes:
+    """列の値をバイト列に変換（整数は8バイト、文字列は改行区切り）"""
+    if type_code == 's':
+        return '\n'.join(v.replace('\n', ' ') for v in values).encode('utf-8')
+    data = array('q' if type_code == 'i' else type_code, values)
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return data.tobytes()
+
+
+def _decode_column(type_code: str, raw: bytes, rows: int) -> List[Any]:
+    if type_code == 's':
+        return raw.decode('utf-8').split('\n') if rows else []
+    data = array('q' if type_code == 'i' else type_code)
+    data.frombytes(raw)
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return data.tolist()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class IngestStore:
+    """データセット1つ分の追記専用パーツストア"""
+
+    def __init__(self, root: str, dataset: str):
+        if dataset not in DATASETS:
+            raise ValueError(f"未対応のデータセットです: {dataset}")
+        self.dataset = dataset
+        self.columns, self._reader = DATASETS[dataset]
+        self.path = os.path.join(root, dataset)
+        manifest_path = os.path.join(self.path, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+            if self.manifest.get('version') != INGEST_VERSION:
+                raise ValueError(f"未対応の取り込みストアバージョンです: {self.manifest.get('version')}")
+        else:
+            self.manifest = {
+                'version': INGEST_VERSION,
+                'dataset': dataset,
+                'columns': self.columns,
+                'row_count': 0,
+                'parts': [],
+                'sources': {},
+                'partitions': {},
+            }
+
+    @property
+    def row_count(self) -> int:
+        return self.manifest['row_count']
+
+    def _save_manifest(self) -> None:
+        # パーツを書き終えてからマニフェストを置き換えるので、途中で落ちても読み手には見えない
+        _write_atomic(
+            os.path.join(self.path, MANIFEST_FILE),
+            json.dumps(self.manifest, ensure_ascii=False, indent=1).encode('utf-8')
+        )
+
+    def _write_part(self, rows: List[Tuple[Any, ...]]) -> str:
+        name = f"part-{len(self.manifest['parts']) + 1:06d}"
+        part_dir = os.path.join(self.path, name)
+        os.makedirs(part_dir, exist_ok=True)
+        for (column, type_code), values in zip(self.columns.items(), zip(*rows)):
+            _write_atomic(os.path.join(part_dir, f"{column}.gz"),
+                          gzip.compress(_encode_column(type_code, list(values)), compresslevel=6))
+        self.manifest['parts'].append({'name': name, 'rows': len(rows)})
+        return name
+
+    def ingest(self, paths: Iterable[str], chunk_rows: int = DEFAULT_CHUNK_ROWS,
+               progress: Optional[Callable[[str, Dict[str, int]], None]] = None) -> Dict[str, int]:
+        """
+        CSVファイルを取り込む
+
+        取り込み済みのファイル（内容が同一）は読み飛ばす。
+        別のファイルから取り込み済みのパーティション（PARTITION_COLUMNS）の行は追加しない。
+        同じファイル内の行は、内容が同じでもすべて追加する。
+
+        Args:
+            paths: CSVファイルのパス
+            chunk_rows: 1パーツあたりの行数
+            progress: ファイルごとの結果を受け取るコールバック
+
+        Returns:
+            {'files': 取り込んだファイル数, 'skipped_files': 取り込み済みで読み飛ばした数,
+             'rows': 追加した行数, 'duplicates': 取り込み済みのパーティションのため除外した行数}
+        """
+        os.makedirs(self.path, exist_ok=True)
+        partitions = self.manifest['partitions']
+        partition_columns = PARTITION_COLUMNS[self.dataset]
+        column_names = list(self.columns)
+        totals = {'files': 0, 'skipped_files': 0, 'rows': 0, 'duplicates': 0}
+
+        for path in paths:
+            digest = _file_digest(path)
+            if digest in self.manifest['sources']:
+                totals['skipped_files'] += 1
+                if progress:
+                    progress(path, {'rows': 0, 'duplicates': 0, 'skipped': 1})
+                continue
+
+            result = {'rows': 0, 'duplicates': 0, 'skipped': 0}
+            rows: List[Tuple[Any, ...]] = []
+            parts: List[str] = []
+            claimed: set = set()  # このファイルから取り込むパーティション
+
+            def flush() -> None:
+                if rows:
+                    parts.append(self._write_part(rows))
+                    self.manifest['row_count'] += len(rows)
+                    rows.clear()
+
+            for record in self._reader(path):
+                partition = '\t'.join(str(record[name]) for name in partition_columns)
+                if partition not in claimed:
+                    if partition in partitions:
+                        result['duplicates'] += 1
+                        continue
+                    claimed.add(partition)
+                rows.append(tuple(record[name] for name in column_names))
+                result['rows'] += 1
+                if len(rows) >= chunk_rows:
+                    flush()
+            flush()
+
+            for partition in claimed:
+                partitions[partition] = digest
+            self.manifest['sources'][digest] = {
+                'file': os.path.basename(path),
+                'rows': result['rows'],
+                'duplicates': result['duplicates'],
+                'parts': parts,
+                'ingested_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            }
+            self._save_manifest()
+
+            totals['files'] += 1
+            totals['rows'] += result['rows']
+            totals['duplicates'] += result['duplicates']
+            if progress:
+                progress(path, result)
+
+        return totals
+
+    def iter_columns(self, columns: Optional[List[str]] = None,
+                     parts: Optional[Iterable[str]] = None) -> Iterator[Dict[str, List[Any]]]:
+        """パーツごとに {列名: 値のリスト} を返す（必要な列だけ展開する。parts を指定するとそのパーツだけ）"""
+        columns = columns or list(self.columns)
+        selected = None if parts is None else set(parts)
+        for part in self.manifest['parts']:
+            if selected is not None and part['name'] not in selected:
+                continue
+            part_dir = os.path.join(self.path, part['name'])
+            chunk = {}
+            for column in columns:
+                with open(os.path.join(part_dir, f"{column}.gz"), 'rb') as f:
+                    chunk[column] = _decode_column(self.columns[column], gzip.decompress(f.read()), part['rows'])
+            yield chunk
+
+    def iter_records(self, parts: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """全行（parts を指定するとそのパーツの行）をレコード（dict）として返す"""
+        column_names = list(self.columns)
+        for chunk in self.iter_columns(column_names, parts):
+            for values in zip(*(chunk[name] for name in column_names)):
+                yield dict(zip(column_names, values))
+
+
+def get_ingest_dir(root: Optional[str] = None) -> str:
+    return root or os.getenv(INGEST_DIR_ENV) or DEFAULT_INGEST_DIR
+
+
+# ========================================
+# 地価ページ生成スクリプト向けクライアント
+# ========================================
+
+class LandPriceStoreClient:
+    """
+    取り込み済みの公示地価を RealEstateAPIClient と同じ形で返すクライアント
+
+    prefecture_codes と search_land_prices(prefecture, year) を備えるので、
+    地価ページの生成スクリプトでAPIクライアントの代わりにそのまま使える。
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.store = IngestStore(get_ingest_dir(root), 'land_prices')
+        self.prefecture_codes = dict(PREFECTURE_CODES)
+        self._index: Optional[Dict[Tuple[str, str], List[Dict[str, Any]]]] = None
+
+    def _build_index(self) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+        index: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for r in self.store.iter_records():
+            index.setdefault((r['prefecture'], str(r['year'])), []).append({
+                'region': r['city'],
+                'address': r['address'],
+                'full_address': f"{r['prefecture']}{r['city']}{r['address']}",
+                'price_per_sqm': int(r['price_per_sqm']),
+                'price_per_tsubo': round(r['price_per_sqm'] * 3.30579 / 10000, 1),
+                'change_rate': '' if math.isnan(r['change_rate']) else str(r['change_rate']),
+                'price_time': str(r['year']),
+                'station': r['station'],
+                'station_distance': str(r['station_distance']) if r['station_distance'] >= 0 else '',
+                'use_district': r['use_district'],
+                'building_coverage': '' if math.isnan(r['building_coverage']) else f"{r['building_coverage']:g}",
+                'floor_area_ratio': '' if math.isnan(r['floor_area_ratio']) else f"{r['floor_area_ratio']:g}",
+                'latitude': '' if math.isnan(r['latitude']) else str(r['latitude']),
+                'longitude': '' if math.isnan(r['longitude']) else str(r['longitude']),
+                'prefecture': r['prefecture'],
+                'prefecture_code': PREFECTURE_CODES.get(r['prefecture'], ''),
+            })
+        return index
+
+    def search_land_prices(self, prefecture: str, year: str = "2025", **_: Any) -> List[Dict[str, Any]]:
+        if self._index is None:
+            self._index = self._build_index()
+        return self._index.get((prefecture, str(year)), [])
@@ -0,0 +1,208 @@
+"""
+価格統計キューブモジュール
+Vercel Python Functions用
+
+平米単価の統計を (セグメント, 取引時期) のセルごとに事前集計する。
+セグメントは取引事例ストアのセグメント（都道府県×市区町村×構造×築年区分）。
+各セルは件数・平均・偏差平方和（Welford法）と分位点スケッチを持つ。
+取引時期をまとめた全期間セルも同時に持つため、リクエスト時は
+条件に合う数個のセルを合成するだけで中央値・平均・標準偏差が求まる。
+
+キューブはストアの列と同じ形式のバイナリファイル（cube_*.bin）として保存する。
+取り込みで取引事例が増えたときは、既存のセルを読み込んで新しい事例だけを追加する
+（comparables.update_store()。全件の再集計は不要）。読み込み時はメモリマップするだけなので、
+コールドスタートでもパースは発生しない。
+"""
+
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Hashable, Iterable, Iterator, Mapping, Sequence, Tuple
+
+# 分位点スケッチの相対誤差（1%）
+RELATIVE_ACCURACY = 0.01
+
+# 全期間セルの取引時期
+ALL_PERIODS = 0
+
+# キューブの列定義: 列名 → arrayの型コード
+# セルは (セグメント番号, 取引時期) の昇順に並び、全期間セル（取引時期0）が各セグメントの先頭に来る
+CUBE_COLUMNS = {
+    'cube_segment': 'i',     # セグメント番号
+    'cube_period': 'i',      # 取引時期（全期間セルは0）
+    'cube_count': 'q',       # 件数
+    'cube_mean': 'd',        # 平均
+    'cube_m2': 'd',          # 平均からの偏差平方和
+    'cube_zero': 'q',        # スケッチの0以下の件数
+    'cube_bin_end': 'q',     # スケッチのビンの終了位置（開始位置は前のセルの終了位置）
+    'cube_bin_index': 'i',   # スケッチのビン番号（セルごとに昇順）
+    'cube_bin_count': 'i',   # スケッチのビンの件数
+}
+
+
+class QuantileSketch:
+    """
+    相対誤差保証付きの分位点スケッチ（DDSketch方式）
+
+    値を対数スケールのビンで数えるだけなので、追加はO(1)、合成はビン数に比例する。
+    返す分位点は真の値から RELATIVE_ACCURACY 以内の相対誤差に収まる。
+    """
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0  # 0以下の値（平米単価では通常発生しない）
+
+    def add(self, value: float) -> None:
+        if value <= 0:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[index] = self.bins.get(index, 0) + 1
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        self.zero_count += other.zero_count
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+
+    def quantile(self, q: float) -> float:
+        """q分位点（0〜1）。空の場合は0"""
+        total = self.zero_count + sum(self.bins.values())
+        if total == 0:
+            return 0
+        rank = q * (total - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0
+        index = 0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                break
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+
+class PriceStats:
+    """1セル分の平米単価統計"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # 平均からの偏差平方和
+        self.sketch = QuantileSketch()
+
+    def add(self, value: float) -> None:
+        """Welford法で1件追加"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.sketch.add(value)
+
+    def merge(self, other: 'PriceStats') -> None:
+        """Chanの並列アルゴリズムで別セルを合成"""
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.sketch.merge(other.sketch)
+
+    def summary(self) -> Dict[str, float]:
+        """summarize_prices() と同じ形式（中央値はスケッチによる近似値）"""
+        if self.count == 0:
+            return {'median': 0, 'mean': 0, 'std': 0, 'count': 0}
+        return {
+            'median': self.sketch.quantile(0.5),
+            'mean': self.mean,
+            'std': (max(self.m2, 0.0) / self.count) ** 0.5,
+            'count': self.count,
+        }
+
+
+class PriceCube:
+    """(セグメントキー, 取引時期) → PriceStats の集計キューブ（ストアの構築・更新時に使う）"""
+
+    def __init__(self):
+        self.cells: Dict[Tuple[Hashable, int], PriceStats] = {}
+
+    def add(self, segment: Hashable, period: int, unit_price: float) -> None:
+        """取引事例を1件追加（該当する四半期セルと全期間セルを更新）"""
+        for key in ((segment, period), (segment, ALL_PERIODS)):
+            stats = self.cells.get(key)
+            if stats is None:
+                stats = self.cells[key] = PriceStats()
+            stats.add(unit_price)
+
+    def to_columns(self, segment_numbers: Mapping[Hashable, int]) -> Dict[str, array]:
+        """
+        CUBE_COLUMNS の列に変換
+
+        Args:
+            segment_numbers: セグメントキー → ストアのセグメント番号
+        """
+        columns = {name: array(code) for name, code in CUBE_COLUMNS.items()}
+        cells = sorted(
+            (segment_numbers[segment], period, stats)
+            for (segment, period), stats in self.cells.items()
+        )
+        for number, period, stats in cells:
+            columns['cube_segment'].append(number)
+            columns['cube_period'].append(period)
+            columns['cube_count'].append(stats.count)
+            columns['cube_mean'].append(stats.mean)
+            columns['cube_m2'].append(stats.m2)
+            columns['cube_zero'].append(stats.sketch.zero_count)
+            for index, count in sorted(stats.sketch.bins.items()):
+                columns['cube_bin_index'].append(index)
+                columns['cube_bin_count'].append(count)
+            columns['cube_bin_end'].append(len(columns['cube_bin_index']))
+        return columns
+
+
+class MappedPriceCube:
+    """CUBE_COLUMNS の列（メモリマップ済み）を引くキューブ"""
+
+    def __init__(self, columns: Mapping[str, Sequence[Any]]):
+        self.columns = columns
+
+    def cell(self, i: int) -> PriceStats:
+        """i番目のセルの統計"""
+        c = self.columns
+        stats = PriceStats()
+        stats.count = c['cube_count'][i]
+        stats.mean = c['cube_mean'][i]
+        stats.m2 = c['cube_m2'][i]
+        stats.sketch.zero_count = c['cube_zero'][i]
+        start = c['cube_bin_end'][i - 1] if i > 0 else 0
+        end = c['cube_bin_end'][i]
+        stats.sketch.bins = dict(zip(c['cube_bin_index'][start:end], c['cube_bin_count'][start:end]))
+        return stats
+
+    def cells(self) -> Iterator[Tuple[int, int, PriceStats]]:
+        """全セルの (セグメント番号, 取引時期, 統計)"""
+        for i, (segment, period) in enumerate(zip(self.columns['cube_segment'], self.columns['cube_period'])):
+            yield segment, period, self.cell(i)
+
+    def query(self, segments: Iterable[int], periods: Sequence[int] = (ALL_PERIODS,)) -> PriceStats:
+        """
+        条件に合うセルを合成した統計を返す
+
+        Args:
+            segments: セグメント番号
+            periods: 取引時期のリスト（省略時は全期間）
+        """
+        segment_column = self.columns['cube_segment']
+        period_column = self.columns['cube_period']
+        result = PriceStats()
+        for segment in segments:
+            low = bisect_left(segment_column, segment)
+            high = bisect_right(segment_column, segment, low)
+            for period in periods:
+                i = bisect_left(period_column, period, low, high)
+                if i < high and period_column[i] == period:
+                    result.merge(self.cell(i))
+        return result
@@ -0,0 +1,133 @@
+"""
+空間インデックスモジュール
+Vercel Python Functions用
+
+緯度経度を固定幅のグリッドセルに割り当て、(セルキー, 行番号) をセルキー順に並べた
+2本の配列として保存する。検索は対象地点のセルから外側へリング状にセルを広げ、
+各セルの行範囲を二分探索で引いて、近い順にK件を求める。
+全件走査をしないため、数百万件でも1クエリ数ミリ秒で返る。
+"""
+
+import heapq
+import math
+from array import array
+from bisect import bisect_left
+from typing import Callable, List, Optional, Sequence, Tuple
+
+# セルの大きさ（度）。緯度方向で約1.1km
+CELL_DEGREES = 0.01
+
+# 探索するリングの上限（CELL_DEGREES=0.01 で約50km四方）
+MAX_RINGS = 50
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def cell_of(latitude: float, longitude: float, cell_degrees: float = CELL_DEGREES) -> Tuple[int, int]:
+    """緯度経度 → (緯度方向セル番号, 経度方向セル番号)"""
+    return int((latitude + 90) // cell_degrees), int((longitude + 180) // cell_degrees)
+
+
+def cell_key(lat_index: int, lon_index: int) -> int:
+    """セル番号を1つの整数キーにまとめる"""
+    return (lat_index << 32) | lon_index
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """2点間の距離（km）。比較用途なので正距円筒近似で十分"""
+    x = (lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = lat2 - lat1
+    return math.hypot(x, y) * KM_PER_DEGREE
+
+
+def build_grid(latitudes: Sequence[float], longitudes: Sequence[float],
+               cell_degrees: float = CELL_DEGREES) -> Tuple[array, array]:
+    """
+    グリッドインデックスを構築
+
+    Args:
+        latitudes: 行ごとの緯度（不明はNaN）
+        longitudes: 行ごとの経度（不明はNaN）
+
+    Returns:
+        (セルキー配列, 行番号配列)。セルキー順にソート済み
+    """
+    entries = sorted(
+        (cell_key(*cell_of(lat, lon, cell_degrees)), i)
+        for i, (lat, lon) in enumerate(zip(latitudes, longitudes))
+        if not (math.isnan(lat) or math.isnan(lon))
+    )
+    return array('q', (key for key, _ in entries)), array('i', (row for _, row in entries))
+
+
+class GridIndex:
+    """グリッドインデックス（配列はmmapしたビューでもよい）"""
+
+    def __init__(self, cells: Sequence[int], rows: Sequence[int],
+                 latitudes: Sequence[float], longitudes: Sequence[float],
+                 cell_degrees: float = CELL_DEGREES):
+        self.cells = cells
+        self.rows = rows
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.cell_degrees = cell_degrees
+
+    def _cell_rows(self, lat_index: int, lon_index: int) -> Sequence[int]:
+        key = cell_key(lat_index, lon_index)
+        start = bisect_left(self.cells, key)
+        end = bisect_left(self.cells, key + 1, start)
+        return self.rows[start:end]
+
+    def nearest(self, latitude: float, longitude: float, k: int,
+                accept: Optional[Callable[[int], bool]] = None,
+                max_rings: int = MAX_RINGS) -> List[Tuple[float, int]]:
+        """
+        近い順にK件を返す
+
+        Args:
+            latitude: 対象地点の緯度
+            longitude: 対象地点の経度
+            k: 件数
+            accept: 行番号を受け取り、候補に含めるかを返すフィルタ
+            max_rings: 探索するリング数の上限
+
+        Returns:
+            [(距離km, 行番号), ...]（近い順）
+        """
+        center_lat, center_lon = cell_of(latitude, longitude, self.cell_degrees)
+        # 1セルの短辺（km）。経度方向は高緯度ほど短くなる
+        cell_km = self.cell_degrees * KM_PER_DEGREE * min(1.0, math.cos(math.radians(latitude)))
+        best: List[Tuple[float, int]] = []  # 距離の符号を反転した最大ヒープ
+
+        for ring in range(max_rings + 1):
+            # リング内の点は少なくとも (ring - 1) セル分離れているので、
+            # K件そろっていてそれより遠いなら打ち切れる
+            if len(best) >= k and (ring - 1) * cell_km > -best[0][0]:
+                break
+            for lat_index, lon_index in _ring_cells(center_lat, center_lon, ring):
+                for row in self._cell_rows(lat_index, lon_index):
+                    if accept is not None and not accept(row):
+                        continue
+                    d = distance_km(latitude, longitude, self.latitudes[row], self.longitudes[row])
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, row))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, row))
+
+        return sorted((-neg_d, row) for neg_d, row in best)
+
+
+def _ring_cells(center_lat: int, center_lon: int, ring: int) -> List[Tuple[int, int]]:
+    """中心セルからちょうど ring セル離れたセルの一覧"""
+    if ring == 0:
+        return [(center_lat, center_lon)]
+    cells = []
+    for d in range(-ring, ring + 1):
+        cells.append((center_lat - ring, center_lon + d))
+        cells.append((center_lat + ring, center_lon + d))
+    for d in range(-ring + 1, ring):
+        cells.append((center_lat + d, center_lon - ring))
+        cells.append((center_lat + d, center_lon + ring))
+    return cells
+
@@ -3,6 +3,7 @@
 Vercel Python Functions用
 """
 
+import math
 import re
 from typing import Dict, List, Optional, Any
 from datetime import datetime
@@ -35,6 +36,8 @@ FIELD_NAME_MAPPING = {
     'effective_tax_rate': '実効税率',
     'land_area': '土地面積',
     'road_price': '路線価',
+    'latitude': '緯度',
+    'longitude': '経度',
     'year_built': '築年',
     'expected_sale_price': '想定売却価格',
     'market_value': '市場価格',
@@ -82,6 +85,19 @@ def validate_number_range(
         return f"{field_name}は数値で入力してください"
 
 
+def validate_finite_number_range(
+    value: Any,
+    min_val: float,
+    max_val: float,
+    field_name: str
+) -> Optional[str]:
+    """数値の範囲チェック（NaN・無限大は範囲の比較をすり抜けるので別に弾く）"""
+    error = validate_number_range(value, min_val, max_val, field_name)
+    if error is None and not math.isfinite(float(value)):
+        return f"{field_name}は数値で入力してください"
+    return error
+
+
 def validate_string_length(
     value: Any,
     max_length: int,
@@ -145,18 +161,67 @@ def validate_image_base64(value: str) -> Optional[str]:
     return None
 
 
+# 市場分析の一括リクエストで受け付ける物件数の上限
+MARKET_ANALYSIS_BATCH_LIMIT = 5000
+
+# シミュレーター入力の文字列フィールド定義
+SIMULATOR_STRING_FIELDS = {
+    'property_name': {'max_length': 100, 'required': True},
+    'location': {'max_length': 200, 'required': True},
+    'property_url': {'max_length': 500, 'required': False},
+    'property_memo': {'max_length': 1000, 'required': False}
+}
+
+# シミュレーター入力の選択式フィールド定義
+SIMULATOR_CHOICE_FIELDS = {
+    'loan_type': ['元利均等', '元金均等'],
+    'property_type': ['木造', '軽量鉄骨造', '重量鉄骨造', 'RC造', 'SRC造'],
+    'ownership_type': ['個人', '法人']
+}
+
+
+def get_simulator_number_fields() -> Dict[str, Dict[str, Any]]:
+    """シミュレーター入力の数値フィールド定義（築年の上限は実行時の年から算出）"""
+    return {
+        # 必須フィールド
+        'purchase_price': {'min': 1, 'max': 100000, 'unit': '万円', 'required': True},
+        'monthly_rent': {'min': 0, 'max': 10000, 'unit': '万円', 'required': True},
+        'loan_amount': {'min': 0, 'max': 100000, 'unit': '万円', 'required': True},
+        'loan_years': {'min': 1, 'max': 50, 'unit': '年', 'required': True},
+        'interest_rate': {'min': 0, 'max': 20, 'unit': '%', 'required': True},
+        'holding_years': {'min': 1, 'max': 50, 'unit': '年', 'required': True},
+        'building_area': {'min': 1, 'max': 100000, 'unit': '㎡', 'required': True},
+        # 任意フィールド
+        'management_fee': {'min': 0, 'max': 10000000, 'unit': '円', 'required': False},
+        'fixed_cost': {'min': 0, 'max': 10000000, 'unit': '円', 'required': False},
+        'property_tax': {'min': 0, 'max': 50000000, 'unit': '円', 'required': False},
+        'other_costs': {'min': 0, 'max': 50000, 'unit': '万円', 'required': False},
+        'renovation_cost': {'min': 0, 'max': 50000, 'unit': '万円', 'required': False},
+        'down_payment_ratio': {'min': 0, 'max': 100, 'unit': '%', 'required': False},
+        'vacancy_rate': {'min': 0, 'max': 100, 'unit': '%', 'required': False},
+        'effective_tax_rate': {'min': 0, 'max': 100, 'unit': '%', 'required': False},
+        'land_area': {'min': 0, 'max': 100000, 'unit': '㎡', 'required': False},
+        'road_price': {'min': 0, 'max': 100000000, 'unit': '円/㎡', 'required': False},
+        'year_built': {'min': 1900, 'max': datetime.now().year + 10, 'unit': '年', 'required': False},
+        'expected_sale_price': {'min': 0, 'max': 100000, 'unit': '万円', 'required': False},
+        'market_value': {'min': 0, 'max': 100000, 'unit': '万円', 'required': False},
+        'exit_cap_rate': {'min': 0, 'max': 100, 'unit': '%', 'required': False},
+        'price_decline_rate': {'min': 0, 'max': 100, 'unit': '%', 'required': False},
+        'rent_decline': {'min': 0, 'max': 100, 'unit': '%/年', 'required': False},
+        'major_repair_cycle': {'min': 0, 'max': 50, 'unit': '年', 'required': False},
+        'major_repair_cost': {'min': 0, 'max': 50000, 'unit': '万円', 'required': False},
+        'building_price': {'min': 0, 'max': 100000, 'unit': '万円', 'required': False},
+        'depreciation_years': {'min': 1, 'max': 50, 'unit': '年', 'required': False}
+    }
+
+
 def validate_simulator_input(data: Dict[str, Any]) -> Dict[str, List[str]]:
     """シミュレーター入力値の検証"""
     errors = {}
 
 
     # 文字列フィールドの検証
-    string_fields = {
-        'property_name': {'max_length': 100, 'required': True},
-        'location': {'max_length': 200, 'required': True},
-        'property_url': {'max_length': 500, 'required': False},
-        'property_memo': {'max_length': 1000, 'required': False}
-    }
+    string_fields = SIMULATOR_STRING_FIELDS
 
     for field, rules in string_fields.items():
         value = data.get(field)
@@ -190,37 +255,7 @@ def validate_simulator_input(data: Dict[str, Any]) -> Dict[str, List[str]]:
                 errors[field].append(url_error)
 
     # 数値フィールドの検証
-    number_fields = {
-        # 必須フィールド
-        'purchase_price': {'min': 1, 'max': 100000, 'unit': '万円', 'required': True},
-        'monthly_rent': {'min': 0, 'max': 10000, 'unit': '万円', 'required': True},
-        'loan_amount': {'min': 0, 'max': 100000, 'unit': '万円', 'required': True},
-        'loan_years': {'min': 1, 'max': 50, 'unit': '年', 'required': True},
-        'interest_rate': {'min': 0, 'max': 20, 'unit': '%', 'required': True},
-        'holding_years': {'min': 1, 'max': 50, 'unit': '年', 'required': True},
-        'building_area': {'min': 1, 'max': 100000, 'unit': '㎡', 'required': True},
-        # 任意フィールド
-        'management_fee': {'min': 0, 'max': 10000000, 'unit': '円', 'required': False},
-        'fixed_cost': {'min': 0, 'max': 10000000, 'unit': '円', 'required': False},
-        'property_tax': {'min': 0, 'max': 50000000, 'unit': '円', 'required': False},
-        'other_costs': {'min': 0, 'max': 50000, 'unit': '万円', 'required': False},
-        'renovation_cost': {'min': 0, 'max': 50000, 'unit': '万円', 'required': False},
-        'down_payment_ratio': {'min': 0, 'max': 100, 'unit': '%', 'required': False},
-        'vacancy_rate': {'min': 0, 'max': 100, 'unit': '%', 'required': False},
-        'effective_tax_rate': {'min': 0, 'max': 100, 'unit': '%', 'required': False},
-        'land_area': {'min': 0, 'max': 100000, 'unit': '㎡', 'required': False},
-        'road_price': {'min': 0, 'max': 100000000, 'unit': '円/㎡', 'required': False},
-        'year_built': {'min': 1900, 'max': datetime.now().year + 10, 'unit': '年', 'required': False},
-        'expected_sale_price': {'min': 0, 'max': 100000, 'unit': '万円', 'required': False},
-        'market_value': {'min': 0, 'max': 100000, 'unit': '万円', 'required': False},
-        'exit_cap_rate': {'min': 0, 'max': 100, 'unit': '%', 'required': False},
-        'price_decline_rate': {'min': 0, 'max': 100, 'unit': '%', 'required': False},
-        'rent_decline': {'min': 0, 'max': 100, 'unit': '%/年', 'required': False},
-        'major_repair_cycle': {'min': 0, 'max': 50, 'unit': '年', 'required': False},
-        'major_repair_cost': {'min': 0, 'max': 50000, 'unit': '万円', 'required': False},
-        'building_price': {'min': 0, 'max': 100000, 'unit': '万円', 'required': False},
-        'depreciation_years': {'min': 1, 'max': 50, 'unit': '年', 'required': False}
-    }
+    number_fields = get_simulator_number_fields()
 
     for field, rules in number_fields.items():
         value = data.get(field)
@@ -250,19 +285,19 @@ def validate_simulator_input(data: Dict[str, Any]) -> Dict[str, List[str]]:
     # 選択式フィールドの検証
     # 借入形式
     if 'loan_type' in data and data['loan_type']:
-        allowed_loan_types = ['元利均等', '元金均等']
+        allowed_loan_types = SIMULATOR_CHOICE_FIELDS['loan_type']
         if data['loan_type'] not in allowed_loan_types:
             errors['loan_type'] = [f"{get_field_display_name('loan_type')}は{allowed_loan_types}のいずれかを選択してください"]
 
     # 建物構造
     if 'property_type' in data and data['property_type']:
-        allowed_property_types = ['木造', '軽量鉄骨造', '重量鉄骨造', 'RC造', 'SRC造']
+        allowed_property_types = SIMULATOR_CHOICE_FIELDS['property_type']
         if data['property_type'] not in allowed_property_types:
             errors['property_type'] = [f"{get_field_display_name('property_type')}は{allowed_property_types}のいずれかを選択してください"]
 
     # 所有形態
     if 'ownership_type' in data and data['ownership_type']:
-        allowed_ownership_types = ['個人', '法人']
+        allowed_ownership_types = SIMULATOR_CHOICE_FIELDS['ownership_type']
         if data['ownership_type'] not in allowed_ownership_types:
             errors['ownership_type'] = [f"{get_field_display_name('ownership_type')}は{allowed_ownership_types}のいずれかを選択してください"]
 
@@ -295,20 +330,51 @@ def validate_market_analysis_input(data: Dict[str, Any]) -> Dict[str, List[str]]
 
     # 数値フィールドの検証
     if 'land_area' in data and data['land_area'] is not None:
-        error = validate_number_range(data['land_area'], 0, 100000, get_field_display_name('land_area', '㎡'))
+        error = validate_finite_number_range(data['land_area'], 0, 100000, get_field_display_name('land_area', '㎡'))
         if error:
             errors['land_area'] = [error]
 
     if 'year_built' in data and data['year_built'] is not None:
-        error = validate_number_range(data['year_built'], 1900, datetime.now().year + 10, get_field_display_name('year_built', '年'))
+        error = validate_finite_number_range(data['year_built'], 1900, datetime.now().year + 10, get_field_display_name('year_built', '年'))
         if error:
             errors['year_built'] = [error]
 
     if 'purchase_price' in data and data['purchase_price'] is not None:
-        error = validate_number_range(data['purchase_price'], 1, 100000, get_field_display_name('purchase_price', '万円'))
+        error = validate_finite_number_range(data['purchase_price'], 1, 100000, get_field_display_name('purchase_price', '万円'))
         if error:
             errors['purchase_price'] = [error]
 
+    # 座標（任意、近傍事例の検索に使用）
+    for field, min_val, max_val in [('latitude', -90, 90), ('longitude', -180, 180)]:
+        if data.get(field) is not None and data.get(field) != "":
+            error = validate_finite_number_range(data[field], min_val, max_val, get_field_display_name(field))
+            if error:
+                errors[field] = [error]
+
+    # 建物構造（任意）
+    if data.get('property_type'):
+        allowed_property_types = SIMULATOR_CHOICE_FIELDS['property_type']
+        if data['property_type'] not in allowed_property_types:
+            errors['property_type'] = [f"{get_field_display_name('property_type')}は{allowed_property_types}のいずれかを選択してください"]
+
+    return errors
+
+
+def validate_market_analysis_batch_input(data: Dict[str, Any]) -> Dict[str, List[str]]:
+    """市場分析（一括）入力値の検証。エラーのキーは 'properties[0].land_area' 形式"""
+    properties = data.get('properties')
+    if not isinstance(properties, list) or not properties:
+        return {'properties': ["物件リストは1件以上の配列で指定してください"]}
+    if len(properties) > MARKET_ANALYSIS_BATCH_LIMIT:
+        return {'properties': [f"物件リストは{MARKET_ANALYSIS_BATCH_LIMIT}件以下で指定してください"]}
+
+    errors = {}
+    for i, item in enumerate(properties):
+        if not isinstance(item, dict):
+            errors[f'properties[{i}]'] = [f"{i + 1}件目の物件の形式が正しくありません"]
+            continue
+        for field, messages in validate_market_analysis_input(item).items():
+            errors[f'properties[{i}].{field}'] = [f"{i + 1}件目: {msg}" for msg in messages]
     return errors
 
 
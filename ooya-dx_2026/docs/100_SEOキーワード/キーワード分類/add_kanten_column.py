@@ -7,41 +7,25 @@
   判定=記事       → 権威構築
   それ以外/空     → （空欄）
 """
-import glob, os
+from collections import Counter
 
-TSV_DIR = os.path.dirname(os.path.abspath(__file__))
-files = sorted(glob.glob(os.path.join(TSV_DIR, '*_判定済み.tsv')))
+from keyword_table import KeywordTable, list_tsv_files
 
-total_files = 0
-total_rows = 0
-stats = {'ツール集客': 0, '権威構築': 0, '対象外': 0, '': 0}
+CATEGORIES = None  # 全カテゴリが対象
+ROW_LOCAL = True  # 各行の値だけで決まる（他の行を見ない）
 
-for fpath in files:
-    with open(fpath, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
 
-    if not lines:
-        continue
+def transform(table, log=None):
+    """観点列を追加・更新する。観点ごとの行数を返す"""
+    stats = Counter()
+    if not table.header:
+        return stats
 
-    new_lines = []
-    for i, line in enumerate(lines):
-        line = line.rstrip('\n')
-        cols = line.split('\t')
+    kanten_i = table.ensure_column('観点', after='想定ページタイトル')
+    hantei_i = table.column('判定')
 
-        if i == 0:
-            # Header row - add 観点 column
-            if '観点' not in cols:
-                cols.append('観点')
-            new_lines.append('\t'.join(cols))
-            continue
-
-        # Data row
-        if len(cols) < 11:
-            # Pad to 11 columns if needed
-            cols.extend([''] * (11 - len(cols)))
-
-        # Column 5 = 判定
-        hantei = cols[5].strip() if len(cols) > 5 else ''
+    for row in table.rows:
+        hantei = table.get(row, hantei_i).strip()
 
         # Auto-assign 観点
         if hantei == '計算ページ':
@@ -53,22 +37,35 @@ for fpath in files:
         else:
             kanten = ''
 
-        # Add or update column 11
-        if len(cols) <= 11:
-            cols.append(kanten)
-        else:
-            cols[11] = kanten
+        table.set(row, kanten_i, kanten)
+        stats[kanten] += 1
+
+    return stats
 
-        stats[kanten] = stats.get(kanten, 0) + 1
-        total_rows += 1
-        new_lines.append('\t'.join(cols))
 
-    with open(fpath, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(new_lines) + '\n')
+def summarize(stats):
+    lines = []
+    for k, v in sorted(stats.items(), key=lambda x: -x[1]):
+        label = k if k else '（空欄）'
+        lines.append(f'  {label}: {v}')
+    return lines
+
+
+def main():
+    total_files = 0
+    stats = Counter()
+    for fpath in list_tsv_files():
+        table = KeywordTable.load(fpath)
+        if not table.header:
+            continue
+        stats += transform(table)
+        table.save()
+        total_files += 1
+
+    print(f'Updated {total_files} files, {sum(stats.values())} rows')
+    for line in summarize(stats):
+        print(line)
 
-    total_files += 1
 
-print(f'Updated {total_files} files, {total_rows} rows')
-for k, v in sorted(stats.items(), key=lambda x: -x[1]):
-    label = k if k else '（空欄）'
-    print(f'  {label}: {v}')
+if __name__ == '__main__':
+    main()
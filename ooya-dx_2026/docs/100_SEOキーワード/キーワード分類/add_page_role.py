@@ -1,30 +1,38 @@
 #!/usr/bin/env python3
 """ページ役割列を追加: ピラーページ / 計算ツール / 解説記事"""
-import glob, os
+from collections import Counter
 
-TSV_DIR = os.path.dirname(os.path.abspath(__file__))
-files = sorted(glob.glob(os.path.join(TSV_DIR, '*_判定済み.tsv')))
+from keyword_table import KeywordTable, list_tsv_files
 
-total_files = 0
-stats = {}
+CATEGORIES = None  # 全カテゴリが対象
+ROW_LOCAL = False  # ページグループ単位で判定するので、ファイル全体を見る
 
-for fpath in files:
-    cat = os.path.basename(fpath).replace('_判定済み.tsv', '')
+# トピカル貢献より後ろの戦略列は使わなくなったので、ページ役割を付けるときに取り除く
+DROPPED_COLUMNS = ['ツール導線', '会員登録', '競合勝率']
 
-    with open(fpath, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    if not lines:
-        continue
+
+def transform(table, log=None):
+    """ページ役割列を追加・更新する。役割ごとの行数を返す"""
+    stats = Counter()
+    if not table.header:
+        return stats
+    cat = table.category
+
+    table.drop_columns(DROPPED_COLUMNS)
+    role_i = table.ensure_column('ページ役割', after='トピカル貢献')
+    pg_i = table.column('ページグループ')
+    hantei_i = table.column('判定')
+    topical_i = table.column('トピカル貢献')
+    vol_i = table.column('月間検索数')
 
     # Phase 1: ページグループごとの情報を集計
     pg_info = {}  # pg -> {topical, has_calc, has_kiso, vol}
-    for line in lines[1:]:
-        cols = line.strip().split('\t')
-        if len(cols) < 13: continue
-        pg = cols[9].strip()
-        hantei = cols[5].strip()
-        topical = cols[12].strip()
-        vol = int(cols[4]) if cols[4].strip().isdigit() else 0
+    for row in table.rows:
+        pg = table.get(row, pg_i).strip()
+        hantei = table.get(row, hantei_i).strip()
+        topical = table.get(row, topical_i).strip()
+        vol_str = table.get(row, vol_i)
+        vol = int(vol_str) if vol_str.strip().isdigit() else 0
         if not pg: continue
         if pg not in pg_info:
             pg_info[pg] = {'topical': topical, 'has_calc': False, 'has_kiso': False, 'vol': 0}
@@ -48,51 +56,56 @@ for fpath in files:
         else:
             pg_role[pg] = '解説記事'
 
-    # Phase 3: TSV更新
-    new_lines = []
-    for i, line in enumerate(lines):
-        line = line.rstrip('\n')
-        cols = line.split('\t')
-
-        if i == 0:
-            while len(cols) < 13:
-                cols.append('')
-            cols = cols[:13]
-            cols.append('ページ役割')
-            new_lines.append('\t'.join(cols))
-            continue
-
-        while len(cols) < 13:
-            cols.append('')
-        cols = cols[:13]
-
-        pg = cols[9].strip()
+    # Phase 3: ページ役割を書き込む
+    for row in table.rows:
+        pg = table.get(row, pg_i).strip()
         role = pg_role.get(pg, '')
-        cols.append(role)
-        new_lines.append('\t'.join(cols))
+        table.set(row, role_i, role)
 
         if role:
-            stats[role] = stats.get(role, 0) + 1
-
-    with open(fpath, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(new_lines) + '\n')
-    total_files += 1
+            stats[role] += 1
 
     # 表示
-    roles = {}
-    for pg, role in pg_role.items():
-        if role:
-            if role not in roles:
-                roles[role] = []
-            roles[role].append(pg)
-
-    if roles:
-        print(f'\n=== {cat} ===')
-        for role in ['ピラーページ', '計算ツール', '解説記事']:
-            if role in roles:
-                for pg in sorted(roles[role]):
-                    print(f'  [{role}] {pg}')
-
-print(f'\n合計: {total_files}ファイル')
-for k, v in sorted(stats.items()):
-    print(f'  {k}: {v:,}')
+    if log is not None:
+        roles = {}
+        for pg, role in pg_role.items():
+            if role:
+                if role not in roles:
+                    roles[role] = []
+                roles[role].append(pg)
+
+        if roles:
+            log.append(f'\n=== {cat} ===')
+            for role in ['ピラーページ', '計算ツール', '解説記事']:
+                if role in roles:
+                    for pg in sorted(roles[role]):
+                        log.append(f'  [{role}] {pg}')
+
+    return stats
+
+
+def summarize(stats):
+    return [f'  {k}: {v:,}' for k, v in sorted(stats.items())]
+
+
+def main():
+    total_files = 0
+    stats = Counter()
+    for fpath in list_tsv_files():
+        table = KeywordTable.load(fpath)
+        if not table.header:
+            continue
+        log = []
+        stats += transform(table, log)
+        table.save()
+        total_files += 1
+        for line in log:
+            print(line)
+
+    print(f'\n合計: {total_files}ファイル')
+    for line in summarize(stats):
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
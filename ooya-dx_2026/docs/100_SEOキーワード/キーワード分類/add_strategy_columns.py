@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 """全TSVに戦略4列を追加: トピカル貢献, ツール導線, 会員登録, 競合勝率"""
-import glob, os, re
+import re
+from collections import Counter
 
-TSV_DIR = os.path.dirname(os.path.abspath(__file__))
-files = sorted(glob.glob(os.path.join(TSV_DIR, '*_判定済み.tsv')))
+from keyword_rules import RuleSet, any_of
+from keyword_table import KeywordTable, list_tsv_files
+
+CATEGORIES = None  # 全カテゴリが対象
+ROW_LOCAL = True  # 各行の値だけで決まる（他の行を見ない）
 
 # カテゴリのCV距離分類
 A_CATS = {'IRR','NOI','NPV','DSCR','DCF法','キャッシュフロー','表面利回り','実質利回り',
@@ -16,42 +20,42 @@ B_CATS = {'減価償却','仲介手数料','法人税','売却','不動産売却
 # トピカル貢献: 必須/補足/不要
 TOPICAL_ESSENTIAL = re.compile(r'基礎|解説|相場|法律|上限|規制|制度|概要|定義|仕組み|売買|不動産')
 
-total_files = 0
-stats = {col: {} for col in ['トピカル貢献','ツール導線','会員登録','競合勝率']}
-
-for fpath in files:
-    cat_name = os.path.basename(fpath).replace('_判定済み.tsv', '')
-
-    with open(fpath, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    if not lines:
-        continue
-
-    new_lines = []
-    for i, line in enumerate(lines):
-        line = line.rstrip('\n')
-        cols = line.split('\t')
-
-        if i == 0:
-            # Header - pad to 12 if needed, then add 4 new columns
-            while len(cols) < 12:
-                cols.append('')
-            # Remove old extra columns if re-running
-            cols = cols[:12]
-            cols.extend(['トピカル貢献', 'ツール導線', '会員登録', '競合勝率'])
-            new_lines.append('\t'.join(cols))
-            continue
-
-        # Pad to 12 columns
-        while len(cols) < 12:
-            cols.append('')
-        cols = cols[:12]  # trim if re-running
-
-        hantei = cols[5].strip()
-        intent = cols[6].strip()
-        topic = cols[8].strip()
-        kd_str = cols[3].strip()
-        vol = int(cols[4]) if cols[4].strip().isdigit() else 0
+# ツール導線: 記事のトピック → 自然/弱い（どちらにも当たらなければ やや）
+FLOW_TOPIC_RULES = RuleSet([
+    (any_of(['基礎', '解説', '相場', '金額', '売買']), '自然'),
+    (any_of(['賃貸', '値引き', '無料', '比較']), '弱い'),
+])
+
+STRATEGY_COLUMNS = ['トピカル貢献','ツール導線','会員登録','競合勝率']
+
+
+def transform(table, log=None):
+    """戦略4列を追加・更新する。(列名, 値) ごとの行数を返す"""
+    stats = Counter()
+    if not table.header:
+        return stats
+    cat_name = table.category
+
+    # 観点の後ろに4列を並べる（既にある列はその位置のまま上書き）
+    after = '観点'
+    for col_name in STRATEGY_COLUMNS:
+        table.ensure_column(col_name, after=after)
+        after = col_name
+    col_i = {col_name: table.column(col_name) for col_name in STRATEGY_COLUMNS}
+
+    hantei_i = table.column('判定')
+    intent_i = table.column('検索意図')
+    topic_i = table.column('トピック')
+    kd_i = table.column('SEO難易度')
+    vol_i = table.column('月間検索数')
+
+    for row in table.rows:
+        hantei = table.get(row, hantei_i).strip()
+        intent = table.get(row, intent_i).strip()
+        topic = table.get(row, topic_i).strip()
+        kd_str = table.get(row, kd_i).strip()
+        vol_str = table.get(row, vol_i)
+        vol = int(vol_str) if vol_str.strip().isdigit() else 0
 
         # --- トピカル貢献 ---
         if hantei == '計算ページ':
@@ -74,12 +78,8 @@ for fpath in files:
         elif hantei == '記事':
             if 'Do' in intent:
                 flow = '自然'
-            elif any(k in topic for k in ['基礎', '解説', '相場', '金額', '売買']):
-                flow = '自然'
-            elif any(k in topic for k in ['賃貸', '値引き', '無料', '比較']):
-                flow = '弱い'
             else:
-                flow = 'やや'
+                flow = FLOW_TOPIC_RULES.first(topic, 'やや')
         else:
             flow = ''
 
@@ -118,18 +118,38 @@ for fpath in files:
             else:
                 compete = ''
 
-        cols.extend([topical, flow, cv, compete])
-        new_lines.append('\t'.join(cols))
-
         for col_name, val in [('トピカル貢献',topical),('ツール導線',flow),('会員登録',cv),('競合勝率',compete)]:
-            stats[col_name][val] = stats[col_name].get(val, 0) + 1
+            table.set(row, col_i[col_name], val)
+            stats[(col_name, val)] += 1
+
+    return stats
+
+
+def summarize(stats):
+    lines = []
+    for col_name in STRATEGY_COLUMNS:
+        lines.append(f'\n{col_name}:')
+        counts = [(val, n) for (name, val), n in stats.items() if name == col_name]
+        for k, v in sorted(counts, key=lambda x: -x[1]):
+            lines.append(f'  {k or "（空）"}: {v}')
+    return lines
+
+
+def main():
+    total_files = 0
+    stats = Counter()
+    for fpath in list_tsv_files():
+        table = KeywordTable.load(fpath)
+        if not table.header:
+            continue
+        stats += transform(table)
+        table.save()
+        total_files += 1
+
+    print(f'Updated {total_files} files')
+    for line in summarize(stats):
+        print(line)
 
-    with open(fpath, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(new_lines) + '\n')
-    total_files += 1
 
-print(f'Updated {total_files} files')
-for col_name in ['トピカル貢献','ツール導線','会員登録','競合勝率']:
-    print(f'\n{col_name}:')
-    for k, v in sorted(stats[col_name].items(), key=lambda x: -x[1]):
-        print(f'  {k or "（空）"}: {v}')
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,13 @@
 #!/usr/bin/env python3
 """テーマ・記事の方向性を全TSVに追加するスクリプト"""
-import glob, os, re
+import os
+from collections import Counter
+
+from keyword_rules import RuleSet
+from keyword_table import KeywordTable, list_tsv_files
+
+CATEGORIES = None  # 全カテゴリが対象
+ROW_LOCAL = False  # 列の追加はファイル単位
 
 # ページグループ → テーマ のマッピングルール
 # カテゴリ名プレフィックスを除去して、人が読みやすいテーマ名に変換
@@ -47,6 +54,7 @@ THEME_PATTERNS = [
     (r'固定資産|評価額', '固定資産'),
     (r'リフォーム|修繕', 'リフォーム'),
 ]
+THEME_RULES = RuleSet(THEME_PATTERNS)
 
 # 検索意図 → 記事の方向性 のマッピングルール
 DIRECTION_PATTERNS = [
@@ -62,6 +70,7 @@ DIRECTION_PATTERNS = [
     (r'知りたい|理解したい|確認したい|学びたい', '解説'),
     (r'調べたい', '解説'),
 ]
+DIRECTION_RULES = RuleSet(DIRECTION_PATTERNS)
 
 # ページ役割ベースのフォールバック
 ROLE_DIRECTION = {
@@ -79,9 +88,11 @@ def get_theme(page_group, category):
     # カテゴリ名プレフィックスを除去してマッチング
     clean = page_group.replace(category, '').strip('_').strip()
 
-    for pattern, theme in THEME_PATTERNS:
-        if re.search(pattern, page_group) or (clean and re.search(pattern, clean)):
-            return theme
+    # ページグループ・クリーン名のどちらかに最初にマッチしたパターン
+    matched = [i for i in (THEME_RULES.find(page_group), THEME_RULES.find(clean) if clean else None)
+               if i is not None]
+    if matched:
+        return THEME_RULES.values[min(matched)]
 
     # フォールバック: クリーン名をそのまま使う
     if clean:
@@ -93,9 +104,9 @@ def get_direction(intent, page_role, theme):
     """検索意図・ページ役割・テーマから記事の方向性を導出"""
     # 検索意図からパターンマッチ
     if intent:
-        for pattern, direction in DIRECTION_PATTERNS:
-            if re.search(pattern, intent):
-                return direction
+        direction = DIRECTION_RULES.first(intent)
+        if direction:
+            return direction
 
     # ページ役割からフォールバック
     if page_role and page_role in ROLE_DIRECTION:
@@ -120,81 +131,81 @@ def get_direction(intent, page_role, theme):
     return '解説'
 
 
-def process_file(filepath):
-    """TSVファイルにテーマ・記事の方向性列を追加"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    if not lines:
-        return 0
-
-    # ヘッダー解析
-    header = lines[0].strip().split('\t')
+def transform(table, log=None):
+    """テーマ・記事の方向性列を追加する（テーマ列が既にあれば何もしない）"""
+    stats = Counter()
+    if not table.header:
+        return stats
+    filename = os.path.basename(table.path) if table.path else table.category
 
     # 既にテーマ列がある場合はスキップ
-    if 'テーマ' in header:
-        print(f'  スキップ（テーマ列あり）: {os.path.basename(filepath)}')
-        return 0
-
-    # 検索意図列のインデックスを取得
-    try:
-        intent_idx = header.index('検索意図')
-    except ValueError:
-        print(f'  スキップ（検索意図列なし）: {os.path.basename(filepath)}')
-        return 0
-
+    if table.has('テーマ'):
+        if log is not None:
+            log.append(f'  スキップ（テーマ列あり）: {filename}')
+        return stats
+
+    # 検索意図列が無い場合はスキップ
+    if not table.has('検索意図'):
+        if log is not None:
+            log.append(f'  スキップ（検索意図列なし）: {filename}')
+        return stats
+
+    # 検索意図の後にテーマ・記事の方向性を挿入
+    insert_pos = table.column('検索意図') + 1
+    table.insert_column(insert_pos, '記事の方向性')
+    table.insert_column(insert_pos, 'テーマ')
+
+    intent_i = table.column('検索意図')
+    theme_i = table.column('テーマ')
+    direction_i = table.column('記事の方向性')
     # ページグループ・ページ役割列のインデックス
-    pg_idx = header.index('ページグループ') if 'ページグループ' in header else -1
-    role_idx = header.index('ページ役割') if 'ページ役割' in header else -1
+    pg_i = table.index.get('ページグループ', -1)
+    role_i = table.index.get('ページ役割', -1)
 
     # カテゴリ名（ファイル名から）
-    category = os.path.basename(filepath).replace('_判定済み.tsv', '')
-
-    # 新しいヘッダー: 検索意図の後にテーマ・記事の方向性を挿入
-    insert_pos = intent_idx + 1
-    new_header = header[:insert_pos] + ['テーマ', '記事の方向性'] + header[insert_pos:]
+    category = table.category
 
-    new_lines = ['\t'.join(new_header) + '\n']
-    count = 0
-
-    for line in lines[1:]:
-        cols = line.strip().split('\t')
-        if len(cols) < 6:
-            new_lines.append(line)
+    for row in table.rows:
+        if len(row) < 8:
             continue
 
         # 既存データ取得
-        intent = cols[intent_idx] if intent_idx < len(cols) else ''
-        page_group = cols[pg_idx] if pg_idx >= 0 and pg_idx < len(cols) else ''
-        page_role = cols[role_idx] if role_idx >= 0 and role_idx < len(cols) else ''
+        intent = table.get(row, intent_i)
+        page_group = table.get(row, pg_i)
+        page_role = table.get(row, role_i)
 
         # テーマ・記事の方向性を算出
         theme = get_theme(page_group, category)
         direction = get_direction(intent, page_role, theme)
 
-        # 挿入
-        new_cols = cols[:insert_pos] + [theme, direction] + cols[insert_pos:]
-        new_lines.append('\t'.join(new_cols) + '\n')
-        count += 1
+        row[theme_i] = theme
+        row[direction_i] = direction
+        stats['rows'] += 1
+
+    if log is not None and stats['rows'] > 0:
+        log.append(f'  完了: {filename} ({stats["rows"]}行)')
+    return stats
 
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.writelines(new_lines)
 
-    return count
+def summarize(stats):
+    return [f'  {stats["rows"]}行にテーマ・記事の方向性を追加']
 
 
 def main():
-    tsv_dir = os.path.dirname(os.path.abspath(__file__))
-    files = sorted(glob.glob(os.path.join(tsv_dir, '*_判定済み.tsv')))
+    files = list_tsv_files()
 
     print(f'対象ファイル数: {len(files)}')
     total = 0
 
     for filepath in files:
-        count = process_file(filepath)
+        table = KeywordTable.load(filepath)
+        log = []
+        count = transform(table, log)['rows']
         if count > 0:
-            print(f'  完了: {os.path.basename(filepath)} ({count}行)')
+            table.save()
             total += count
+        for line in log:
+            print(line)
 
     print(f'\n合計: {total}行にテーマ・記事の方向性を追加')
 
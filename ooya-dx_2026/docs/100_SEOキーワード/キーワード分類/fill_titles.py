@@ -4,9 +4,16 @@
 サイト設計.md の11ページ構成に基づき、ページグループ・キーワード内容から
 適切な想定ページタイトルを設定する。
 """
+import os
 import re
+from collections import Counter
 
-FILEPATH = '/Users/tetzlow/real-estate-app/ooya-dx_2026/docs/100_SEOキーワード/キーワード分類/仲介手数料_判定済み.tsv'
+from keyword_rules import RuleSet
+from keyword_table import TSV_DIR, KeywordTable
+
+FILEPATH = os.path.join(TSV_DIR, '仲介手数料_判定済み.tsv')
+CATEGORIES = {'仲介手数料'}
+ROW_LOCAL = True  # 各行の値だけで決まる（他の行を見ない）
 
 # サイト設計.md の11ページ → 想定ページタイトル
 TITLES = {
@@ -46,6 +53,20 @@ PG_MAP = {
 NEGO_RE = re.compile(r'交渉|値引き|値切|安くする|半額|言い方|タイミング|仕方')
 FREE_RE = re.compile(r'無料|からくり|なぜ|デメリット|安い|なし')
 
+# キーワード内容 → ページキー（ページグループで決まらないときのフォールバック。上から順に判定）
+KEYWORD_RULES = RuleSet([
+    (r'賃貸', 'rental'),
+    (r'計算|シミュレーション', 'calc'),
+    (r'無料|安い|なし', 'free'),
+    (r'交渉|値引|値切|半額', 'nego'),
+    (r'相場|いくら|平均', 'market'),
+    (r'上限|法律|宅建|違法|法改正|改正|改定', 'legal'),
+    (r'勘定科目|仕訳|経費|科目', 'acct'),
+    (r'消費税|税金|税込|課税', 'tax'),
+    (r'万円|パーセント|高い|高すぎ', 'price'),
+    (r'不動産|売買|マンション|土地|戸建|建売', 'realestate'),
+])
+
 
 def classify_nebiki(kw):
     """値引きグループのキーワードを無料 or 交渉に振り分け"""
@@ -68,76 +89,48 @@ def get_title_for_row(kw, pg):
         key = PG_MAP[pg]
         return TITLES[key]
 
-    # キーワード内容からフォールバック
-    if re.search(r'賃貸', kw):
-        return TITLES['rental']
-    if re.search(r'計算|シミュレーション', kw):
-        return TITLES['calc']
-    if re.search(r'無料|安い|なし', kw):
-        return TITLES['free']
-    if re.search(r'交渉|値引|値切|半額', kw):
-        return TITLES['nego']
-    if re.search(r'相場|いくら|平均', kw):
-        return TITLES['market']
-    if re.search(r'上限|法律|宅建|違法|法改正|改正|改定', kw):
-        return TITLES['legal']
-    if re.search(r'勘定科目|仕訳|経費|科目', kw):
-        return TITLES['acct']
-    if re.search(r'消費税|税金|税込|課税', kw):
-        return TITLES['tax']
-    if re.search(r'万円|パーセント|高い|高すぎ', kw):
-        return TITLES['price']
-    if re.search(r'不動産|売買|マンション|土地|戸建|建売', kw):
-        return TITLES['realestate']
-
-    # 最終フォールバック: ピラーページ
-    return TITLES['pillar']
-
-
-def main():
-    with open(FILEPATH, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    header = lines[0].strip().split('\t')
-    idx = {name: i for i, name in enumerate(header)}
+    # キーワード内容からフォールバック（どれにも当たらなければピラーページ）
+    return TITLES[KEYWORD_RULES.first(kw, 'pillar')]
 
-    kw_i = idx['キーワード']
-    title_i = idx['想定ページタイトル']
-    hantei_i = idx['判定']
-    pg_i = idx['ページグループ']
 
-    count = 0
-    by_title = {}
-    new_lines = [lines[0]]
+def transform(table, log=None):
+    """削除でない・タイトルが空の行に想定ページタイトルを割り当てる。タイトルごとの件数を返す"""
+    by_title = Counter()
+    kw_i = table.column('キーワード')
+    title_i = table.column('想定ページタイトル')
+    hantei_i = table.column('判定')
+    pg_i = table.column('ページグループ')
 
-    for line in lines[1:]:
-        cols = line.strip().split('\t')
-        # 列数が足りない場合はパディング
-        while len(cols) <= title_i:
-            cols.append('')
-
-        hantei = cols[hantei_i]
-        current_title = cols[title_i]
-        kw = cols[kw_i]
-        pg = cols[pg_i] if pg_i < len(cols) else ''
+    for row in table.rows:
+        hantei = table.get(row, hantei_i)
+        current_title = table.get(row, title_i)
+        kw = table.get(row, kw_i)
+        pg = table.get(row, pg_i)
 
         # 削除でない & タイトルが空の場合のみ処理
         if hantei != '削除' and not current_title.strip():
             title = get_title_for_row(kw, pg)
             if title:
-                cols[title_i] = title
-                count += 1
-                by_title[title] = by_title.get(title, 0) + 1
+                table.set(row, title_i, title)
+                by_title[title] += 1
+
+    return by_title
+
 
-        new_lines.append('\t'.join(cols) + '\n')
+def summarize(stats):
+    lines = [f'想定ページタイトルを {sum(stats.values())}件 に割り当て完了\n', '割り当て内訳:']
+    for title, cnt in sorted(stats.items(), key=lambda x: -x[1]):
+        lines.append(f'  {cnt:3d}件  {title}')
+    return lines
 
-    with open(FILEPATH, 'w', encoding='utf-8') as f:
-        f.writelines(new_lines)
 
-    print(f'想定ページタイトルを {count}件 に割り当て完了\n')
-    print('割り当て内訳:')
-    for title, cnt in sorted(by_title.items(), key=lambda x: -x[1]):
-        print(f'  {cnt:3d}件  {title}')
+def main():
+    table = KeywordTable.load(FILEPATH)
+    stats = transform(table)
+    table.save()
+
+    for line in summarize(stats):
+        print(line)
 
 
 if __name__ == '__main__':
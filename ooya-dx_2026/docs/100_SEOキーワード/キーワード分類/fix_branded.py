@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 """企業名入りキーワードを削除対象に変更"""
+import os
 import re
+from collections import Counter
 
-FILEPATH = '/Users/tetzlow/real-estate-app/ooya-dx_2026/docs/100_SEOキーワード/キーワード分類/仲介手数料_判定済み.tsv'
+from keyword_table import TSV_DIR, KeywordTable
+
+FILEPATH = os.path.join(TSV_DIR, '仲介手数料_判定済み.tsv')
+CATEGORIES = {'仲介手数料'}
+ROW_LOCAL = True  # 各行の値だけで決まる（他の行を見ない）
 
 BRAND_PATTERNS = [
     'ピタットハウス', 'lakia', 'アパマン', 'エイブル', 'ミニミニ',
@@ -14,30 +20,43 @@ BRAND_PATTERNS = [
 
 brand_re = re.compile('|'.join(BRAND_PATTERNS), re.IGNORECASE)
 
-with open(FILEPATH, 'r', encoding='utf-8') as f:
-    lines = f.readlines()
 
-header = lines[0].strip().split('\t')
-# 列インデックス取得
-idx = {name: i for i, name in enumerate(header)}
+def transform(table, log=None):
+    """企業名入りキーワードを削除対象にする。変更件数を返す"""
+    stats = Counter()
+    kw_i = table.column('キーワード')
+    hantei_i = table.column('判定')
+    theme_i = table.column('テーマ')
+    topical_i = table.column('トピカル貢献')
+    vol_i = table.column('月間検索数')
+
+    for row in table.rows:
+        kw = table.get(row, kw_i)
+
+        if brand_re.search(kw):
+            table.set(row, hantei_i, '削除')
+            table.set(row, theme_i, '特定企業')
+            table.set(row, topical_i, '不要')
+            stats['削除'] += 1
+            if log is not None:
+                log.append(f'  削除: {kw} (vol: {table.get(row, vol_i)})')
+
+    return stats
+
 
-count = 0
-new_lines = [lines[0]]
+def summarize(stats):
+    return [f'\n合計: {stats["削除"]}件を削除に変更']
 
-for line in lines[1:]:
-    cols = line.strip().split('\t')
-    kw = cols[idx['キーワード']] if 'キーワード' in idx else ''
 
-    if brand_re.search(kw):
-        cols[idx['判定']] = '削除'
-        cols[idx['テーマ']] = '特定企業'
-        cols[idx['トピカル貢献']] = '不要'
-        count += 1
-        print(f'  削除: {kw} (vol: {cols[idx["月間検索数"]]})')
+def main():
+    table = KeywordTable.load(FILEPATH)
+    log = []
+    stats = transform(table, log)
+    table.save()
 
-    new_lines.append('\t'.join(cols) + '\n')
+    for line in log + summarize(stats):
+        print(line)
 
-with open(FILEPATH, 'w', encoding='utf-8') as f:
-    f.writelines(new_lines)
 
-print(f'\n合計: {count}件を削除に変更')
+if __name__ == '__main__':
+    main()
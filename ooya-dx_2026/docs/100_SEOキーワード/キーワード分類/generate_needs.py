@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
 """検索キーワードごとに「解決ニーズ」（ユーザーが具体的に解決したい内容）を自動生成する"""
+import os
 import re
+from collections import Counter
 
-FILEPATH = '/Users/tetzlow/real-estate-app/ooya-dx_2026/docs/100_SEOキーワード/キーワード分類/仲介手数料_判定済み.tsv'
+from keyword_rules import RuleSet
+from keyword_table import TSV_DIR, KeywordTable
+
+FILEPATH = os.path.join(TSV_DIR, '仲介手数料_判定済み.tsv')
+CATEGORIES = {'仲介手数料'}
+ROW_LOCAL = True  # 各行の値だけで決まる（他の行を見ない）
 COL_NAME = '解決ニーズ'
 
 # --- パターン定義 ---
@@ -293,6 +300,7 @@ PATTERNS = [
     (r'ガイドライン', '仲介手数料に関するガイドラインを確認したい'),
     (r'報酬額', '仲介手数料の報酬額の算出方法を知りたい'),
 ]
+NEED_RULES = RuleSet(PATTERNS)
 
 
 def generate_need(kw, page_group, intent, article_title):
@@ -306,14 +314,14 @@ def generate_need(kw, page_group, intent, article_title):
     if not base:
         return '仲介手数料の全体像（仕組み・計算方法・相場・上限）を把握したい'
 
-    # パターンマッチ
-    for pattern, need in PATTERNS:
-        m = re.search(pattern, kw)
-        if m:
-            if need is None:
-                # 動的生成
-                return generate_dynamic(kw, m, page_group)
-            return need
+    # パターンマッチ（最初にマッチしたものを採用）
+    hit = NEED_RULES.search(kw)
+    if hit:
+        need, m = hit
+        if need is None:
+            # 動的生成
+            return generate_dynamic(kw, m, page_group)
+        return need
 
     # ページグループベースのフォールバック
     return generate_from_group(kw, page_group, intent, article_title)
@@ -401,68 +409,54 @@ def generate_from_group(kw, page_group, intent, article_title):
     return '仲介手数料について知りたい'
 
 
-def main():
-    with open(FILEPATH, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    header = lines[0].strip().split('\t')
-
-    # 既に列がある場合は上書き、なければ追加
-    if COL_NAME in header:
-        col_idx = header.index(COL_NAME)
-        insert_new = False
-    else:
-        # 検索意図の次の位置に挿入
-        intent_idx = header.index('検索意図')
-        col_idx = intent_idx + 1
-        header.insert(col_idx, COL_NAME)
-        insert_new = True
-
-    idx = {name: i for i, name in enumerate(lines[0].strip().split('\t'))}
-    kw_i = idx['キーワード']
-    hantei_i = idx['判定']
-    pg_i = idx.get('ページグループ', -1)
-    intent_i = idx.get('検索意図', -1)
-    title_i = idx.get('想定ページタイトル', -1)
-
-    new_lines = ['\t'.join(header) + '\n']
-    filled = 0
-    total = 0
-
-    for line in lines[1:]:
-        cols = line.strip().split('\t')
-
-        kw = cols[kw_i] if kw_i < len(cols) else ''
-        hantei = cols[hantei_i] if hantei_i < len(cols) else ''
-        pg = cols[pg_i] if pg_i >= 0 and pg_i < len(cols) else ''
-        intent = cols[intent_i] if intent_i >= 0 and intent_i < len(cols) else ''
-        title = cols[title_i] if title_i >= 0 and title_i < len(cols) else ''
-
-        total += 1
+def transform(table, log=None):
+    """解決ニーズ列を追加・更新する（列が無ければ検索意図の次に挿入）"""
+    stats = Counter()
+    col_idx = table.ensure_column(COL_NAME, after='検索意図')
+
+    kw_i = table.column('キーワード')
+    hantei_i = table.column('判定')
+    pg_i = table.index.get('ページグループ', -1)
+    intent_i = table.index.get('検索意図', -1)
+    title_i = table.index.get('想定ページタイトル', -1)
+
+    for row in table.rows:
+        kw = table.get(row, kw_i)
+        hantei = table.get(row, hantei_i)
+        pg = table.get(row, pg_i)
+        intent = table.get(row, intent_i)
+        title = table.get(row, title_i)
+
+        stats['total'] += 1
 
         if hantei == '削除':
             need = ''
         else:
             need = generate_need(kw, pg, intent, title)
             if need:
-                filled += 1
+                stats['filled'] += 1
+
+        table.set(row, col_idx, need)
+
+    return stats
 
-        if insert_new:
-            cols.insert(col_idx, need)
-        else:
-            while len(cols) <= col_idx:
-                cols.append('')
-            cols[col_idx] = need
 
-        new_lines.append('\t'.join(cols) + '\n')
+def summarize(stats):
+    return [
+        f'=== 解決ニーズ生成完了 ===',
+        f'  対象行数: {stats["total"]}',
+        f'  生成数: {stats["filled"]}',
+        f'  空欄（削除等）: {stats["total"] - stats["filled"]}',
+    ]
 
-    with open(FILEPATH, 'w', encoding='utf-8') as f:
-        f.writelines(new_lines)
 
-    print(f'=== 解決ニーズ生成完了 ===')
-    print(f'  対象行数: {total}')
-    print(f'  生成数: {filled}')
-    print(f'  空欄（削除等）: {total - filled}')
+def main():
+    table = KeywordTable.load(FILEPATH)
+    stats = transform(table)
+    table.save()
+
+    for line in summarize(stats):
+        print(line)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""全TSVのキーワードを表記ゆれ・語順違いでまとめ、「クラスタ」列を付けるスクリプト
+
+ファイルをまたいで同じキーワードの変種（空白の有無・全角半角・カタカナ/ひらがな・語順・
+修飾語の有無）が多いので、クラスタ単位でページグループを決められるようにする。
+
+1. キーワードを正規化し（NFKC・小文字・カタカナ→ひらがな・空白を1つに）、語を並べ替えて
+   空白を除いた文字列（keyword_key）にする。空白の位置・語順が違うだけのキーワードは
+   ここで同じキーになり、MinHash の前に1つにまとまる（検索数は大きい方を使う）
+2. キーの文字2-gramの集合を作り、MinHash の署名を計算する
+3. 署名を帯（BANDS 個）に分けた LSH で、似ている可能性のある組だけを候補にする
+   （全組を比べないので、キーワード数に対してほぼ線形の時間で済む）
+4. 検索数の多い順に代表を決め、代表との類似度が THRESHOLD 以上の候補をまとめる
+   （代表との類似度で判定するので、似たもの同士が鎖状につながって膨らむことはない）
+
+類似度は、2-gramを出現するキーワード数の少なさ（IDF）で重み付けした Jaccard 係数。
+多くのキーワードに共通する語（例: リフォームローン）の2-gramは軽く、修飾語の2-gramは重いので、
+「リフォームローン 業者」と「リフォームローン 金利」のような別の検索意図はまとまらない。
+
+クラスタ列には代表キーワード（クラスタ内で検索数が最も多いキーワード）を入れる。
+似たキーワードがないものは自分自身が代表になる。
+
+使用例:
+    python keyword_cluster.py                  # 全ファイルにクラスタ列を付ける
+    python keyword_cluster.py --dry-run        # 集計だけ表示する
+    python keyword_cluster.py --threshold 0.8  # まとめる基準を厳しくする
+
+    clusters = cluster_keywords({keyword_key('仲介手数料 相場'): 17240, keyword_key('仲介手数料 相場 賃貸'): 260})
+"""
+import argparse
+import math
+import random
+import re
+import unicodedata
+import zlib
+from collections import Counter, defaultdict
+
+from keyword_table import KeywordTable, list_tsv_files
+
+COLUMN = 'クラスタ'
+
+NGRAM = 2
+NUM_PERM = 64
+BANDS = 16  # 1帯あたり NUM_PERM // BANDS 行（Jaccard 0.5 前後から候補になる）
+THRESHOLD = 0.7
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20260101)  # 署名を実行ごとに変えない
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_KATAKANA = {c: c - 0x60 for c in range(ord('ァ'), ord('ヶ') + 1)}
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_keyword(keyword):
+    """表記ゆれを吸収したキーワード（NFKC・小文字・カタカナ→ひらがな・空白を1つに）"""
+    text = unicodedata.normalize('NFKC', keyword).lower().translate(_KATAKANA)
+    return _SPACES.sub(' ', text).strip()
+
+
+def keyword_key(keyword):
+    """正規化した語を並べ替えて空白を除いた文字列（空白の位置・語順だけが違うキーワードは同じになる）"""
+    return ''.join(sorted(normalize_keyword(keyword).split(' ')))
+
+
+def shingles(key):
+    """keyword_key() の文字 n-gram の集合"""
+    if len(key) <= NGRAM:
+        return {key} if key else set()
+    return {key[i:i + NGRAM] for i in range(len(key) - NGRAM + 1)}
+
+
+def minhash(grams):
+    """MinHash の署名（NUM_PERM 個のハッシュの最小値）"""
+    columns = [
+        [(a * h + b) % _PRIME for a, b in _PERMS]
+        for h in (zlib.crc32(g.encode('utf-8')) for g in grams)
+    ]
+    return list(map(min, *columns)) if len(columns) > 1 else columns[0]
+
+
+def gram_weights(gram_sets):
+    """n-gram → 重み（log(キーワード数 / その n-gram を含むキーワード数)）"""
+    df = Counter()
+    for grams in gram_sets:
+        df.update(grams)
+    n = max(len(gram_sets), 1)
+    return {g: math.log(n / c) + 1.0 for g, c in df.items()}
+
+
+def weighted_jaccard(a, b, weights):
+    """重み付きの Jaccard 係数（共通する n-gram の重み / 合わせた n-gram の重み）"""
+    union = sum(weights[g] for g in a | b)
+    return sum(weights[g] for g in a & b) / union if union else 1.0
+
+
+def cluster_keywords(volumes, threshold=THRESHOLD):
+    """
+    キーワードをクラスタにまとめる
+
+    Args:
+        volumes: {keyword_key(): 検索数}
+        threshold: 代表との類似度（重み付き Jaccard 係数）がこれ以上ならまとめる
+
+    Returns:
+        {keyword_key(): 代表の keyword_key()}
+    """
+    keys = sorted((k for k in volumes if k), key=lambda k: (-volumes[k], k))
+    grams = {k: shingles(k) for k in keys}
+    weights = gram_weights(list(grams.values()))
+
+    rows = NUM_PERM // BANDS
+    buckets = defaultdict(list)  # (帯の番号, 帯の値) → キーワード
+    bands = {}
+    for k in keys:
+        sig = minhash(grams[k])
+        bands[k] = [(b, tuple(sig[b * rows:(b + 1) * rows])) for b in range(BANDS)]
+        for band in bands[k]:
+            buckets[band].append(k)
+
+    leader_of = {}
+    for k in keys:
+        if k in leader_of:
+            continue
+        leader_of[k] = k
+        seen = {k}
+        for band in bands[k]:
+            for other in buckets[band]:
+                if other in seen or other in leader_of:
+                    continue
+                seen.add(other)
+                if weighted_jaccard(grams[k], grams[other], weights) >= threshold:
+                    leader_of[other] = k
+    return leader_of
+
+
+def assign_clusters(tables, threshold=THRESHOLD):
+    """
+    全テーブルのキーワードをまとめてクラスタにし、クラスタ列を書き込む
+
+    Returns:
+        集計（Counter）。キーワード・正規化後の種類・クラスタの数など
+    """
+    stats = Counter()
+    volumes = {}  # keyword_key() → 最大の検索数
+    display = {}  # keyword_key() → その検索数のときの元の表記
+    for table in tables:
+        kw_i = table.column('キーワード')
+        vol_i = table.column('月間検索数')
+        for row in table.rows:
+            kw = table.get(row, kw_i).strip()
+            key = keyword_key(kw)
+            if not key:
+                continue
+            vol_str = table.get(row, vol_i).strip()
+            vol = int(vol_str) if vol_str.isdigit() else 0
+            if key not in volumes or vol > volumes[key] or (vol == volumes[key] and kw < display[key]):
+                volumes[key] = vol
+                display[key] = kw
+            stats['キーワード'] += 1
+
+    leader_of = cluster_keywords(volumes, threshold)
+    sizes = Counter(leader_of.values())
+    stats['正規化後'] = len(leader_of)
+    stats['クラスタ'] = len(sizes)
+    stats['複数のクラスタ'] = sum(1 for n in sizes.values() if n > 1)
+    stats['最大のクラスタ'] = max(sizes.values(), default=0)
+
+    for table in tables:
+        kw_i = table.column('キーワード')
+        cluster_i = table.ensure_column(COLUMN)
+        for row in table.rows:
+            key = keyword_key(table.get(row, kw_i))
+            value = display[leader_of[key]] if key else ''
+            if table.get(row, cluster_i) != value:
+                table.set(row, cluster_i, value)
+    return stats
+
+
+def split_clusters(tables):
+    """同じファイル内で、クラスタのメンバーが複数のページグループに分かれているもの"""
+    result = []
+    for table in tables:
+        if not (table.has(COLUMN) and table.has('ページグループ')):
+            continue
+        cluster_i = table.column(COLUMN)
+        pg_i = table.column('ページグループ')
+        hantei_i = table.index.get('判定', -1)
+        groups = defaultdict(Counter)
+        for row in table.rows:
+            cluster = table.get(row, cluster_i)
+            pg = table.get(row, pg_i).strip()
+            if cluster and pg and table.get(row, hantei_i).strip() != '削除':
+                groups[cluster][pg] += 1
+        for cluster, pgs in groups.items():
+            if len(pgs) > 1:
+                result.append((table.category, cluster, pgs))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='全TSVのキーワードを近い表記でまとめ、クラスタ列を付ける')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help=f'代表との類似度の下限（既定: {THRESHOLD}）')
+    parser.add_argument('--dry-run', action='store_true', help='書き出さずに集計だけ表示する')
+    parser.add_argument('--show-split', type=int, default=20, metavar='N',
+                        help='ページグループが分かれているクラスタを N 件表示する')
+    args = parser.parse_args()
+
+    tables = [t for t in (KeywordTable.load(f) for f in list_tsv_files()) if t.header]
+    before = {t.path: t.to_text() for t in tables}
+    stats = assign_clusters(tables, args.threshold)
+
+    written = 0
+    for table in tables:
+        if table.to_text() != before[table.path]:
+            written += 1
+            if not args.dry_run:
+                table.save()
+
+    print(f'キーワード: {stats["キーワード"]:,}行  正規化後: {stats["正規化後"]:,}種類')
+    print(f'クラスタ: {stats["クラスタ"]:,}（2件以上: {stats["複数のクラスタ"]:,}、最大 {stats["最大のクラスタ"]}件）')
+    action = '変更あり（未書き出し）' if args.dry_run else '書き出し'
+    print(f'{action}: {written}ファイル')
+
+    split = split_clusters(tables)
+    if split and args.show_split:
+        print(f'\nページグループが分かれているクラスタ: {len(split)}件')
+        for category, cluster, pgs in split[:args.show_split]:
+            detail = ', '.join(f'{pg}({n})' for pg, n in pgs.most_common())
+            print(f'  [{category}] {cluster}: {detail}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""キーワード → (ファイル, 行, ページグループ) の索引
+
+あるキーワードがどのファイル・ページグループに既にあるかを、全TSVをなめずに1回の辞書引きで調べる。
+キーワードは keyword_cluster.keyword_key() で正規化するので、空白・全角半角・カタカナ/ひらがな・
+語順だけが違うキーワードは同じものとして引ける。
+
+索引は .keyword_index.json に保存し、keyword_pipeline.py がTSVを書き出すたびに
+そのファイルの分だけ入れ替える（ほかのファイルの分は読み直さない）。
+パイプラインを通さずにTSVを編集したときは refresh で、内容が変わったファイルだけ索引し直す。
+
+使用例:
+    python keyword_index.py refresh                 # 変わったファイルだけ索引し直す
+    python keyword_index.py lookup 仲介手数料 相場     # キーワードの所在
+    python keyword_index.py conflicts               # 複数のファイル・ページグループにあるキーワード
+
+    index = KeywordIndex()
+    for entry in index.get('仲介手数料 相場'):
+        entry.file, entry.row, entry.keyword, entry.page_group
+"""
+import argparse
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+from keyword_cluster import keyword_key
+from keyword_table import TSV_DIR, TSV_SUFFIX, KeywordTable, list_tsv_files
+
+INDEX_FILE = '.keyword_index.json'
+DEFAULT_INDEX = os.path.join(TSV_DIR, INDEX_FILE)
+
+# row は見出し行を除いた0始まりの行番号（KeywordTable.rows の位置）
+Entry = namedtuple('Entry', ['file', 'row', 'keyword', 'page_group'])
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def table_entry(table, text=None):
+    """
+    索引に記録する1ファイル分の内容
+
+    Args:
+        text: テーブルを書き出した内容（省略時は table.to_text()）
+
+    Returns:
+        {'hash': 内容のハッシュ, 'rows': [[keyword_key(), キーワード, ページグループ], ...]}
+    """
+    kw_i = table.index.get('キーワード', -1)
+    pg_i = table.index.get('ページグループ', -1)
+    return {
+        'hash': _digest(table.to_text() if text is None else text),
+        'rows': [
+            [keyword_key(table.get(row, kw_i)), table.get(row, kw_i).strip(), table.get(row, pg_i).strip()]
+            for row in table.rows
+        ],
+    }
+
+
+class KeywordIndex:
+    """
+    保存するのはファイルごとの行の内容（{ファイル: table_entry()}）で、
+    キーワード → Entry のリストの辞書は読み込み時に組み立てる
+    """
+
+    def __init__(self, path=DEFAULT_INDEX):
+        self.path = os.path.abspath(path)
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.files = json.load(f).get('files', {})
+        except (OSError, ValueError):
+            self.files = {}
+        self.keys = {}
+        for file, entry in self.files.items():
+            self._add(file, entry)
+
+    def _key(self, fpath):
+        return os.path.relpath(os.path.abspath(fpath), os.path.dirname(self.path))
+
+    def _add(self, file, entry):
+        for row_no, (key, keyword, pg) in enumerate(entry['rows']):
+            if key:
+                self.keys.setdefault(key, []).append(Entry(file, row_no, keyword, pg))
+
+    def _remove(self, file):
+        entry = self.files.pop(file, None)
+        if entry is None:
+            return
+        for key in {row[0] for row in entry['rows'] if row[0]}:
+            remaining = [e for e in self.keys.get(key, ()) if e.file != file]
+            if remaining:
+                self.keys[key] = remaining
+            else:
+                self.keys.pop(key, None)
+
+    # ---------- 引く ----------
+
+    def get(self, keyword):
+        """キーワードの所在（Entry のリスト。なければ空）"""
+        return self.keys.get(keyword_key(keyword), [])
+
+    def elsewhere(self, keyword, fpath):
+        """fpath 以外のファイルにある同じキーワード"""
+        file = self._key(fpath)
+        return [e for e in self.get(keyword) if e.file != file]
+
+    def has_file(self, fpath):
+        return self._key(fpath) in self.files
+
+    def conflicts(self):
+        """
+        複数のファイル、または複数のページグループにあるキーワード
+
+        Returns:
+            [(keyword_key(), [Entry, ...]), ...]（キー順）
+        """
+        result = []
+        for key, entries in sorted(self.keys.items()):
+            if len({e.file for e in entries}) > 1 or len({e.page_group for e in entries if e.page_group}) > 1:
+                result.append((key, entries))
+        return result
+
+    # ---------- 更新 ----------
+
+    def record(self, fpath, entry):
+        """1ファイル分の索引を入れ替える（entry は table_entry() の戻り値）"""
+        file = self._key(fpath)
+        self._remove(file)
+        self.files[file] = entry
+        self._add(file, entry)
+
+    def update_table(self, table, text=None):
+        self.record(table.path, table_entry(table, text))
+
+    def refresh(self, files):
+        """
+        files のうち、前回索引したときから内容が変わったファイルを索引し直す
+        （一覧にないファイルは索引から外す）
+
+        Returns:
+            索引し直したファイルのリスト
+        """
+        updated = []
+        for fpath in files:
+            with open(fpath, 'r', encoding='utf-8', newline='') as f:
+                text = f.read()
+            entry = self.files.get(self._key(fpath))
+            if entry is not None and entry['hash'] == _digest(text):
+                continue
+            self.update_table(KeywordTable.parse(text, fpath))
+            updated.append(fpath)
+        keep = {self._key(f) for f in files}
+        for file in [f for f in self.files if f not in keep]:
+            self._remove(file)
+        return updated
+
+    def save(self):
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'files': self.files}, f, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='キーワード → ファイル・行・ページグループの索引')
+    parser.add_argument('--index', default=DEFAULT_INDEX, help='索引の保存先')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('refresh', help='内容が変わったTSVを索引し直す')
+
+    p_lookup = sub.add_parser('lookup', help='キーワードの所在を表示する')
+    p_lookup.add_argument('keyword', nargs='+', help='キーワード（空白区切りの語は1つのキーワードとして扱う）')
+
+    p_conflicts = sub.add_parser('conflicts', help='複数のファイル・ページグループにあるキーワードを表示する')
+    p_conflicts.add_argument('--limit', type=int, default=50)
+
+    args = parser.parse_args()
+    index = KeywordIndex(args.index)
+
+    if args.command == 'refresh':
+        updated = index.refresh(list_tsv_files())
+        index.save()
+        print(f'索引し直したファイル: {len(updated)}  キーワード: {len(index.keys):,}種類 → {index.path}')
+    elif args.command == 'lookup':
+        entries = index.get(' '.join(args.keyword))
+        if not entries:
+            print('見つかりません')
+        for e in entries:
+            print(f'{e.file}\t{e.row + 2}行目\t{e.keyword}\t{e.page_group}')
+    elif args.command == 'conflicts':
+        conflicts = index.conflicts()
+        print(f'複数のファイル・ページグループにあるキーワード: {len(conflicts)}件')
+        for _, entries in conflicts[:args.limit]:
+            detail = ', '.join(f'{e.file.replace(TSV_SUFFIX, "")}:{e.page_group or "（空欄）"}' for e in entries)
+            print(f'  {entries[0].keyword}: {detail}')
+
+
+if __name__ == '__main__':
+    main()
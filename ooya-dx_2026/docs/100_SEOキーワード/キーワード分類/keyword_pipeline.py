@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""判定済みTSVに各スクリプトの処理をまとめて適用するパイプライン
+
+各TSVを1回だけ読み込み、STEPS の順（依存関係の順）にメモリ上で変換して、1回だけ書き出す。
+個別スクリプトを順に実行すると、スクリプトごとに全ファイルの読み込み・分割・書き出しが発生する。
+内容が変わらなかったファイルは書き出さない。
+ファイル同士は独立しているので、--workers のプロセス数で並列に処理する（集計はファイル順にまとめる）。
+
+前回書き出した内容はマニフェスト（.keyword_manifest.json）にファイル・行ごとのハッシュで記録し、
+ルールのバージョン（ステップのソースのハッシュ）と合わせて照合する。
+- ファイルもルールも前回から変わっていなければ、読み込まずにスキップする（ファイルはそのまま）
+- ルールが同じでファイルが変わっていれば、行ごとに独立したステップ（ROW_LOCAL）は
+  前回の出力と異なる行（手で直した行・追加した行）だけに適用する。
+  ページグループ単位のステップは、結果が他の行に波及するのでファイル全体に適用する
+- ルールを変えたときや --force のときは全行を処理し直す
+
+既存の値（空欄以外）を書き換えたセルは、ファイル・列ごとの件数を表示する。
+マニフェストに記録の無いファイル（パイプラインで初めて書き出すファイル）があるときは、
+手で入力した値を上書きしうるので、--steps で実行するステップを明示しない限り書き出さずに
+変更内容（上書きするセルの件数）だけを表示する。
+
+書き出したファイルは、キーワードの索引（.keyword_index.json、keyword_index.py）にも
+そのファイルの分だけ反映する。索引を使うステップ（USES_INDEX）には、--index の索引
+（実行前に保存されていた内容）を渡す。
+
+使用例:
+    python keyword_pipeline.py                          # 全ステップ・全ファイル
+    python keyword_pipeline.py --steps all              # 初回（マニフェストが無いとき）は明示する
+    python keyword_pipeline.py --steps fill_titles,generate_needs
+    python keyword_pipeline.py --dry-run -v 仲介手数料_判定済み.tsv
+    python keyword_pipeline.py --workers 8
+    python keyword_pipeline.py --force                  # マニフェストを無視して全行を処理し直す
+"""
+import argparse
+import hashlib
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import add_kanten_column
+import add_page_role
+import add_strategy_columns
+import add_theme_direction
+import fill_titles
+import fix_branded
+import generate_needs
+import redistribute_pillar
+import keyword_rules
+import keyword_table
+import rejudge_topical
+from keyword_index import INDEX_FILE, KeywordIndex, table_entry
+from keyword_table import TSV_DIR, KeywordTable, category_of, list_tsv_files
+
+# 実行順（前のステップが追加・更新した列を後のステップが使う）
+STEPS = [
+    ('add_kanten_column', add_kanten_column),        # 観点
+    ('add_strategy_columns', add_strategy_columns),  # トピカル貢献 ほか（観点の後ろ）
+    ('rejudge_topical', rejudge_topical),            # トピカル貢献をページグループ単位で再判定
+    ('add_page_role', add_page_role),                # ページ役割（トピカル貢献を使う）
+    ('add_theme_direction', add_theme_direction),    # テーマ・記事の方向性（ページ役割を使う）
+    ('fill_titles', fill_titles),                    # 想定ページタイトル（空欄のみ）
+    ('redistribute_pillar', redistribute_pillar),    # ピラーのタイトルを子ページへ振り分け
+    ('fix_branded', fix_branded),                    # 企業名入りKWを削除（テーマ列を使う）
+    ('generate_needs', generate_needs),              # 解決ニーズ（想定ページタイトルを使う）
+]
+STEP_NAMES = [name for name, _ in STEPS]
+STEP_MODULES = dict(STEPS)
+
+# これより少ないファイル数ならプロセスを起動せずに逐次処理する
+MIN_PARALLEL_FILES = 4
+
+MANIFEST_FILE = '.keyword_manifest.json'
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _row_digest(cols):
+    return _digest('\t'.join(cols))
+
+
+def rules_version(step_names):
+    """ルールのバージョン（実行するステップと共通モジュールのソースのハッシュ）"""
+    h = hashlib.sha256(','.join(step_names).encode('utf-8'))
+    for module in [keyword_table, keyword_rules] + [STEP_MODULES[name] for name in step_names]:
+        with open(module.__file__, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+class KeywordManifest:
+    """TSV → {rules, file_hash, header, rows}（前回パイプラインが書き出した内容のハッシュ）"""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.files = json.load(f).get('files', {})
+        except (OSError, ValueError):
+            self.files = {}
+
+    def _key(self, fpath):
+        return os.path.relpath(os.path.abspath(fpath), os.path.dirname(self.path))
+
+    def get(self, fpath):
+        return self.files.get(self._key(fpath))
+
+    def record(self, fpath, entry):
+        self.files[self._key(fpath)] = entry
+
+    def save(self):
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'files': self.files}, f, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def applies_to(step, category):
+    return step.CATEGORIES is None or category in step.CATEGORIES
+
+
+def uses_index(step, category):
+    """キーワードの索引を transform() に渡すステップか"""
+    return getattr(step, 'USES_INDEX', False) and applies_to(step, category)
+
+
+def run_table(table, steps, log=None, dirty=None, index=None):
+    """
+    1つのテーブルに steps を順に適用する
+
+    dirty を渡すと、ROW_LOCAL のステップはその行だけに適用する
+    （ヘッダーが前回の出力と同じときだけ渡すこと。列の追加が起きないのでヘッダーを共有できる）。
+    index（KeywordIndex）は USES_INDEX のステップの transform() に渡す。
+
+    Returns:
+        {ステップ名: 集計（Counter）}
+    """
+    stats = {}
+    for name, step in steps:
+        if applies_to(step, table.category):
+            target = table.subset(dirty) if dirty is not None and step.ROW_LOCAL else table
+            if uses_index(step, table.category):
+                stats[name] = step.transform(target, log, index)
+            else:
+                stats[name] = step.transform(target, log)
+    return stats
+
+
+def overwritten_cells(table, before, before_index):
+    """
+    既存の値（空欄以外）を別の値に書き換えたセルの数
+
+    Args:
+        before: [(行, 変換前のセルのタプル)]
+        before_index: 変換前の列名 → 位置
+
+    Returns:
+        Counter（列名 → セル数）
+    """
+    counts = Counter()
+    columns = [(name, pos, table.index.get(name, -1)) for name, pos in before_index.items()]
+    for row, old in before:
+        for name, old_pos, new_pos in columns:
+            value = old[old_pos] if old_pos < len(old) else ''
+            if value.strip() and table.get(row, new_pos) != value:
+                counts[name] += 1
+    return counts
+
+
+def process_file(fpath, step_names, dry_run=False, verbose=False, rules=None, entry=None, with_index=False,
+                 index_path=None):
+    """
+    1ファイルを読み込み、ステップを適用して、内容が変わっていれば書き出す
+
+    並列実行時はワーカープロセスで呼ばれるので、ステップは名前で受け取る。
+
+    Args:
+        rules: ルールのバージョン（マニフェストを使わないなら None）
+        entry: このファイルのマニフェストの記録（なければ None）
+        with_index: True ならキーワードの索引に記録する内容も返す
+        index_path: USES_INDEX のステップに渡すキーワードの索引のパス（None なら渡さない）
+
+    Returns:
+        (ファイル, {ステップ名: 集計}, 変更があったか, 詳細ログ（verbose でなければ None）,
+         マニフェストに記録する内容, 処理した行数（スキップしたファイルは None）,
+         索引に記録する内容（with_index でないときやスキップしたファイルは None）,
+         既存の値を書き換えたセルの数（列名 → 件数）)。空のファイルは None
+    """
+    with open(fpath, 'r', encoding='utf-8', newline='') as f:
+        text = f.read()
+    file_hash = _digest(text)
+    log = [] if verbose else None
+
+    same_rules = rules is not None and entry is not None and entry.get('rules') == rules
+    if same_rules and entry.get('file_hash') == file_hash:
+        return fpath, {}, False, log, entry, None, None, Counter()
+
+    table = KeywordTable.parse(text, fpath)
+    if not table.header:
+        return None
+
+    # 前回の出力と同じ行は、行ごとのステップを適用済み
+    dirty = None
+    if same_rules and entry.get('header') == _row_digest(table.header):
+        done = set(entry.get('rows', ()))
+        dirty = [row for row in table.rows if _row_digest(row) not in done]
+
+    before = [(row, tuple(row)) for row in table.rows]
+    before_index = dict(table.index)
+
+    steps = [(name, STEP_MODULES[name]) for name in step_names]
+    # 索引は使うステップがこのファイルに適用されるときだけ読み込む
+    index = None
+    if index_path is not None and any(uses_index(step, table.category) for _, step in steps):
+        index = KeywordIndex(index_path)
+    stats = run_table(table, steps, log, dirty, index)
+
+    output = table.to_text()
+    changed = output != text
+    overwritten = overwritten_cells(table, before, before_index) if changed else Counter()
+    if changed and not dry_run:
+        table.save()
+    new_entry = {
+        'rules': rules,
+        'file_hash': _digest(output),
+        'header': _row_digest(table.header),
+        'rows': [_row_digest(row) for row in table.rows],
+    }
+    index_entry = table_entry(table, output) if with_index else None
+    rows = len(table.rows) if dirty is None else len(dirty)
+    return fpath, stats, changed, log, new_entry, rows, index_entry, overwritten
+
+
+def run(files, steps=STEPS, dry_run=False, verbose=False, workers=1, manifest=None, force=False, index=None):
+    """
+    files を読み込み、steps を適用して書き出す
+
+    workers > 1 ならファイルごとにプロセスプールで並列に処理する。
+    結果（集計・表示）は並列でも逐次でも files の順にまとめるので、出力は同じになる。
+
+    Args:
+        manifest: KeywordManifest（None ならマニフェストを使わず全行を処理する）
+        force: True ならマニフェストの記録を使わずに全行を処理し直す（記録は更新する）
+        index: KeywordIndex（処理したファイルの分を入れ替える。None なら更新しない）。
+            USES_INDEX のステップには、ワーカーがこのパスから読み込んだ索引を渡す
+
+    Returns:
+        {'stats': {ステップ名: 全ファイルの集計}, 'written': [書き出したファイル],
+         'unchanged': [変更がなかったファイル], 'skipped': [前回から変わらずスキップしたファイル],
+         'rows': 処理した行数, 'overwritten': {ファイル: 既存の値を書き換えたセルの数（列名 → 件数）}}
+    """
+    step_names = [name for name, _ in steps]
+    rules = rules_version(step_names) if manifest is not None else None
+    totals = {name: Counter() for name in step_names}
+    written = []
+    unchanged = []
+    skipped = []
+    overwritten = {}
+    processed_rows = 0
+
+    def entry_for(fpath):
+        return None if manifest is None or force else manifest.get(fpath)
+
+    with_index = index is not None and not dry_run
+    index_path = index.path if index is not None else None
+
+    if workers > 1 and len(files) >= MIN_PARALLEL_FILES:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        # 大きいファイルから投入して最後に大きいファイルだけが残らないようにし、
+        # 結果は完了順ではなく files の順に受け取る
+        futures = {
+            fpath: executor.submit(process_file, fpath, step_names, dry_run, verbose, rules, entry_for(fpath),
+                                   with_index, index_path)
+            for fpath in sorted(files, key=os.path.getsize, reverse=True)
+        }
+        results = (futures[fpath].result() for fpath in files)
+    else:
+        executor = None
+        results = (process_file(fpath, step_names, dry_run, verbose, rules, entry_for(fpath), with_index,
+                                index_path)
+                   for fpath in files)
+
+    try:
+        for result in results:
+            if result is None:
+                continue
+            fpath, file_stats, changed, log, entry, rows, index_entry, cells = result
+            if cells:
+                overwritten[fpath] = cells
+            for name, stats in file_stats.items():
+                totals[name] += stats
+            if rows is None:
+                skipped.append(fpath)
+            else:
+                processed_rows += rows
+                (written if changed else unchanged).append(fpath)
+            if manifest is not None and not dry_run:
+                manifest.record(fpath, entry)
+            if with_index:
+                if index_entry is not None:
+                    index.record(fpath, index_entry)
+                elif not index.has_file(fpath):
+                    # スキップしたファイルがまだ索引に無い（索引を作り直したときなど）
+                    index.update_table(KeywordTable.load(fpath))
+            if verbose:
+                for line in log:
+                    print(line)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if manifest is not None and not dry_run:
+        manifest.save()
+    if with_index:
+        index.save()
+    return {'stats': totals, 'written': written, 'unchanged': unchanged, 'skipped': skipped,
+            'rows': processed_rows, 'overwritten': overwritten}
+
+
+def select_steps(names):
+    unknown = [n for n in names if n not in STEP_NAMES]
+    if unknown:
+        raise SystemExit(f'不明なステップ: {", ".join(unknown)}（指定できるもの: {", ".join(STEP_NAMES)}）')
+    # 指定の順序によらず、依存関係の順で実行する
+    return [(name, step) for name, step in STEPS if name in names]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='判定済みTSVに分類ステップをまとめて適用する')
+    parser.add_argument('files', nargs='*', help='対象TSV（省略時は全 *_判定済み.tsv）')
+    parser.add_argument('--steps', help='実行するステップ（カンマ区切り。all または省略時は全ステップ。'
+                                        'マニフェストに記録の無いファイルを書き出すときは省略できない）')
+    parser.add_argument('--dry-run', action='store_true', help='書き出さずに集計だけ表示する')
+    parser.add_argument('-v', '--verbose', action='store_true', help='ファイルごとの詳細を表示する')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='並列に処理するプロセス数（1なら逐次）')
+    parser.add_argument('--force', action='store_true', help='前回の記録を使わずに全行を処理し直す')
+    parser.add_argument('--manifest', default=os.path.join(TSV_DIR, MANIFEST_FILE),
+                        help='マニフェストの保存先（既定: TSVと同じディレクトリの .keyword_manifest.json）')
+    parser.add_argument('--index', default=os.path.join(TSV_DIR, INDEX_FILE),
+                        help='キーワードの索引の保存先（既定: TSVと同じディレクトリの .keyword_index.json）')
+    args = parser.parse_args()
+
+    steps = STEPS if args.steps in (None, 'all') else select_steps(args.steps.split(','))
+    files = [f if os.path.exists(f) else os.path.join(TSV_DIR, f) for f in args.files] or list_tsv_files()
+    manifest = KeywordManifest(args.manifest)
+
+    # パイプラインで初めて書き出すファイルは、手で入力した値を上書きしうるので
+    # ステップを明示しない限り変更内容の表示だけにする
+    first = [f for f in files if manifest.get(f) is None]
+    dry_run = args.dry_run or (bool(first) and args.steps is None)
+    if dry_run and not args.dry_run:
+        print(f'⚠️  パイプラインで初めて書き出すファイルが {len(first)} 件あるため、書き出さずに変更内容だけを表示します')
+
+    result = run(files, steps, dry_run=dry_run, verbose=args.verbose, workers=args.workers,
+                 manifest=manifest, force=args.force, index=KeywordIndex(args.index))
+
+    for name, step in steps:
+        print(f'\n##### {name} #####')
+        for line in step.summarize(result['stats'][name]):
+            print(line)
+
+    if result['overwritten']:
+        print(f'\n既存の値を書き換えたセル{"（未書き出し）" if dry_run else ""}:')
+        for fpath, cells in result['overwritten'].items():
+            detail = ', '.join(f'{name} {n:,}' for name, n in cells.most_common())
+            print(f'  {category_of(fpath)}: {detail}')
+
+    action = '変更あり（未書き出し）' if dry_run else '書き出し'
+    print(f'\n{action}: {len(result["written"])}ファイル  変更なし: {len(result["unchanged"])}ファイル  '
+          f'スキップ（前回から入力・ルールとも同じ）: {len(result["skipped"])}ファイル  '
+          f'処理した行: {result["rows"]:,}')
+
+    if dry_run and not args.dry_run:
+        raise SystemExit('書き出すには --steps で実行するステップを指定してください（全ステップは --steps all）')
+
+
+if __name__ == '__main__':
+    main()
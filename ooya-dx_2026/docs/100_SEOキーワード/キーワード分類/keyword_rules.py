@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""順序付きの分類ルール（上から順に評価し、最初にマッチしたものを採用）
+
+(正規表現, 値) のリストを読み込み時に1回だけ解析し、キーワードを1回なめるだけで
+「マッチする可能性のあるルール」を絞り込めるようにしておく。
+
+- 各ルールのパターンから「マッチするなら必ず含まれる文字列」を取り出す
+  （例: r'請求書\\s*ひな形' → '請求書'、r'高い$|高すぎる' → '高い' か '高すぎる'）
+- 全ルールの文字列を1つの Aho–Corasick オートマトンにまとめ、キーワードを1回走査して
+  含まれる文字列 → 候補ルールを求める
+- 候補ルールだけを上から順に正規表現で確かめ、最初にマッチしたものを採用する
+  （必須の文字列を取り出せないルールは常に候補に入れる）
+
+ルールごとに re.search を呼ぶ書き方と結果は同じ。
+
+使用例:
+    THEME_RULES = RuleSet([(r'基礎解説', '基礎知識'), (r'相場', '相場')])
+    THEME_RULES.first('仲介手数料_相場')          # '相場'
+    THEME_RULES.first('その他', default='')     # ''
+    value, m = THEME_RULES.search('...')        # マッチオブジェクトも必要な場合
+"""
+import re
+from collections import deque
+
+# これらの文字の直後に来るとき、直前の1文字は省略できる（必須の文字列から外す）
+_OPTIONAL_QUANTIFIERS = '*?{'
+
+# casefold() の後に揃える文字（re.IGNORECASE では I・i・İ・ı がどれも互いにマッチする）
+_FOLD_EXTRA = {0x131: 'i', 0x307: None}
+
+
+def _casefold(text):
+    """大文字小文字を区別しないルールの照合用（re.IGNORECASE で等しい文字は同じ文字列になる）"""
+    return text.casefold().translate(_FOLD_EXTRA)
+
+
+def any_of(words):
+    """語のどれかを含む、というパターン（語は正規表現として解釈しない）"""
+    return '|'.join(re.escape(w) for w in words)
+
+
+def _skip_class(pattern, i):
+    """pattern[i] == '[' の文字クラスの直後の位置"""
+    i += 1
+    if i < len(pattern) and pattern[i] == '^':
+        i += 1
+    if i < len(pattern) and pattern[i] == ']':
+        i += 1
+    while i < len(pattern) and pattern[i] != ']':
+        i += 2 if pattern[i] == '\\' else 1
+    return i + 1
+
+
+def _skip_group(pattern, i):
+    """pattern[i] == '(' のグループの直後の位置"""
+    depth = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '[':
+            i = _skip_class(pattern, i)
+            continue
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def required_literals(pattern):
+    """
+    パターンにマッチする文字列が必ず含む文字列の候補
+
+    トップレベルの選択肢（|）ごとに、グループ・文字クラス・量指定子で切れ目のない
+    最長の固定文字列を1つずつ取り出す。
+
+    Returns:
+        文字列のリスト（どれかを含まないとマッチしない）。取り出せない選択肢があれば None
+    """
+    branches = []
+    runs = []
+    run = ''
+    i = 0
+
+    def close_run():
+        nonlocal run
+        if run:
+            runs.append(run)
+        run = ''
+
+    def close_branch():
+        close_run()
+        branches.append(max(runs, key=len) if runs else None)
+        runs.clear()
+
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            nxt = pattern[i + 1:i + 2]
+            if nxt and not nxt.isalnum():
+                run += nxt
+            else:
+                # \d \s \b \1 などは固定文字列ではない
+                close_run()
+            i += 2
+        elif c == '[':
+            close_run()
+            i = _skip_class(pattern, i)
+        elif c == '(':
+            close_run()
+            i = _skip_group(pattern, i)
+        elif c == '|':
+            close_branch()
+            i += 1
+        elif c in _OPTIONAL_QUANTIFIERS:
+            # 直前の1文字は0回でもよいので外す
+            run = run[:-1]
+            close_run()
+            i = pattern.index('}', i) + 1 if c == '{' and '}' in pattern[i:] else i + 1
+        elif c in '.^$+':
+            close_run()
+            i += 1
+        else:
+            run += c
+            i += 1
+    close_branch()
+
+    if any(b is None for b in branches):
+        return None
+    return branches
+
+
+class _LiteralScanner:
+    """複数の文字列を1回の走査で探す（Aho–Corasick）"""
+
+    def __init__(self, words):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        for n, word in enumerate(words):
+            state = 0
+            for ch in word:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                state = nxt
+            self.out[state] += (n,)
+
+        # 幅優先で失敗遷移を張る（根の直下は根に戻る）
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] += self.out[self.fail[nxt]]
+
+    def scan(self, text):
+        """text に含まれる文字列の番号の集合"""
+        goto, fail, out = self.goto, self.fail, self.out
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class RuleSet:
+    """
+    順序付きルールのまとまり
+
+    Args:
+        rules: (パターン, 値) のリスト。パターンは文字列またはコンパイル済み正規表現
+            （コンパイル済みのパターンはそのフラグを引き継ぐ）
+        flags: 全ルールに付けるフラグ（re.IGNORECASE など）
+
+    大文字小文字を区別しないルール（IGNORECASE、または (?i) などの埋め込みフラグ）は、
+    必須の文字列とキーワードをどちらも _casefold() して照合する。
+    VERBOSE のルールはパターン中の空白・コメントが文字列にならないので、常に候補に入れる。
+    """
+
+    def __init__(self, rules, flags=0):
+        self.rules = [(p.pattern if isinstance(p, re.Pattern) else p, value) for p, value in rules]
+        self.values = [value for _, value in self.rules]
+        self.patterns = [
+            re.compile(p.pattern, p.flags | flags) if isinstance(p, re.Pattern) else re.compile(p, flags)
+            for p, _ in rules
+        ]
+
+        # 必須の文字列 → それを持つルール番号（大文字小文字を区別するもの・しないもの）
+        exact = {}
+        folded = {}
+        always = []  # 必須の文字列を取り出せないルール（常に候補）
+        for i, ((p, _), pattern) in enumerate(zip(self.rules, self.patterns)):
+            literals = None if pattern.flags & re.VERBOSE else required_literals(p)
+            if literals is None:
+                always.append(i)
+                continue
+            fold = bool(pattern.flags & re.IGNORECASE)
+            for word in literals:
+                if fold:
+                    folded.setdefault(_casefold(word), []).append(i)
+                else:
+                    exact.setdefault(word, []).append(i)
+        self._always = always
+        self._exact_rules = list(exact.values())
+        self._exact = _LiteralScanner(list(exact))
+        self._folded_rules = list(folded.values())
+        self._folded = _LiteralScanner(list(folded)) if folded else None
+
+    def __len__(self):
+        return len(self.rules)
+
+    def candidates(self, text):
+        """マッチする可能性のあるルールの番号（昇順）"""
+        found = [self._exact_rules[n] for n in self._exact.scan(text)]
+        if self._folded is not None:
+            found += [self._folded_rules[n] for n in self._folded.scan(_casefold(text))]
+        if not found:
+            return self._always
+        rules = set(self._always)
+        for numbers in found:
+            rules.update(numbers)
+        return sorted(rules)
+
+    def find(self, text):
+        """最初にマッチしたルールの番号（なければ None）"""
+        patterns = self.patterns
+        for i in self.candidates(text):
+            if patterns[i].search(text):
+                return i
+        return None
+
+    def first(self, text, default=None):
+        """最初にマッチしたルールの値（なければ default）"""
+        i = self.find(text)
+        return default if i is None else self.values[i]
+
+    def search(self, text):
+        """最初にマッチしたルールの (値, そのルールの re.Match)。なければ None"""
+        for i in self.candidates(text):
+            m = self.patterns[i].search(text)
+            if m:
+                return self.values[i], m
+        return None
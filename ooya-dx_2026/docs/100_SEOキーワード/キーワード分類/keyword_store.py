@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""判定済みTSVのキーワードをまとめて引けるSQLiteデータベース
+
+全TSVの行を1つのテーブル（keywords）に取り込み、ページグループ・テーマ・ページ役割・トピック・クラスタに
+索引を付ける。「ページグループXのキーワードを検索数順に」のような問い合わせを、
+TSVを全行なめずに索引で引ける。TSVの列はそのまま同名の列として持つ。
+
+TSVへの書き出しは取り込んだときと同じ内容になる（列の並び・末尾の空欄・改行コードも保つ。
+ヘッダーより多いセルを持つ行は、はみ出したセルを取り込まない）。
+TSVを編集の正本とする運用は変えず、TSV → DB は import、DB → TSV は export で同期する。
+export は既定で別のディレクトリ（TSVと同じディレクトリの export/）に書き出す。
+TSVのディレクトリに書き出したときは、キーワードの索引（keyword_index.py）も更新する。
+
+取り込んだTSVのサイズ・更新時刻を記録しておき、is_current() でTSVがその後変わっていないかを確かめられる。
+rejudge_topical.py・redistribute_pillar.py は、DBがTSVと一致していればページグループの集計・
+ピラーの行をDBの索引で引き、一致していなければTSVを走査する。
+
+環境変数:
+    KEYWORD_DB  データベースファイル（既定: TSVと同じディレクトリの keywords.sqlite3）
+
+使用例:
+    python keyword_store.py import                       # 全 *_判定済み.tsv を取り込む
+    python keyword_store.py group 仲介手数料_交渉ガイド     # グループのキーワードを検索数順に
+    python keyword_store.py groups 仲介手数料              # カテゴリのページグループと合計検索数
+    python keyword_store.py export                       # TSVに書き出す（export/ に）
+    python keyword_store.py export --out /tmp/tsv
+
+    store = KeywordStore()
+    store.rows_in_group('仲介手数料_交渉ガイド')
+    store.find(テーマ='相場', ページ役割='ピラーページ')
+"""
+import argparse
+import json
+import os
+import sqlite3
+
+from keyword_index import KeywordIndex
+from keyword_table import TSV_DIR, KeywordTable, list_tsv_files
+
+DEFAULT_DB = os.getenv('KEYWORD_DB', os.path.join(TSV_DIR, 'keywords.sqlite3'))
+DEFAULT_EXPORT_DIR = os.path.join(TSV_DIR, 'export')
+
+
+# 索引を付ける列（ファイル・カテゴリをまたいで引くことが多い列）
+INDEXED_COLUMNS = ['ページグループ', 'テーマ', 'ページ役割', 'トピック', 'クラスタ', '想定ページタイトル']
+
+# 問い合わせで返す主な列
+SUMMARY_COLUMNS = ['キーワード', '月間検索数', '判定', 'ページグループ', '想定ページタイトル']
+
+
+def _q(name):
+    """SQLの識別子として引用する"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _signature(path):
+    """TSVのサイズと更新時刻（取り込んだ後に変わったかを調べる）"""
+    stat = os.stat(path)
+    return f'{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def _volume(value):
+    """月間検索数（'N/A' などは0）"""
+    value = value.strip()
+    return int(value) if value.isdigit() else 0
+
+
+class KeywordStore:
+    """
+    keywords テーブル: file, category, row_no（ファイル内の行番号）, ncells（元の行のセル数）,
+    volume（月間検索数の数値）と、TSVの各列（同名の列）
+    files テーブル: file, category, header（JSON）, newline（改行コード）,
+    signature（取り込んだTSVのサイズ・更新時刻。メモリ上のテーブルから取り込んだときは空）
+    """
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS files (
+                file TEXT PRIMARY KEY,
+                category TEXT NOT NULL,
+                header TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS keywords (
+                file TEXT NOT NULL,
+                category TEXT NOT NULL,
+                row_no INTEGER NOT NULL,
+                ncells INTEGER NOT NULL,
+                volume INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (file, row_no)
+            );
+            CREATE INDEX IF NOT EXISTS keywords_category_volume ON keywords (category, volume DESC);
+        ''')
+        # 改行コード・TSVの署名を記録する前に作ったDBには列を足す
+        file_columns = {r['name'] for r in self.conn.execute('PRAGMA table_info(files)')}
+        for name, default in [('newline', '\n'), ('signature', '')]:
+            if name not in file_columns:
+                self.conn.execute(f'ALTER TABLE files ADD COLUMN {name} TEXT NOT NULL DEFAULT \'{default}\'')
+        self._refresh_columns()
+        self._ensure_indexes()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _refresh_columns(self):
+        self.columns = [r['name'] for r in self.conn.execute('PRAGMA table_info(keywords)')]
+
+    def _ensure_columns(self, names):
+        """TSVの列を keywords に追加し、索引対象の列には索引を張る"""
+        added = False
+        for name in names:
+            if name not in self.columns:
+                self.conn.execute(f'ALTER TABLE keywords ADD COLUMN {_q(name)} TEXT NOT NULL DEFAULT \'\'')
+                self.columns.append(name)
+                added = True
+        if added:
+            self._ensure_indexes()
+
+    def _ensure_indexes(self):
+        for name in INDEXED_COLUMNS:
+            if name in self.columns:
+                # 同じ値の中は検索数順に並ぶので「グループXを検索数順に」がそのまま引ける
+                self.conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS {_q("keywords_" + name)} '
+                    f'ON keywords ({_q(name)}, volume DESC)'
+                )
+
+    # ---------- 取り込み・書き出し ----------
+
+    def import_table(self, table, signature=''):
+        """
+        KeywordTable の内容でそのファイルの行を置き換える
+
+        Args:
+            signature: 読み込んだTSVの _signature()（TSVと同じ内容のときだけ渡す）
+        """
+        file = os.path.basename(table.path)
+        header = list(table.header)
+        with self.conn:
+            self._ensure_columns(header)
+            self.conn.execute('DELETE FROM keywords WHERE file = ?', (file,))
+            self.conn.execute(
+                'INSERT OR REPLACE INTO files (file, category, header, newline, signature) VALUES (?, ?, ?, ?, ?)',
+                (file, table.category, json.dumps(header, ensure_ascii=False), table.newline, signature),
+            )
+            vol_i = table.index.get('月間検索数', -1)
+            names = ['file', 'category', 'row_no', 'ncells', 'volume'] + header
+            sql = (f'INSERT INTO keywords ({", ".join(_q(n) for n in names)}) '
+                   f'VALUES ({", ".join("?" * len(names))})')
+            self.conn.executemany(sql, (
+                [file, table.category, row_no, len(row), _volume(table.get(row, vol_i))]
+                + [table.get(row, i) for i in range(len(header))]
+                for row_no, row in enumerate(table.rows)
+            ))
+        return len(table.rows)
+
+    def import_tsv(self, path):
+        signature = _signature(path)
+        return self.import_table(KeywordTable.load(path), signature)
+
+    def is_current(self, path):
+        """path のTSVを取り込んだ後、TSVが変わっていないか（取り込んでいなければ False）"""
+        row = self.conn.execute('SELECT signature FROM files WHERE file = ?', (os.path.basename(path),)).fetchone()
+        return row is not None and row['signature'] != '' and row['signature'] == _signature(path)
+
+    def files(self):
+        return [r['file'] for r in self.conn.execute('SELECT file FROM files ORDER BY file')]
+
+    def header(self, file):
+        row = self.conn.execute('SELECT header FROM files WHERE file = ?', (file,)).fetchone()
+        if row is None:
+            raise KeyError(file)
+        return json.loads(row['header'])
+
+    def load_table(self, file, path=None):
+        """DBの内容を KeywordTable にする（行のセル数・改行コードは取り込んだときのまま）"""
+        header = self.header(file)
+        newline = self.conn.execute('SELECT newline FROM files WHERE file = ?', (file,)).fetchone()['newline']
+        rows = []
+        for r in self.conn.execute(
+            f'SELECT ncells, {", ".join(_q(n) for n in header)} FROM keywords WHERE file = ? ORDER BY row_no',
+            (file,),
+        ):
+            cells = list(r)[1:]
+            ncells = r['ncells']
+            # 取り込み時より短い行は、後ろの空欄を元どおり省く
+            while len(cells) > ncells and cells[-1] == '':
+                cells.pop()
+            rows.append(cells)
+        return KeywordTable(header, rows, path or os.path.join(TSV_DIR, file), newline)
+
+    def export_tsv(self, file, path):
+        table = self.load_table(file, path)
+        table.save()
+        return table.path
+
+    # ---------- 問い合わせ ----------
+
+    def find(self, category=None, file=None, order_by='volume DESC', limit=None, **conditions):
+        """
+        列の値で引く（例: find(テーマ='相場', ページ役割='ピラーページ')）
+
+        Returns:
+            sqlite3.Row のリスト（file, row_no, volume と TSVの各列）
+        """
+        where = []
+        params = []
+        if file is not None:
+            where.append('file = ?')
+            params.append(file)
+        if category is not None:
+            where.append('category = ?')
+            params.append(category)
+        for name, value in conditions.items():
+            if name not in self.columns:
+                raise KeyError(f'列がありません: {name}')
+            where.append(f'{_q(name)} = ?')
+            params.append(value)
+        sql = 'SELECT * FROM keywords'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += f' ORDER BY {order_by}, file, row_no'
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+        return self.conn.execute(sql, params).fetchall()
+
+    def rows_in_group(self, page_group, category=None, include_deleted=False):
+        """ページグループのキーワード（検索数の多い順）"""
+        rows = self.find(category=category, ページグループ=page_group)
+        if not include_deleted:
+            rows = [r for r in rows if r['判定'] != '削除']
+        return rows
+
+    def group_stats(self, file):
+        """
+        ファイルのページグループごとの合計検索数と判定の種類（判定=削除・ページグループが空欄の行は除く）
+
+        Returns:
+            {ページグループ: (合計検索数, 判定の集合)}（TSVで最初に出てくる順。検索数が同じグループの順位に使う）
+        """
+        stats = {}
+        # 空白の違う値は TSV を走査するときと同じく strip() してからまとめる
+        for pg, hantei, total, _ in self.conn.execute(
+            'SELECT "ページグループ", "判定", SUM(volume), MIN(row_no) AS first FROM keywords WHERE file = ? '
+            'GROUP BY "ページグループ", "判定" ORDER BY first',
+            (file,),
+        ):
+            pg = pg.strip()
+            hantei = hantei.strip()
+            if not pg or hantei == '削除':
+                continue
+            volume, values = stats.get(pg, (0, set()))
+            values.add(hantei)
+            stats[pg] = (volume + total, values)
+        return stats
+
+    def rows_with(self, file, **conditions):
+        """
+        ファイルの中で列の値が一致する行の行番号（索引で引く）
+
+        Returns:
+            行番号のリスト（昇順。KeywordTable.rows の位置）
+        """
+        return [r['row_no'] for r in self.find(file=file, order_by='row_no', **conditions)]
+
+    def group_volumes(self, category):
+        """
+        カテゴリのページグループごとの合計検索数（多い順。判定=削除 は除く）
+
+        Returns:
+            (ページグループ, 合計検索数, キーワード数) のリスト
+        """
+        return [tuple(r) for r in self.conn.execute(
+            'SELECT "ページグループ", SUM(volume) AS total, COUNT(*) AS n FROM keywords '
+            'WHERE category = ? AND "判定" != \'削除\' AND "ページグループ" != \'\' '
+            'GROUP BY "ページグループ" ORDER BY total DESC, "ページグループ"',
+            (category,),
+        )]
+
+    def update(self, file, row_no, **values):
+        """1行の列の値を書き換える（月間検索数を変えたら volume も更新する）"""
+        for name in values:
+            if name not in self.columns:
+                raise KeyError(f'列がありません: {name}')
+        header = self.header(file)
+        sets = [f'{_q(name)} = ?' for name in values]
+        params = list(values.values())
+        if '月間検索数' in values:
+            sets.append('volume = ?')
+            params.append(_volume(values['月間検索数']))
+        # 空欄でない値を書いた列までは、書き出し時に省かないようにする
+        last = max((header.index(n) + 1 for n, v in values.items() if v and n in header), default=0)
+        sets.append('ncells = MAX(ncells, ?)')
+        params.append(last)
+        with self.conn:
+            cur = self.conn.execute(
+                f'UPDATE keywords SET {", ".join(sets)} WHERE file = ? AND row_no = ?',
+                params + [file, row_no],
+            )
+        if cur.rowcount == 0:
+            raise KeyError((file, row_no))
+
+
+def open_existing(path=DEFAULT_DB):
+    """DBがあれば KeywordStore を開く（まだ import していなければ None）"""
+    return KeywordStore(path) if os.path.exists(path) else None
+
+
+def _print_rows(rows):
+    for r in rows:
+        print('\t'.join(str(r[n]) for n in SUMMARY_COLUMNS if n in r.keys()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='判定済みTSVのキーワードDB')
+    parser.add_argument('--db', default=DEFAULT_DB, help='データベースファイル')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_import = sub.add_parser('import', help='TSVを取り込む')
+    p_import.add_argument('files', nargs='*', help='対象TSV（省略時は全 *_判定済み.tsv）')
+
+    p_export = sub.add_parser('export', help='TSVに書き出す')
+    p_export.add_argument('files', nargs='*', help='ファイル名（省略時は全ファイル）')
+    p_export.add_argument('--out', default=DEFAULT_EXPORT_DIR,
+                          help='出力先ディレクトリ（既定: TSVと同じディレクトリの export/。'
+                               'TSVのディレクトリを指定するとTSVを上書きし、キーワードの索引も更新する）')
+
+    p_group = sub.add_parser('group', help='ページグループのキーワードを検索数順に表示')
+    p_group.add_argument('page_group')
+    p_group.add_argument('--category')
+
+    p_groups = sub.add_parser('groups', help='カテゴリのページグループを合計検索数順に表示')
+    p_groups.add_argument('category')
+
+    args = parser.parse_args()
+
+    with KeywordStore(args.db) as store:
+        if args.command == 'import':
+            files = [f if os.path.exists(f) else os.path.join(TSV_DIR, f) for f in args.files] or list_tsv_files()
+            total = sum(store.import_tsv(f) for f in files)
+            print(f'取り込み: {len(files)}ファイル {total:,}行 → {args.db}')
+        elif args.command == 'export':
+            os.makedirs(args.out, exist_ok=True)
+            files = [os.path.basename(f) for f in args.files] or store.files()
+            for file in files:
+                store.export_tsv(file, os.path.join(args.out, file))
+            print(f'書き出し: {len(files)}ファイル → {args.out}')
+            if os.path.samefile(args.out, TSV_DIR):
+                # TSVを上書きしたので、索引とDBの記録をTSVに合わせる
+                index = KeywordIndex()
+                index.refresh(list_tsv_files())
+                index.save()
+                for file in files:
+                    store.import_tsv(os.path.join(TSV_DIR, file))
+                print(f'キーワードの索引を更新しました: {index.path}')
+        elif args.command == 'group':
+            _print_rows(store.rows_in_group(args.page_group, args.category))
+        elif args.command == 'groups':
+            for pg, total, n in store.group_volumes(args.category):
+                print(f'{total:>8,}  {n:>4}件  {pg}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""判定済みTSV（*_判定済み.tsv）を列名で扱うためのテーブル
+
+各スクリプトは TSV を1回読み込んで KeywordTable にし、列名で値を読み書きする。
+手を加えていない行は読み込んだときの文字列のまま書き戻す（末尾の空欄・改行コード（LF / CRLF）も保つ）。
+
+使用例:
+    table = KeywordTable.load(path)
+    kw_i = table.column('キーワード')
+    for row in table.rows:
+        table.get(row, kw_i)
+    table.save()
+"""
+import glob
+import os
+
+TSV_DIR = os.path.dirname(os.path.abspath(__file__))
+TSV_SUFFIX = '_判定済み.tsv'
+
+
+def category_of(path):
+    """ファイル名からカテゴリ名（例: 仲介手数料）を取り出す"""
+    return os.path.basename(path).replace(TSV_SUFFIX, '')
+
+
+def list_tsv_files(tsv_dir=TSV_DIR):
+    """判定済みTSVの一覧（ファイル名順）"""
+    return sorted(glob.glob(os.path.join(tsv_dir, '*' + TSV_SUFFIX)))
+
+
+class KeywordTable:
+    """ヘッダー・行（セルのリスト）・列名 → 位置 の索引"""
+
+    def __init__(self, header, rows, path=None, newline='\n'):
+        self.header = header
+        self.rows = rows
+        self.path = path
+        # 書き出すときの改行コード（読み込んだファイルに合わせる）
+        self.newline = newline
+        self.category = category_of(path) if path else ''
+        # subset() のとき、列の追加・削除を反映する元のテーブルの全行
+        self._all_rows = None
+        self.index = {}
+        self._reindex()
+
+    @classmethod
+    def load(cls, path):
+        # 改行コードを変換せずに読み、parse() で判定する
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return cls.parse(f.read(), path)
+
+    @classmethod
+    def parse(cls, text, path=None):
+        lines = text.split('\n')
+        if lines and lines[-1] == '':
+            lines.pop()
+        if not lines:
+            return cls([], [], path)
+        newline = '\r\n' if lines[0].endswith('\r') else '\n'
+        rows = [line.rstrip('\r').split('\t') for line in lines]
+        return cls(rows[0], rows[1:], path, newline)
+
+    def subset(self, rows):
+        """
+        rows だけを走査対象にしたテーブル
+
+        行・ヘッダー・索引は元のテーブルと共有するので、書き込みは元のテーブルに反映される。
+        列の追加・削除は元のテーブルの全行に対して行う。
+        """
+        table = KeywordTable(self.header, rows, self.path, self.newline)
+        table.category = self.category
+        table.index = self.index
+        table._all_rows = self._structure_rows()
+        return table
+
+    def _reindex(self):
+        self.index.clear()
+        self.index.update((name, i) for i, name in enumerate(self.header))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def has(self, name):
+        return name in self.index
+
+    def column(self, name):
+        """列の位置（列が無ければ KeyError）"""
+        return self.index[name]
+
+    def get(self, row, i, default=''):
+        """row の i 列目（列が足りない行は default）"""
+        return row[i] if 0 <= i < len(row) else default
+
+    def set(self, row, i, value):
+        """
+        row の i 列目に書き込む（列が足りない行は空欄で埋める）
+
+        列が足りない行に空欄を書き込むときは行を伸ばさない（読み込んだときの文字列のまま残す）。
+        """
+        if len(row) <= i:
+            if value == '':
+                return
+            row.extend([''] * (i + 1 - len(row)))
+        row[i] = value
+
+    def _structure_rows(self):
+        return self.rows if self._all_rows is None else self._all_rows
+
+    def insert_column(self, pos, name):
+        """pos の位置に空欄の列を挿入する"""
+        self.header.insert(pos, name)
+        for row in self._structure_rows():
+            if len(row) < pos:
+                row.extend([''] * (pos - len(row)))
+            row.insert(pos, '')
+        self._reindex()
+        return pos
+
+    def ensure_column(self, name, after=None):
+        """
+        列が無ければ追加して、その位置を返す
+
+        after の列があればその直後に、なければ末尾に追加する。
+        """
+        if name in self.index:
+            return self.index[name]
+        if after is not None and after in self.index:
+            return self.insert_column(self.index[after] + 1, name)
+        self.header.append(name)
+        self._reindex()
+        return self.index[name]
+
+    def drop_columns(self, names):
+        """列を削除する（無い列は無視）"""
+        positions = sorted((self.index[n] for n in names if n in self.index), reverse=True)
+        if not positions:
+            return
+        for pos in positions:
+            del self.header[pos]
+            for row in self._structure_rows():
+                if pos < len(row):
+                    del row[pos]
+        self._reindex()
+
+    def to_text(self):
+        if not self.header:
+            return ''
+        return self.newline.join('\t'.join(cols) for cols in [self.header] + self.rows) + self.newline
+
+    def save(self, path=None):
+        """書き出す（一時ファイルに書いてから置き換える）"""
+        path = path or self.path
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(self.to_text())
+        os.replace(tmp_path, path)
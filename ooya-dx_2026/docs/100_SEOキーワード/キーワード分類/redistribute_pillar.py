@@ -2,10 +2,24 @@
 """ピラーページのキーワードを子ページに再分類するスクリプト
 
 ピラーに集中していた237KWを、検索意図に基づいて適切な子ページに再配分する。
+移動したKWが他ファイルにもある場合は、キーワードの索引（keyword_index.py）で調べて報告する。
+キーワードDB（keyword_store.py）がTSVと一致していれば、ピラーページの行はDBの索引で引く。
 """
+import os
 import re
+from collections import Counter
 
-FILEPATH = '/Users/tetzlow/real-estate-app/ooya-dx_2026/docs/100_SEOキーワード/キーワード分類/仲介手数料_判定済み.tsv'
+from keyword_index import KeywordIndex
+from keyword_rules import RuleSet
+from keyword_store import open_existing
+from keyword_table import TSV_DIR, TSV_SUFFIX, KeywordTable
+
+FILEPATH = os.path.join(TSV_DIR, '仲介手数料_判定済み.tsv')
+CATEGORIES = {'仲介手数料'}
+ROW_LOCAL = True  # 各行の値だけで決まる（他の行を見ない）
+# transform() にキーワードの索引を渡す。索引で調べた他ファイルとの重複は集計・ログにだけ出し、
+# セルの値は変えないので、ROW_LOCAL・ルールのバージョンは索引の内容によらない
+USES_INDEX = True
 
 PILLAR_TITLE = '仲介手数料とは？仕組み・計算・相場を完全ガイド'
 
@@ -84,113 +98,113 @@ MARKET_RE = re.compile(r'最低金額|目安')
 CALC_RE = re.compile(r'速算式|物件価格')
 
 
-def classify_pillar_kw(kw):
-    """ピラーページのKWを適切な子ページに再分類"""
-    # 1. 企業名ブランド → 削除
-    if BRANDED.search(kw):
-        return 'DELETE'
-
-    # 2. 交渉（優先度高：値切る系が大量）
-    if NEGO_RE.search(kw):
-        return 'nego'
-
-    # 3. 無料
-    if FREE_RE.search(kw):
-        return 'free'
-
-    # 4. 不動産売買
-    if REALESTATE_RE.search(kw):
-        return 'realestate'
-
-    # 5. 会計（税より先にチェック：取得価額等は会計用語）
-    if ACCT_RE.search(kw):
-        return 'acct'
-
-    # 6. 消費税
-    if TAX_RE.search(kw):
-        return 'tax'
-
-    # 7. 法律・上限
-    if LEGAL_RE.search(kw):
-        return 'legal'
-
-    # 8. 賃貸
-    if RENTAL_RE.search(kw):
-        return 'rental'
-
-    # 9. 金額別
-    if PRICE_RE.search(kw):
-        return 'price'
-
-    # 10. 相場
-    if MARKET_RE.search(kw):
-        return 'market'
+# 振り分けの優先順（上から順に判定し、最初にマッチした行き先を採用）
+PILLAR_RULES = RuleSet([
+    (BRANDED, 'DELETE'),          # 1. 企業名ブランド → 削除
+    (NEGO_RE, 'nego'),            # 2. 交渉（優先度高：値切る系が大量）
+    (FREE_RE, 'free'),            # 3. 無料
+    (REALESTATE_RE, 'realestate'),  # 4. 不動産売買
+    (ACCT_RE, 'acct'),            # 5. 会計（税より先にチェック：取得価額等は会計用語）
+    (TAX_RE, 'tax'),              # 6. 消費税
+    (LEGAL_RE, 'legal'),          # 7. 法律・上限
+    (RENTAL_RE, 'rental'),        # 8. 賃貸
+    (PRICE_RE, 'price'),          # 9. 金額別
+    (MARKET_RE, 'market'),        # 10. 相場
+    (CALC_RE, 'calc'),            # 11. 計算
+])
 
-    # 11. 計算
-    if CALC_RE.search(kw):
-        return 'calc'
 
+def classify_pillar_kw(kw):
+    """ピラーページのKWを適切な子ページに再分類"""
     # 残りはピラーに留まる
-    return 'pillar'
-
+    return PILLAR_RULES.first(kw, 'pillar')
 
-def main():
-    with open(FILEPATH, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    header = lines[0].strip().split('\t')
-    idx = {name: i for i, name in enumerate(header)}
 
-    kw_i = idx['キーワード']
-    title_i = idx['想定ページタイトル']
-    hantei_i = idx['判定']
-    vol_i = idx['月間検索数']
+def transform(table, log=None, index=None):
+    """
+    ピラーページに割り当てられた非削除KWを子ページに再分類する
 
-    stats = {'stay': 0, 'moved': 0, 'deleted': 0}
-    by_dest = {}
-    moved_details = []
-    new_lines = [lines[0]]
+    Args:
+        index: KeywordIndex（移動したKWが他ファイルにもあるかを調べる。None なら調べない）
 
-    for line in lines[1:]:
-        cols = line.strip().split('\t')
-        while len(cols) <= title_i:
-            cols.append('')
+    Returns:
+        'stay'/'moved'/'deleted'/'elsewhere'（移動したKWのうち他ファイルにもあるもの）の件数と、
+        ('移動先', タイトル先頭20文字) ごとの件数
+    """
+    stats = Counter()
+    kw_i = table.column('キーワード')
+    title_i = table.column('想定ページタイトル')
+    hantei_i = table.column('判定')
+    vol_i = table.column('月間検索数')
 
-        hantei = cols[hantei_i]
-        title = cols[title_i]
-        kw = cols[kw_i]
-        vol = int(cols[vol_i]) if cols[vol_i].isdigit() else 0
+    for row in table.rows:
+        hantei = table.get(row, hantei_i)
+        title = table.get(row, title_i)
+        kw = table.get(row, kw_i)
+        vol_str = table.get(row, vol_i)
+        vol = int(vol_str) if vol_str.isdigit() else 0
 
         # ピラーページに割り当てられた非削除KWのみ処理
         if hantei != '削除' and title == PILLAR_TITLE:
             dest = classify_pillar_kw(kw)
 
             if dest == 'DELETE':
-                cols[hantei_i] = '削除'
+                table.set(row, hantei_i, '削除')
                 stats['deleted'] += 1
-                moved_details.append(f'  削除  {kw} (vol={vol})')
+                if log is not None:
+                    log.append(f'  削除  {kw} (vol={vol})')
             elif dest != 'pillar':
-                cols[title_i] = TITLES[dest]
+                table.set(row, title_i, TITLES[dest])
                 stats['moved'] += 1
                 dest_name = TITLES[dest][:20]
-                by_dest[dest_name] = by_dest.get(dest_name, 0) + 1
-                moved_details.append(f'  → {dest_name}...  {kw} (vol={vol})')
+                stats[('移動先', dest_name)] += 1
+                if log is not None:
+                    log.append(f'  → {dest_name}...  {kw} (vol={vol})')
+                elsewhere = index.elsewhere(kw, table.path) if index is not None else []
+                if elsewhere:
+                    stats['elsewhere'] += 1
+                    if log is not None:
+                        places = ', '.join(f'{e.file.replace(TSV_SUFFIX, "")}:{e.page_group}' for e in elsewhere)
+                        log.append(f'      ※他ファイルにも同じKW: {places}')
             else:
                 stats['stay'] += 1
 
-        new_lines.append('\t'.join(cols) + '\n')
+    return stats
 
-    with open(FILEPATH, 'w', encoding='utf-8') as f:
-        f.writelines(new_lines)
 
-    print(f'=== ピラーページ再分類完了 ===')
-    print(f'  ピラーに残留: {stats["stay"]}件')
-    print(f'  子ページに移動: {stats["moved"]}件')
-    print(f'  削除（企業名）: {stats["deleted"]}件')
-    print()
-    print('移動先内訳:')
-    for dest, cnt in sorted(by_dest.items(), key=lambda x: -x[1]):
-        print(f'  {cnt:3d}件  {dest}...')
+def summarize(stats):
+    lines = [
+        f'=== ピラーページ再分類完了 ===',
+        f'  ピラーに残留: {stats["stay"]}件',
+        f'  子ページに移動: {stats["moved"]}件',
+        f'    うち他ファイルにも同じKW: {stats["elsewhere"]}件',
+        f'  削除（企業名）: {stats["deleted"]}件',
+        '',
+        '移動先内訳:',
+    ]
+    by_dest = [(key[1], cnt) for key, cnt in stats.items() if isinstance(key, tuple)]
+    for dest, cnt in sorted(by_dest, key=lambda x: -x[1]):
+        lines.append(f'  {cnt:3d}件  {dest}...')
+    return lines
+
+
+def main():
+    table = KeywordTable.load(FILEPATH)
+    store = open_existing()
+    target = table
+    if store is not None and store.is_current(FILEPATH):
+        # DBがTSVと一致していれば、ピラーページの行だけをDBの索引で引く（ROW_LOCAL なので行の部分集合で足りる）
+        rows = store.rows_with(os.path.basename(FILEPATH), 想定ページタイトル=PILLAR_TITLE)
+        target = table.subset([table.rows[n] for n in rows])
+    moved_details = []
+    stats = transform(target, moved_details, KeywordIndex())
+    table.save()
+    if store is not None:
+        store.import_tsv(FILEPATH)
+        store.close()
+
+    for line in summarize(stats):
+        print(line)
     print()
     print('全移動詳細:')
     for d in moved_details:
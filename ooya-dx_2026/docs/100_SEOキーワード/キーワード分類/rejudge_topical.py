@@ -8,11 +8,19 @@
 4. CV的に遠いグループ → 補足に降格
 5. 「対象外」を含むグループ → 不要
 6. 判定=削除 のキーワード → 不要
+
+単体で実行したときは、キーワードDB（keyword_store.py）がTSVと一致していれば
+ページグループごとの合計検索数をDBの索引で引く（TSVを走査して集計しない）。
 """
-import glob, os, re
+import os
+import re
+from collections import Counter
+
+from keyword_store import open_existing
+from keyword_table import KeywordTable, list_tsv_files
 
-TSV_DIR = os.path.dirname(os.path.abspath(__file__))
-files = sorted(glob.glob(os.path.join(TSV_DIR, '*_判定済み.tsv')))
+CATEGORIES = None  # 全カテゴリが対象
+ROW_LOCAL = False  # ページグループのVol順で判定するので、ファイル全体を見る
 
 # CV距離が遠い（投資家に関係薄い）パターン → 補足に降格
 DEMOTE_PATTERNS = re.compile(
@@ -29,36 +37,54 @@ PROMOTE_PATTERNS = re.compile(
 
 MAX_ESSENTIAL = 5  # 計算グループ除く必須の上限
 
-total_files = 0
-total_updated = 0
-stats = {'必須': 0, '補足': 0, '不要': 0}
-
-for fpath in files:
-    cat_name = os.path.basename(fpath).replace('_判定済み.tsv', '')
 
-    with open(fpath, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    if not lines:
-        continue
+def group_stats(table):
+    """
+    ページグループごとの合計検索数と判定の種類（判定=削除・ページグループが空欄の行は除く）
 
-    # Phase 1: ページグループごとのVol集計
-    pg_vol = {}  # page_group -> total_vol
-    pg_hantei = {}  # page_group -> set of hantei values
-    for line in lines[1:]:
-        cols = line.strip().split('\t')
-        if len(cols) < 10:
-            continue
-        hantei = cols[5].strip()
+    Returns:
+        {ページグループ: (合計検索数, 判定の集合)}（KeywordStore.group_stats() と同じ形）
+    """
+    hantei_i = table.column('判定')
+    vol_i = table.column('月間検索数')
+    pg_i = table.column('ページグループ')
+    stats = {}
+    for row in table.rows:
+        hantei = table.get(row, hantei_i).strip()
         if hantei == '削除':
             continue
-        vol = int(cols[4]) if cols[4].strip().isdigit() else 0
-        pg = cols[9].strip()
+        vol_str = table.get(row, vol_i)
+        vol = int(vol_str) if vol_str.strip().isdigit() else 0
+        pg = table.get(row, pg_i).strip()
         if not pg:
             continue
-        pg_vol[pg] = pg_vol.get(pg, 0) + vol
-        if pg not in pg_hantei:
-            pg_hantei[pg] = set()
-        pg_hantei[pg].add(hantei)
+        total, values = stats.get(pg, (0, set()))
+        values.add(hantei)
+        stats[pg] = (total + vol, values)
+    return stats
+
+
+def transform(table, log=None, groups=None):
+    """
+    ページグループ単位でトピカル貢献を上書きする。必須/補足/不要ごとの行数を返す
+
+    Args:
+        groups: ページグループの集計（group_stats() の戻り値。省略時は table を走査して求める）
+    """
+    stats = Counter()
+    if not table.header:
+        return stats
+    cat_name = table.category
+
+    topical_i = table.ensure_column('トピカル貢献', after='観点')
+    hantei_i = table.column('判定')
+    pg_i = table.column('ページグループ')
+
+    # Phase 1: ページグループごとのVol集計
+    if groups is None:
+        groups = group_stats(table)
+    pg_vol = {pg: total for pg, (total, _) in groups.items()}  # page_group -> total_vol
+    pg_hantei = {pg: values for pg, (_, values) in groups.items()}  # page_group -> set of hantei values
 
     # Phase 2: ページグループの必須/補足を判定
     sorted_pgs = sorted(pg_vol.items(), key=lambda x: -x[1])
@@ -98,48 +124,63 @@ for fpath in files:
         # それ以外 → 補足
         pg_decision[pg] = '補足'
 
-    # Phase 3: TSV書き換え
-    new_lines = []
-    for i, line in enumerate(lines):
-        line = line.rstrip('\n')
-        cols = line.split('\t')
+    # Phase 3: トピカル貢献を上書き
+    for row in table.rows:
+        hantei = table.get(row, hantei_i).strip()
+        pg = table.get(row, pg_i).strip()
 
-        if i == 0:
-            new_lines.append(line)
-            continue
-
-        # Ensure we have enough columns
-        while len(cols) < 16:
-            cols.append('')
-
-        hantei = cols[5].strip()
-        pg = cols[9].strip()
-
-        # トピカル貢献（col 12）を上書き
         if hantei == '削除':
-            cols[12] = '不要'
+            topical = '不要'
         elif pg in pg_decision:
-            cols[12] = pg_decision[pg]
+            topical = pg_decision[pg]
         elif hantei == '計算ページ':
-            cols[12] = '必須'
+            topical = '必須'
         else:
-            cols[12] = '補足'
-
-        stats[cols[12]] = stats.get(cols[12], 0) + 1
-        new_lines.append('\t'.join(cols))
-        total_updated += 1
+            topical = '補足'
 
-    with open(fpath, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(new_lines) + '\n')
-    total_files += 1
+        table.set(row, topical_i, topical)
+        stats[topical] += 1
 
     # Show per-category summary
-    essential_pgs = [pg for pg, d in pg_decision.items() if d == '必須']
-    print(f'{cat_name}: 必須グループ {len(essential_pgs)}個')
-    for pg in essential_pgs:
-        print(f'  ✓ {pg} (Vol:{pg_vol[pg]:,})')
-
-print(f'\n=== 合計 ===')
-print(f'{total_files} files, {total_updated} rows updated')
-for k in ['必須', '補足', '不要']:
-    print(f'  {k}: {stats.get(k, 0):,}')
+    if log is not None:
+        essential_pgs = [pg for pg, d in pg_decision.items() if d == '必須']
+        log.append(f'{cat_name}: 必須グループ {len(essential_pgs)}個')
+        for pg in essential_pgs:
+            log.append(f'  ✓ {pg} (Vol:{pg_vol[pg]:,})')
+
+    return stats
+
+
+def summarize(stats):
+    return [f'  {k}: {stats.get(k, 0):,}' for k in ['必須', '補足', '不要']]
+
+
+def main():
+    total_files = 0
+    stats = Counter()
+    store = open_existing()
+    for fpath in list_tsv_files():
+        table = KeywordTable.load(fpath)
+        if not table.header:
+            continue
+        # DBがTSVと一致していれば、ページグループの集計はDBで引く
+        groups = store.group_stats(os.path.basename(fpath)) if store is not None and store.is_current(fpath) else None
+        log = []
+        stats += transform(table, log, groups)
+        table.save()
+        if store is not None:
+            store.import_tsv(fpath)
+        total_files += 1
+        for line in log:
+            print(line)
+    if store is not None:
+        store.close()
+
+    print(f'\n=== 合計 ===')
+    print(f'{total_files} files, {sum(stats.values())} rows updated')
+    for line in summarize(stats):
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+取引事例ストア構築ツール
+
+国土交通省 不動産情報ライブラリからダウンロードした取引価格CSVを読み込み、
+market-analysis が参照する列指向ストア（api/data/comparables）を構築する。
+
+使用例:
+    python scripts/build_comparable_store.py data/mlit/*.csv
+    python scripts/build_comparable_store.py data/mlit/*.csv --out /tmp/comparables
+"""
+
+import argparse
+import os
+import sys
+import time
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api')
+sys.path.insert(0, API_DIR)
+
+from shared.comparables import DEFAULT_STORE_DIR, build_store, read_mlit_csv
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='取引事例ストアの構築')
+    parser.add_argument('csv_files', nargs='+', help='取引価格CSV（UTF-8 BOM / Shift-JIS）')
+    parser.add_argument('--out', default=DEFAULT_STORE_DIR, help='出力ディレクトリ')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    records = []
+    for path in args.csv_files:
+        before = len(records)
+        records.extend(read_mlit_csv(path))
+        print(f"📄 {os.path.basename(path)}: {len(records) - before:,}件")
+
+    manifest = build_store(records, args.out)
+
+    print(f"\n✅ ストアを構築しました: {args.out}")
+    print(f"   取引事例: {manifest['row_count']:,}件")
+    print(f"   セグメント: {len(manifest['segments']):,}個")
+    print(f"   処理時間: {time.perf_counter() - started:.1f}秒")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+計算エンジンの差分等価性チェックツール
+
+validate_simulator_input が受け付ける範囲内で property_data をランダム生成し、
+基準実装 run_full_simulation と代替エンジンの両方に通して
+出力フィールドごとの不一致件数と速度比を報告する。
+エンジンを高速化・置き換える前に、出力が変わらないことを確認するために使う。
+
+代替エンジンは run_full_simulation と同じシグネチャ（property_data -> dict）の関数を
+「ファイルパス:関数名」または「モジュール名:関数名」で指定する。
+
+使用例:
+    python scripts/engine_equivalence.py --cases 5000
+    python scripts/engine_equivalence.py --candidate path/to/fast_engine.py:run_full_simulation
+    python scripts/engine_equivalence.py --candidate fast_engine:run --rel-tol 1e-6 --dump mismatches.jsonl
+"""
+
+import argparse
+import copy
+import importlib
+import importlib.util
+import json
+import math
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api')
+sys.path.insert(0, API_DIR)
+
+from shared.calculations import run_full_simulation
+from shared.validations import (
+    SIMULATOR_CHOICE_FIELDS,
+    get_simulator_number_fields,
+    validate_simulator_input,
+)
+
+# 整数で渡す必要があるフィールド（年数系は range() 等で使われる）
+INTEGER_UNITS = {'年'}
+
+# 任意フィールドを省略・空文字にする確率
+OMIT_PROBABILITY = 0.25
+EMPTY_PROBABILITY = 0.05
+# 範囲の端（最小値・最大値）を選ぶ確率
+EDGE_PROBABILITY = 0.05
+
+MISSING = object()
+
+
+# ========================================
+# 入力生成
+# ========================================
+
+def sample_number(rng: random.Random, rules: Dict[str, Any]) -> float:
+    """範囲内の数値を生成（桁の広い範囲は対数一様で散らす）"""
+    low, high = rules['min'], rules['max']
+    is_int = rules['unit'] in INTEGER_UNITS
+
+    if rng.random() < EDGE_PROBABILITY:
+        value = rng.choice([low, high])
+    elif low >= 0 and high > 100 * max(low, 1):
+        # 0〜10万のような広い範囲は一様だと大きい値ばかりになるため対数一様
+        value = math.exp(rng.uniform(math.log(max(low, 1)), math.log(high)))
+        if low == 0 and rng.random() < 0.1:
+            value = 0
+    else:
+        value = rng.uniform(low, high)
+
+    if is_int:
+        return int(min(max(round(value), math.ceil(low)), math.floor(high)))
+    return round(min(max(value, low), high), 2)
+
+
+def generate_property_data(rng: random.Random) -> Dict[str, Any]:
+    """validate_simulator_input を通過する property_data を1件生成"""
+    data: Dict[str, Any] = {
+        'property_name': f"検証物件{rng.randint(1, 99999)}",
+        'location': rng.choice(['東京都品川区', '大阪府大阪市北区', '福岡県福岡市中央区', '北海道札幌市']),
+    }
+
+    for field, rules in get_simulator_number_fields().items():
+        if not rules['required']:
+            roll = rng.random()
+            if roll < OMIT_PROBABILITY:
+                continue
+            if roll < OMIT_PROBABILITY + EMPTY_PROBABILITY:
+                data[field] = ""
+                continue
+        data[field] = sample_number(rng, rules)
+
+    for field, choices in SIMULATOR_CHOICE_FIELDS.items():
+        if rng.random() >= OMIT_PROBABILITY:
+            data[field] = rng.choice(choices)
+
+    return data
+
+
+def generate_cases(count: int, seed: int) -> List[Dict[str, Any]]:
+    """検証ケースを生成し、ハンドラーと同じ正規化を適用する"""
+    # simulate.py はファイル名にハイフンが無いので通常のimportで正規化関数を使える
+    from simulate import normalize_empty_values
+
+    rng = random.Random(seed)
+    cases = []
+    while len(cases) < count:
+        data = generate_property_data(rng)
+        errors = validate_simulator_input(data)
+        if errors:
+            # 生成器のバグ。範囲外の入力で比較しても意味がないので即座に止める
+            raise RuntimeError(f"生成した入力がバリデーションを通りません: {errors}")
+        cases.append(normalize_empty_values(data))
+    return cases
+
+
+# ========================================
+# エンジン読み込み・実行
+# ========================================
+
+def load_engine(spec: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """'path/to/file.py:func' または 'package.module:func' から関数を読み込む"""
+    target, _, func_name = spec.rpartition(':')
+    if not target or not func_name:
+        raise ValueError(f"エンジンは '<ファイルまたはモジュール>:<関数名>' で指定してください: {spec}")
+
+    if target.endswith('.py') or os.path.sep in target:
+        path = os.path.abspath(target)
+        module_name = 'candidate_' + os.path.splitext(os.path.basename(path))[0].replace('-', '_')
+        module_spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(target)
+    return getattr(module, func_name)
+
+
+def run_engine(engine: Callable, cases: List[Dict[str, Any]]) -> Tuple[List[Any], float]:
+    """全ケースを実行し、結果（例外は型名）と合計実行時間を返す"""
+    inputs = [copy.deepcopy(case) for case in cases]  # エンジンによる入力の書き換えを防ぐ
+    outputs: List[Any] = []
+    started = time.perf_counter()
+    for data in inputs:
+        try:
+            outputs.append(engine(data))
+        except Exception as e:
+            outputs.append(('__exception__', type(e).__name__))
+    return outputs, time.perf_counter() - started
+
+
+# ========================================
+# 比較
+# ========================================
+
+def flatten(value: Any, prefix: str = '') -> Dict[str, Any]:
+    """ネストした結果を 'results.IRR（%）' / 'cash_flow_table[3].営業CF' 形式のパスに展開"""
+    flat: Dict[str, Any] = {}
+    if isinstance(value, dict):
+        for key, child in value.items():
+            flat.update(flatten(child, f"{prefix}.{key}" if prefix else str(key)))
+    elif isinstance(value, (list, tuple)) and not (value and value[0] == '__exception__'):
+        flat[f"{prefix}.__len__"] = len(value)
+        for i, child in enumerate(value):
+            flat.update(flatten(child, f"{prefix}[{i}]"))
+    else:
+        flat[prefix or '<root>'] = value
+    return flat
+
+
+def values_match(expected: Any, actual: Any, rel_tol: float, abs_tol: float) -> bool:
+    """数値は許容誤差内なら一致、それ以外は厳密比較"""
+    if isinstance(expected, bool) or isinstance(actual, bool):
+        return expected == actual
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+        if math.isnan(expected) and math.isnan(actual):
+            return True
+        return math.isclose(expected, actual, rel_tol=rel_tol, abs_tol=abs_tol)
+    return expected == actual
+
+
+def field_group(path: str) -> str:
+    """行番号を畳んで集計用のフィールド名にする（cash_flow_table[3].営業CF → cash_flow_table[].営業CF）"""
+    out = []
+    skipping = False
+    for ch in path:
+        if ch == '[':
+            skipping = True
+            out.append('[')
+        elif ch == ']':
+            skipping = False
+            out.append(']')
+        elif not skipping:
+            out.append(ch)
+    return ''.join(out)
+
+
+def compare_outputs(expected: Any, actual: Any, rel_tol: float, abs_tol: float) -> List[Tuple[str, Any, Any]]:
+    """1ケース分の出力を比較し、不一致フィールドのリストを返す"""
+    flat_expected = flatten(expected)
+    flat_actual = flatten(actual)
+    mismatches = []
+    for path in sorted(set(flat_expected) | set(flat_actual)):
+        e = flat_expected.get(path, MISSING)
+        a = flat_actual.get(path, MISSING)
+        if e is MISSING or a is MISSING or not values_match(e, a, rel_tol, abs_tol):
+            mismatches.append((path,
+                               '<missing>' if e is MISSING else e,
+                               '<missing>' if a is MISSING else a))
+    return mismatches
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='計算エンジンの差分等価性チェック')
+    parser.add_argument('--candidate', default=None,
+                        help="比較対象のエンジン（'path/to/file.py:func' または 'module:func'）。"
+                             "省略時は基準実装同士で比較（ハーネス自体の動作確認用）")
+    parser.add_argument('--reference', default=None,
+                        help='基準エンジン（省略時は shared.calculations.run_full_simulation）')
+    parser.add_argument('--cases', type=int, default=1000, help='生成するケース数')
+    parser.add_argument('--seed', type=int, default=0, help='入力生成の乱数シード')
+    parser.add_argument('--rel-tol', type=float, default=1e-9, help='数値比較の相対許容誤差')
+    parser.add_argument('--abs-tol', type=float, default=1e-6, help='数値比較の絶対許容誤差')
+    parser.add_argument('--show', type=int, default=3, help='フィールドごとに表示する不一致例の数')
+    parser.add_argument('--dump', default=None, help='不一致ケースの入力と差分をJSONLで保存するパス')
+    args = parser.parse_args()
+
+    reference = load_engine(args.reference) if args.reference else run_full_simulation
+    candidate = load_engine(args.candidate) if args.candidate else run_full_simulation
+
+    print(f"🎲 {args.cases:,}件の入力を生成中（seed={args.seed}）...")
+    cases = generate_cases(args.cases, args.seed)
+
+    print("⏱  基準エンジンを実行中...")
+    expected_outputs, reference_time = run_engine(reference, cases)
+    print("⏱  比較エンジンを実行中...")
+    actual_outputs, candidate_time = run_engine(candidate, cases)
+
+    mismatched_cases = 0
+    by_field: Dict[str, List[Tuple[int, Any, Any]]] = {}
+    dump_file = open(args.dump, 'w', encoding='utf-8') if args.dump else None
+    try:
+        for i, (expected, actual) in enumerate(zip(expected_outputs, actual_outputs)):
+            mismatches = compare_outputs(expected, actual, args.rel_tol, args.abs_tol)
+            if not mismatches:
+                continue
+            mismatched_cases += 1
+            for path, e, a in mismatches:
+                by_field.setdefault(field_group(path), []).append((i, e, a))
+            if dump_file:
+                dump_file.write(json.dumps({
+                    'case': i,
+                    'input': cases[i],
+                    'mismatches': [{'field': p, 'expected': e, 'actual': a} for p, e, a in mismatches],
+                }, ensure_ascii=False, default=str) + '\n')
+    finally:
+        if dump_file:
+            dump_file.close()
+
+    print("\n" + "=" * 80)
+    print(f"ケース数: {len(cases):,}  不一致ケース: {mismatched_cases:,}")
+    print(f"基準: {reference_time:.3f}秒  比較: {candidate_time:.3f}秒  "
+          f"速度比: {reference_time / candidate_time if candidate_time > 0 else float('inf'):.2f}x")
+    print("=" * 80)
+
+    if by_field:
+        print("\n不一致フィールド（件数順）:")
+        for field, rows in sorted(by_field.items(), key=lambda x: -len(x[1])):
+            print(f"  {len(rows):>7,}件  {field}")
+            for case_index, e, a in rows[:args.show]:
+                print(f"           case {case_index}: expected={e!r} actual={a!r}")
+    else:
+        print("\n✅ 全ケースで出力が一致しました")
+
+    if args.dump and mismatched_cases:
+        print(f"\n📄 不一致ケースを保存しました: {args.dump}")
+
+    return 1 if mismatched_cases else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+市場データ一括取り込みツール
+
+取引価格CSV・公示地価CSV（UTF-8 BOM / Shift-JIS）をチャンク単位で読み込み、
+追記専用の圧縮列指向ストア（data/market_data）に取り込む。
+取り込み済みのファイルと、別のファイルから取り込み済みの取引時期・地域の行は処理しないので、
+期間が重なるCSVを含めて新しい四半期分を追加するだけでよい。
+
+取引価格を取り込んだ場合は、market-analysis が参照する取引事例ストア（api/data/comparables）に
+まだ入っていないパーツの行だけを追加する（価格キューブも既存のセルに追加するだけで、全件は集計し直さない）。
+取引事例ストアが無い・CSVから直接構築したものである場合と、--rebuild を指定した場合は全パーツから再構築する。
+公示地価は地価ページの生成スクリプトが LandPriceStoreClient 経由で参照する
+（環境変数 LAND_PRICE_SOURCE=store を指定して実行）。
+公示地価を取り込んで行が増えた場合は、地点ごとの複数年履歴ストア（data/land_price_history）も再構築する。
+
+使用例:
+    python scripts/ingest_market_data.py transactions data/mlit/*.csv
+    python scripts/ingest_market_data.py land_prices data/chika/L01-2025.csv
+    python scripts/ingest_market_data.py transactions new_quarter.csv --no-snapshot
+    python scripts/ingest_market_data.py transactions data/mlit/*.csv --rebuild
+"""
+
+import argparse
+import os
+import sys
+import time
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api')
+sys.path.insert(0, API_DIR)
+
+from shared.comparables import DEFAULT_STORE_DIR, build_store, read_store_parts, update_store
+from shared.land_price_history import build_history_store, get_history_dir
+from shared.market_data import DATASETS, DEFAULT_CHUNK_ROWS, IngestStore, get_ingest_dir
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='市場データの一括取り込み')
+    parser.add_argument('dataset', choices=sorted(DATASETS), help='取り込むデータの種類')
+    parser.add_argument('csv_files', nargs='+', help='CSVファイル（UTF-8 BOM / Shift-JIS）')
+    parser.add_argument('--root', default=None, help='取り込みストアのディレクトリ（既定: data/market_data）')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='1パーツあたりの行数')
+    parser.add_argument('--snapshot', default=None,
+                        help='再構築するストアの出力先（transactions: 取引事例ストア、land_prices: 地価履歴ストア）')
+    parser.add_argument('--no-snapshot', action='store_true', help='取引事例ストア・地価履歴ストアを再構築しない')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='取引事例ストアを追加分の反映ではなく全パーツから再構築する')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    store = IngestStore(get_ingest_dir(args.root), args.dataset)
+
+    def report(path: str, result: dict) -> None:
+        name = os.path.basename(path)
+        if result['skipped']:
+            print(f"⏭  {name}: 取り込み済みのためスキップ")
+        else:
+            print(f"📄 {name}: {result['rows']:,}件追加（取り込み済みの期間・地域 {result['duplicates']:,}件）")
+
+    totals = store.ingest(args.csv_files, chunk_rows=args.chunk_rows, progress=report)
+
+    print(f"\n✅ 取り込みが完了しました: {store.path}")
+    print(f"   追加: {totals['rows']:,}件  取り込み済みの期間・地域: {totals['duplicates']:,}件  "
+          f"スキップしたファイル: {totals['skipped_files']}")
+    print(f"   総件数: {store.row_count:,}件（{len(store.manifest['parts'])}パーツ）")
+
+    if args.dataset == 'transactions' and not args.no_snapshot:
+        snapshot = args.snapshot or DEFAULT_STORE_DIR
+        parts = [part['name'] for part in store.manifest['parts']]
+        built = read_store_parts(snapshot)
+        if args.rebuild or built is None or not set(built) <= set(parts):
+            manifest = build_store(store.iter_records(), snapshot, parts)
+            print(f"\n✅ 取引事例ストアを再構築しました: {snapshot}")
+            print(f"   取引事例: {manifest['row_count']:,}件  セグメント: {len(manifest['segments']):,}個")
+        else:
+            added = [name for name in parts if name not in set(built)]
+            if added:
+                manifest = update_store(store.iter_records(added), snapshot, added)
+                print(f"\n✅ 取引事例ストアに{len(added)}パーツを追加しました: {snapshot}")
+                print(f"   取引事例: {manifest['row_count']:,}件  セグメント: {len(manifest['segments']):,}個")
+
+    if args.dataset == 'land_prices' and totals['rows'] and not args.no_snapshot:
+        snapshot = get_history_dir(args.snapshot)
+        manifest = build_history_store(store.iter_records(), snapshot)
+        print(f"\n✅ 地価履歴ストアを再構築しました: {snapshot}")
+        print(f"   地点: {manifest['point_count']:,}件  年次: {manifest['years']}  行: {manifest['row_count']:,}件")
+
+    print(f"   処理時間: {time.perf_counter() - started:.1f}秒")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
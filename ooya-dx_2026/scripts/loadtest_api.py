@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+api/ ハンドラーのローカル負荷試験ツール
+
+api/ 配下のハンドラーを別プロセスのローカルサーバーで起動し、
+simulate / cf-simulate / market-analysis へのリクエストを指定した比率・同時実行数で送信して
+スループット、p50/p95/p99 レイテンシ、エラー率を集計する。
+外部ネットワークには一切アクセスしないため、リリース前の容量測定にそのまま使える。
+
+使用例:
+    python scripts/loadtest_api.py --concurrency 8 --duration 10
+    python scripts/loadtest_api.py --mix simulate=6,cf-simulate=3,market-analysis=1
+    python scripts/loadtest_api.py --sweep 1,2,4,8,16,32 --duration 5
+    python scripts/loadtest_api.py --market-data /tmp/comparables
+"""
+
+import argparse
+import importlib.util
+import http.client
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api')
+
+# エンドポイント名 → ハンドラーファイル
+ENDPOINT_FILES = {
+    'simulate': 'simulate.py',
+    'cf-simulate': 'cf-simulate.py',
+    'market-analysis': 'market-analysis.py',
+}
+
+# market-analysis は取引事例ストア（MARKET_DATA_DIR）が無いと 503 になるので、
+# ストアが無いときは既定の比率から外す
+DEFAULT_MIX = {'simulate': 5, 'cf-simulate': 4, 'market-analysis': 1}
+
+# 飽和判定: 同時実行数を上げてもスループットの伸びがこの比率未満なら飽和とみなす
+SATURATION_GAIN = 0.05
+
+
+# ========================================
+# リクエストペイロード
+# ========================================
+
+SIMULATOR_PAYLOAD = {
+    'propertyName': '負荷試験用物件',
+    'location': '東京都品川区',
+    'purchasePrice': 2800,
+    'monthlyRent': 12.5,
+    'loanAmount': 2520,
+    'interestRate': 2.3,
+    'loanYears': 35,
+    'loanType': '元利均等',
+    'holdingYears': 10,
+    'buildingArea': 60,
+    'managementFee': 8500,
+    'fixedCost': 6500,
+    'propertyTax': 84000,
+    'otherCosts': 200,
+    'renovationCost': 0,
+    'vacancyRate': 5,
+    'effectiveTaxRate': 20,
+    'landArea': 80,
+    'roadPrice': 300000,
+    'yearBuilt': 2005,
+    'propertyType': 'RC造',
+    'expectedSalePrice': 2520,
+    'marketValue': 2700,
+    'exitCapRate': 5,
+    'rentDecline': 1,
+    'buildingPrice': 1500,
+    'depreciationYears': 47,
+    'ownershipType': '個人',
+}
+
+MARKET_ANALYSIS_PAYLOAD = {
+    'location': '東京都品川区',
+    'land_area': 80,
+    'year_built': 2005,
+    'purchase_price': 2800,
+}
+
+
+def build_payload(endpoint: str, rng: random.Random) -> bytes:
+    """エンドポイントごとに少しずつ値を揺らしたリクエストボディを生成"""
+    if endpoint == 'market-analysis':
+        payload = dict(MARKET_ANALYSIS_PAYLOAD)
+        payload['land_area'] = round(payload['land_area'] * rng.uniform(0.7, 1.3), 1)
+        payload['purchase_price'] = round(payload['purchase_price'] * rng.uniform(0.7, 1.3))
+    else:
+        payload = dict(SIMULATOR_PAYLOAD)
+        payload['purchasePrice'] = round(payload['purchasePrice'] * rng.uniform(0.7, 1.3))
+        payload['monthlyRent'] = round(payload['monthlyRent'] * rng.uniform(0.8, 1.2), 1)
+        payload['holdingYears'] = rng.randint(5, 35)
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+
+# ========================================
+# サーバー（別プロセス）
+# ========================================
+
+def load_handler_class(filename: str):
+    """ハイフンを含むファイル名のハンドラーモジュールを読み込む"""
+    path = os.path.join(API_DIR, filename)
+    module_name = 'loadtest_' + os.path.splitext(filename)[0].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.handler
+
+
+def _silent(handler_class):
+    """アクセスログを抑制したハンドラーを返す（ログ出力がレイテンシに混ざらないように）"""
+    return type(handler_class.__name__, (handler_class,), {'log_message': lambda self, *args: None})
+
+
+def serve_endpoints(endpoints: List[str], port_queue) -> None:
+    """各エンドポイントを個別ポートで起動し、割り当てたポートを親プロセスへ返す"""
+    sys.path.insert(0, API_DIR)
+    servers = {}
+    for endpoint in endpoints:
+        handler_class = _silent(load_handler_class(ENDPOINT_FILES[endpoint]))
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler_class)
+        server.daemon_threads = True
+        servers[endpoint] = server
+
+    port_queue.put({endpoint: server.server_address[1] for endpoint, server in servers.items()})
+
+    threads = [threading.Thread(target=server.serve_forever, daemon=True) for server in servers.values()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def market_data_available() -> bool:
+    """market-analysis が参照する取引事例ストアがあるか"""
+    if API_DIR not in sys.path:
+        sys.path.insert(0, API_DIR)
+    from shared.comparables import get_comparable_store
+    return get_comparable_store() is not None
+
+
+def start_server(endpoints: List[str]) -> Tuple[multiprocessing.Process, Dict[str, int]]:
+    """負荷生成側とGILを奪い合わないよう、サーバーは別プロセスで起動する"""
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve_endpoints, args=(endpoints, port_queue), daemon=True)
+    process.start()
+    ports = port_queue.get(timeout=30)
+    return process, ports
+
+
+# ========================================
+# 負荷生成
+# ========================================
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """ソート済みリストのパーセンタイル（最近傍順位法）"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """'simulate=6,cf-simulate=3' 形式の比率指定を解析"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINT_FILES:
+            raise argparse.ArgumentTypeError(f"未知のエンドポイントです: {name}")
+        try:
+            mix[name] = int(weight) if weight else 1
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"比率は整数で指定してください: {part}")
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("比率の合計が0です")
+    return mix
+
+
+def send_request(port: int, body: bytes, timeout: float) -> int:
+    """1リクエスト送信してステータスコードを返す"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        conn.request('POST', '/', body=body, headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def run_load(ports: Dict[str, int], mix: Dict[str, int], concurrency: int,
+             duration: float, requests_limit: Optional[int] = None,
+             timeout: float = 30.0, seed: int = 0) -> Dict[str, Any]:
+    """
+    指定した同時実行数で負荷をかける
+
+    Args:
+        ports: エンドポイント名 → ポート番号
+        mix: エンドポイント名 → 比率
+        concurrency: 同時実行数（ワーカースレッド数）
+        duration: 実行時間（秒）。requests_limit 指定時は上限として扱う
+        requests_limit: 総リクエスト数の上限（省略時は時間のみで打ち切り）
+        timeout: 1リクエストのタイムアウト（秒）
+        seed: ペイロード生成用の乱数シード
+
+    Returns:
+        エンドポイント別・全体の集計結果
+    """
+    endpoints = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in endpoints]
+    samples: List[Tuple[str, float, int]] = []  # (endpoint, latency_sec, status)
+    lock = threading.Lock()
+    issued = [0]
+    deadline = time.perf_counter() + duration
+
+    def worker(worker_id: int) -> None:
+        rng = random.Random(seed * 1000 + worker_id)
+        local = []
+        while time.perf_counter() < deadline:
+            if requests_limit is not None:
+                with lock:
+                    if issued[0] >= requests_limit:
+                        break
+                    issued[0] += 1
+            endpoint = rng.choices(endpoints, weights)[0]
+            body = build_payload(endpoint, rng)
+            started = time.perf_counter()
+            try:
+                status = send_request(ports[endpoint], body, timeout)
+            except (OSError, http.client.HTTPException):
+                status = 0  # 接続エラー・タイムアウト
+            local.append((endpoint, time.perf_counter() - started, status))
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(worker, i) for i in range(concurrency)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    return summarize(samples, elapsed, concurrency)
+
+
+def summarize(samples: List[Tuple[str, float, int]], elapsed: float, concurrency: int) -> Dict[str, Any]:
+    """レイテンシ・エラー率を集計"""
+    def stats(rows: List[Tuple[str, float, int]]) -> Dict[str, Any]:
+        latencies = sorted(latency * 1000 for _, latency, _ in rows)
+        errors = sum(1 for _, _, status in rows if status == 0 or status >= 400)
+        status_counts: Dict[str, int] = {}
+        for _, _, status in rows:
+            key = str(status) if status else 'connection_error'
+            status_counts[key] = status_counts.get(key, 0) + 1
+        return {
+            'requests': len(rows),
+            'throughput_rps': round(len(rows) / elapsed, 1) if elapsed > 0 else 0,
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'max_ms': round(latencies[-1], 2) if latencies else 0,
+            'error_rate': round(errors / len(rows), 4) if rows else 0,
+            'status_counts': status_counts,
+        }
+
+    by_endpoint: Dict[str, List[Tuple[str, float, int]]] = {}
+    for row in samples:
+        by_endpoint.setdefault(row[0], []).append(row)
+
+    return {
+        'concurrency': concurrency,
+        'elapsed_sec': round(elapsed, 2),
+        'total': stats(samples),
+        'endpoints': {name: stats(rows) for name, rows in sorted(by_endpoint.items())},
+    }
+
+
+def find_saturation(results: List[Dict[str, Any]]) -> Optional[int]:
+    """スループットの伸びが SATURATION_GAIN 未満になった最初の同時実行数の直前を返す"""
+    for previous, current in zip(results, results[1:]):
+        prev_rps = previous['total']['throughput_rps']
+        if prev_rps > 0 and (current['total']['throughput_rps'] - prev_rps) / prev_rps < SATURATION_GAIN:
+            return previous['concurrency']
+    return None
+
+
+# ========================================
+# 出力
+# ========================================
+
+def print_result(result: Dict[str, Any]) -> None:
+    """1回分の結果を表形式で表示"""
+    print(f"\n同時実行数 {result['concurrency']} / 実行時間 {result['elapsed_sec']}秒")
+    print(f"  {'endpoint':<16} {'req':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>7}")
+    rows = list(result['endpoints'].items()) + [('(total)', result['total'])]
+    for name, s in rows:
+        print(f"  {name:<16} {s['requests']:>7} {s['throughput_rps']:>8} "
+              f"{s['p50_ms']:>8} {s['p95_ms']:>8} {s['p99_ms']:>8} {s['error_rate'] * 100:>6.2f}%")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='api/ ハンドラーのローカル負荷試験')
+    parser.add_argument('--mix', type=parse_mix, default=None,
+                        help='エンドポイント比率（例: simulate=5,cf-simulate=4,market-analysis=1。'
+                             '省略時は取引事例ストアが無ければ market-analysis を除く）')
+    parser.add_argument('--concurrency', type=int, default=8, help='同時実行数')
+    parser.add_argument('--duration', type=float, default=10.0, help='1回あたりの実行時間（秒）')
+    parser.add_argument('--requests', type=int, default=None, help='1回あたりの総リクエスト数の上限')
+    parser.add_argument('--sweep', default=None,
+                        help='同時実行数を順に変えて飽和点を探す（例: 1,2,4,8,16）')
+    parser.add_argument('--warmup', type=float, default=1.0, help='計測前のウォームアップ時間（秒）')
+    parser.add_argument('--timeout', type=float, default=30.0, help='1リクエストのタイムアウト（秒）')
+    parser.add_argument('--seed', type=int, default=0, help='ペイロード生成の乱数シード')
+    parser.add_argument('--json', dest='json_output', default=None, help='結果をJSONで保存するパス')
+    parser.add_argument('--market-data', default=None,
+                        help='market-analysis が参照する取引事例ストアのディレクトリ（MARKET_DATA_DIR）')
+    args = parser.parse_args()
+
+    if args.market_data:
+        os.environ['MARKET_DATA_DIR'] = os.path.abspath(args.market_data)
+
+    levels = [int(v) for v in args.sweep.split(',')] if args.sweep else [args.concurrency]
+    if any(level < 1 for level in levels):
+        parser.error('同時実行数は1以上で指定してください')
+
+    mix = dict(DEFAULT_MIX) if args.mix is None else args.mix
+    if mix.get('market-analysis') and not market_data_available():
+        if args.mix is None:
+            del mix['market-analysis']
+            print("⚠️  取引事例ストアが無いため market-analysis を除外します（--market-data または MARKET_DATA_DIR で指定）")
+        else:
+            print("⚠️  取引事例ストアが無いため market-analysis は 503 を返します（--market-data または MARKET_DATA_DIR で指定）")
+
+    endpoints = [name for name, weight in mix.items() if weight > 0]
+    process, ports = start_server(endpoints)
+    print("🚀 ローカルサーバー起動: " + ', '.join(f"{name}=:{port}" for name, port in ports.items()))
+
+    try:
+        if args.warmup > 0:
+            run_load(ports, mix, min(levels), args.warmup, timeout=args.timeout, seed=args.seed)
+
+        results = []
+        for level in levels:
+            result = run_load(ports, mix, level, args.duration, args.requests,
+                              timeout=args.timeout, seed=args.seed)
+            results.append(result)
+            print_result(result)
+    finally:
+        process.terminate()
+        process.join()
+
+    report: Dict[str, Any] = {'mix': mix, 'runs': results}
+    if len(results) > 1:
+        saturation = find_saturation(results)
+        report['saturation_concurrency'] = saturation
+        best = max(results, key=lambda r: r['total']['throughput_rps'])
+        print(f"\n📈 最大スループット: {best['total']['throughput_rps']} req/s（同時実行数 {best['concurrency']}）")
+        if saturation is not None:
+            print(f"📊 飽和点: 同時実行数 {saturation} 付近でスループットが頭打ち")
+        else:
+            print("📊 計測範囲内ではスループットは飽和していません")
+
+    if args.json_output:
+        with open(args.json_output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 結果を保存しました: {args.json_output}")
+
+    total_errors = sum(r['total']['error_rate'] for r in results)
+    return 1 if total_errors > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())